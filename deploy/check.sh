@@ -0,0 +1,26 @@
+#!/bin/sh
+# Проверяет запущенные по deploy/README.md nginx и gunicorn.
+# Использование: deploy/check.sh [http://127.0.0.1:8080] [медиафайл]
+set -e
+BASE=${1:-http://127.0.0.1:8080}
+MEDIA=$2
+
+header() {
+    curl -s -o /dev/null -D - "$@" | tr -d '\r'
+}
+
+echo '--- главная страница'
+header "$BASE/" | grep -i '^HTTP/'
+
+CSS=$(curl -s "$BASE/" | grep -o '/static/[^"]*\.css' | head -n 1)
+if [ -n "$CSS" ]; then
+    echo "--- статика $CSS"
+    header -H 'Accept-Encoding: gzip' "$BASE$CSS" \
+        | grep -i '^HTTP/\|^cache-control\|^content-encoding\|^expires'
+fi
+
+if [ -n "$MEDIA" ]; then
+    echo "--- медиафайл $MEDIA (должен прийти от nginx, без X-Accel-Redirect)"
+    header "$BASE/media/$MEDIA" \
+        | grep -i '^HTTP/\|^content-type\|^content-length\|^cache-control\|^x-accel'
+fi
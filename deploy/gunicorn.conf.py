@@ -0,0 +1,34 @@
+"""Настройки gunicorn: gunicorn -c deploy/gunicorn.conf.py yatube.wsgi."""
+import multiprocessing
+import os
+import shutil
+
+chdir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'yatube')
+raw_env = ['DJANGO_SETTINGS_MODULE=yatube.settings_production']
+
+bind = os.getenv('YATUBE_BIND', '127.0.0.1:8000')
+workers = int(
+    os.getenv('YATUBE_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+)
+# Потоки дают воркеру ждать базу и кэш, не занимая процесс целиком;
+# пул соединений рассчитан на столько же потоков (YATUBE_DB_POOL_SIZE).
+worker_class = 'gthread'
+threads = int(os.getenv('YATUBE_THREADS', 4))
+# Перезапуск воркеров время от времени ограничивает рост памяти.
+max_requests = 2000
+max_requests_jitter = 200
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# Приложение загружается в каждом воркере: пулы соединений и фоновые
+# потоки миниатюр создаются уже после fork.
+preload_app = False
+accesslog = '-'
+
+
+def on_starting(server):
+    """Файлы метрик прошлого запуска не должны попасть в новые суммы."""
+    shutil.rmtree(
+        os.getenv('YATUBE_METRICS_DIR', os.path.join(chdir, 'metrics')),
+        ignore_errors=True,
+    )
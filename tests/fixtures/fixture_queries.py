@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture
+def query_budget(settings):
+    """Превышение бюджета SQL-запросов страницы роняет запрос с ошибкой.
+
+    Кэш очищается, чтобы мерить страницу так, как её видит первый
+    посетитель после изменения данных.
+    """
+    settings.QUERY_BUDGET_RAISE = True
+    cache.clear()
+    return settings.QUERY_BUDGETS
@@ -0,0 +1,46 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts.urls import app_name, urlpatterns
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestQueryBudget:
+
+    def test_every_url_has_budget(self, query_budget):
+        for pattern in urlpatterns:
+            view_name = f'{app_name}:{pattern.name}'
+            assert view_name in query_budget, (
+                f'Задайте бюджет SQL-запросов для `{view_name}` '
+                'в `settings.QUERY_BUDGETS`'
+            )
+
+    def test_views_within_budget(
+        self, user_client, user, another_user, few_posts_with_group,
+        another_few_posts_with_group_with_follower, query_budget
+    ):
+        post = few_posts_with_group
+        requests = (
+            ('get', 'index', {}, None),
+            ('get', 'group_list', {'slug': post.group.slug}, None),
+            ('get', 'profile', {'username': another_user.username}, None),
+            ('get', 'post_detail', {'post_id': post.id}, None),
+            ('get', 'post_create', {}, None),
+            ('get', 'post_edit', {'post_id': post.id}, None),
+            ('get', 'follow_index', {}, None),
+            ('post', 'post_create', {}, {'text': 'Новый пост'}),
+            ('post', 'post_edit', {'post_id': post.id},
+             {'text': 'Новый текст', 'group': post.group.id}),
+            ('post', 'add_comment', {'post_id': post.id}, {'text': 'Текст'}),
+            ('get', 'profile_unfollow', {'username': another_user}, None),
+            ('get', 'profile_follow', {'username': another_user}, None),
+        )
+        for method, name, kwargs, data in requests:
+            cache.clear()
+            url = reverse(f'{app_name}:{name}', kwargs=kwargs)
+            try:
+                getattr(user_client, method)(url, data=data)
+            except Exception as e:
+                assert False, f'Страница `{url}` превысила бюджет: {e}'
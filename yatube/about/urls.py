@@ -1,11 +1,21 @@
 from django.urls import path
 
+from core.db_router import read_only
+
 from . import views
 
 
 app_name = 'about'
 
 urlpatterns = [
-    path('author/', views.AboutAuthorView.as_view(), name='author'),
-    path('tech/', views.AboutTechView.as_view(), name='tech'),
+    path(
+        'author/',
+        read_only(views.AboutAuthorView.as_view()),
+        name='author',
+    ),
+    path(
+        'tech/',
+        read_only(views.AboutTechView.as_view()),
+        name='tech',
+    ),
 ]
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Token
+
+
+@admin.register(Token)
+class TokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created')
+    raw_id_fields = ('user',)
+    fields = ('user',)
@@ -0,0 +1,61 @@
+from functools import wraps
+
+from django.http import Http404
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+
+from .errors import ApiError
+from .models import Token
+from .responses import error_response
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def authenticate(request):
+    """Пользователь по заголовку Authorization: Token <ключ> или по сессии.
+
+    Ключ в заголовке браузер сам не подставит, поэтому такие запросы
+    обходятся без CSRF-токена; запросы по сессии проверяются как формы.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Token '):
+        token = Token.objects.select_related('user').filter(
+            key=header[len('Token '):].strip()
+        ).first()
+        if token is None or not token.user.is_active:
+            raise ApiError(401, 'Неверный токен.')
+        request.user = token.user
+    elif (
+        request.method not in SAFE_METHODS
+        and request.user.is_authenticated
+        and CsrfViewMiddleware().process_view(request, None, (), {})
+    ):
+        raise ApiError(403, 'Нет CSRF-токена.')
+
+
+def endpoint(*methods, login_required=False):
+    """Представление API: разрешённые методы, вход и ошибки в JSON."""
+    if 'GET' in methods:
+        methods += ('HEAD',)
+
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    response = error_response(
+                        ApiError(405, 'Метод не поддерживается.')
+                    )
+                    response['Allow'] = ', '.join(methods)
+                    return response
+                authenticate(request)
+                if login_required and not request.user.is_authenticated:
+                    raise ApiError(401, 'Нужно войти.')
+                return view(request, *args, **kwargs)
+            except Http404:
+                return error_response(ApiError(404, 'Не найдено.'))
+            except ApiError as error:
+                return error_response(error)
+        return wrapper
+    return decorator
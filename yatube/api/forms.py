@@ -0,0 +1,12 @@
+from django import forms
+
+from posts.forms import PostForm
+from posts.models import Group
+
+
+class ApiPostForm(PostForm):
+    """PostForm, в которой группа указывается по slug, а не по pk."""
+
+    group = forms.ModelChoiceField(
+        Group.objects.all(), to_field_name='slug', required=False
+    )
@@ -0,0 +1,25 @@
+import secrets
+
+from django.conf import settings
+from django.db import models
+
+
+class Token(models.Model):
+    """Ключ доступа к API для клиентов без cookie, например мобильных."""
+
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='api_token',
+        verbose_name='Пользователь',
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = secrets.token_hex(20)
+        super().save(*args, **kwargs)
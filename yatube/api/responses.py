@@ -0,0 +1,124 @@
+import json
+
+from django.http import HttpResponse, StreamingHttpResponse
+
+from core import db_router
+from posts.paginators import CursorPaginator
+
+from .encoding import dumps
+from .errors import ApiError
+
+CONTENT_TYPE = 'application/json'
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Сколько строк читать из базы за раз и сколько байт отдавать серверу.
+CHUNK_SIZE = 500
+BUFFER_SIZE = 64 * 1024
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), content_type=CONTENT_TYPE, status=status)
+
+
+def no_content():
+    return HttpResponse(status=204)
+
+
+def error_response(error):
+    data = {'detail': error.detail}
+    if error.errors:
+        data['errors'] = error.errors
+    return json_response(data, status=error.status)
+
+
+def parse_body(request):
+    """Данные запроса: JSON или поля формы (для загрузки картинок)."""
+    if request.content_type != CONTENT_TYPE:
+        return request.POST.dict()
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, 'Некорректный JSON.')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Ожидается JSON-объект.')
+    return data
+
+
+def buffered(chunks):
+    """Склеивает мелкие куски, чтобы не писать в сокет по объекту."""
+    buffer, size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def stream_response(objects, serializer, next_url=None):
+    """Ответ {"results": [...], "next": ...}, записываемый по мере чтения.
+
+    objects — итератор: строки читаются из базы уже после выхода из
+    представления, порциями по CHUNK_SIZE, и целиком в памяти не лежат.
+    Чтение идёт с той же базы, что выбрана для запроса.
+    """
+    state = db_router.get_state()
+
+    def generate():
+        token = db_router.set_state(state)
+        try:
+            yield b'{"results":['
+            for number, obj in enumerate(objects):
+                if number:
+                    yield b','
+                yield dumps(serializer.to_dict(obj))
+            yield b'],"next":' + dumps(next_url and next_url()) + b'}'
+        finally:
+            db_router.reset_state(token)
+
+    return StreamingHttpResponse(
+        buffered(generate()), content_type=CONTENT_TYPE
+    )
+
+
+def paginated_response(request, queryset, serializer, field='pub_date',
+                       key='pk'):
+    """Страница курсорной пагинации: ?limit=, ?after=<курсор>."""
+    try:
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    paginator = CursorPaginator(queryset, limit, field=field, key=key)
+    position = None
+    if request.GET.get('after'):
+        position = paginator.decode_cursor(request.GET['after'])
+        if position is None:
+            raise ApiError(400, 'Некорректный курсор.')
+    rows = paginator.seek(position)[:limit + 1].iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    following = {}
+
+    def page():
+        previous = None
+        for number, obj in enumerate(rows):
+            if number == limit:
+                # Есть строка за страницей: следующая начнётся после previous.
+                following['after'] = paginator.encode_cursor(previous)
+                return
+            previous = obj
+            yield obj
+
+    def next_url():
+        if not following:
+            return None
+        query = request.GET.copy()
+        query['after'] = following['after']
+        return request.build_absolute_uri(
+            f'{request.path}?{query.urlencode()}'
+        )
+
+    return stream_response(page(), serializer, next_url)
@@ -0,0 +1,133 @@
+"""Сериализация моделей posts в словари для JSON.
+
+Сериализатор знает, какие колонки и связи нужны каждому полю, и по набору
+запрошенных полей (?fields=id,text) сам вызывает only() и select_related():
+без author в ответе не будет и JOIN с пользователями.
+"""
+from posts.models import Comment, Follow, Group, Post
+
+from .errors import ApiError
+
+
+def isoformat(value):
+    return value.isoformat()
+
+
+def media_url(file):
+    return file.url if file else None
+
+
+class Field:
+    """Поле ответа: путь к значению через точку и что для него загрузить.
+
+    only — пути для QuerySet.only(), related — связь для select_related(),
+    to_json — преобразование значения, если оно не None.
+    """
+
+    def __init__(self, source, only=None, related=None, to_json=None):
+        self.source = source.split('.')
+        self.only = only or (source.replace('.', '__'),)
+        self.related = related
+        self.to_json = to_json
+
+    def get(self, obj):
+        value = obj
+        for name in self.source:
+            value = getattr(value, name)
+            if value is None:
+                return None
+        return value if self.to_json is None else self.to_json(value)
+
+
+class Serializer:
+    model = None
+    fields = {}
+
+    def __init__(self, names=None):
+        """names — поля из параметра fields через запятую; None — все."""
+        names = [name for name in (names or '').split(',') if name]
+        unknown = set(names).difference(self.fields)
+        if unknown:
+            raise ApiError(400, 'Неизвестные поля: %s. Есть: %s.' % (
+                ', '.join(sorted(unknown)), ', '.join(self.fields)
+            ))
+        self.selected = {
+            name: self.fields[name] for name in names or self.fields
+        }
+
+    def prepare(self, queryset, *extra):
+        """Ограничивает queryset колонками и связями выбранных полей.
+
+        extra — колонки, нужные не ответу, а, например, пагинации.
+        """
+        only = {path for field in self.selected.values()
+                for path in field.only}
+        related = {field.related for field in self.selected.values()
+                   if field.related}
+        queryset = queryset.select_related(None)
+        # select_related() без аргументов пошёл бы по всем связям.
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only, *extra)
+
+    def to_dict(self, obj):
+        return {
+            name: field.get(obj) for name, field in self.selected.items()
+        }
+
+
+class PostSerializer(Serializer):
+    model = Post
+    fields = {
+        'id': Field('pk', only=('id',)),
+        'text': Field('text'),
+        'author': Field(
+            'author.username',
+            only=('author', 'author__username'),
+            related='author',
+        ),
+        'group': Field(
+            'group.slug', only=('group', 'group__slug'), related='group'
+        ),
+        'image': Field('image', to_json=media_url),
+        'pub_date': Field('pub_date', to_json=isoformat),
+        'updated': Field('updated', to_json=isoformat),
+    }
+
+
+class CommentSerializer(Serializer):
+    model = Comment
+    fields = {
+        'id': Field('pk', only=('id',)),
+        'post': Field('post_id', only=('post',)),
+        'author': Field(
+            'author.username',
+            only=('author', 'author__username'),
+            related='author',
+        ),
+        'text': Field('text'),
+        'created': Field('created', to_json=isoformat),
+    }
+
+
+class GroupSerializer(Serializer):
+    model = Group
+    fields = {
+        'slug': Field('slug'),
+        'title': Field('title'),
+        'description': Field('description'),
+    }
+
+
+class FollowSerializer(Serializer):
+    model = Follow
+    fields = {
+        'user': Field(
+            'user.username', only=('user', 'user__username'), related='user'
+        ),
+        'author': Field(
+            'author.username',
+            only=('author', 'author__username'),
+            related='author',
+        ),
+    }
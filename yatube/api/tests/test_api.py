@@ -0,0 +1,314 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+from ..models import Token
+
+
+def read(response):
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return json.loads(response.content)
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', password='secret-password'
+        )
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        cls.post = cls.posts[-1]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client(
+            HTTP_AUTHORIZATION='Token %s' % Token.objects.create(
+                user=self.author
+            ).key
+        )
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+
+class ReadApiTests(ApiTestCase):
+    def test_cursor_pagination_walks_all_posts(self):
+        url = reverse('api:post_list') + '?limit=2'
+        seen = []
+        while url:
+            data = read(self.guest_client.get(url))
+            seen += [post['id'] for post in data['results']]
+            url = data['next']
+        self.assertEqual(
+            seen, [post.pk for post in reversed(self.posts)]
+        )
+
+    def test_post_fields(self):
+        data = read(self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.posts[1].pk})
+        ))
+        self.assertEqual(data['author'], 'author')
+        self.assertEqual(data['group'], 'group')
+        self.assertIsNone(data['image'])
+        self.assertEqual(
+            set(data),
+            {'id', 'text', 'author', 'group', 'image', 'pub_date', 'updated'},
+        )
+
+    def test_sparse_fields_skip_joins(self):
+        with CaptureQueriesContext(connection) as context:
+            data = read(self.guest_client.get(
+                reverse('api:post_list') + '?fields=id,text'
+            ))
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('auth_user', sql)
+        self.assertNotIn('posts_group', sql)
+        self.assertNotIn('"image"', sql)
+
+    def test_related_fields_use_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            data = read(self.guest_client.get(
+                reverse('api:post_list') + '?fields=author,group'
+            ))
+        self.assertEqual(len(data['results']), len(self.posts))
+        self.assertEqual(
+            sum('posts_post' in query['sql']
+                for query in context.captured_queries),
+            1,
+        )
+
+    def test_unknown_field(self):
+        response = self.guest_client.get(
+            reverse('api:post_list') + '?fields=id,password'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', read(response)['detail'])
+
+    def test_filters(self):
+        data = read(self.guest_client.get(
+            reverse('api:post_list') + '?group=group&fields=id'
+        ))
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [self.posts[3].pk, self.posts[1].pk],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.guest_client.get(
+            reverse('api:post_list') + '?after=nonsense'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_groups(self):
+        data = read(self.guest_client.get(reverse('api:group_list')))
+        self.assertEqual(data['results'], [{
+            'slug': 'group', 'title': 'Группа', 'description': 'Описание'
+        }])
+        response = self.guest_client.get(
+            reverse('api:group_detail', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(read(response), {'detail': 'Не найдено.'})
+
+    def test_feed_requires_login(self):
+        self.assertEqual(
+            self.guest_client.get(reverse('api:feed')).status_code, 401
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        data = read(self.reader_client.get(
+            reverse('api:feed') + '?limit=3&fields=id'
+        ))
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [post.pk for post in reversed(self.posts)][:3],
+        )
+        data = read(self.reader_client.get(data['next']))
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [post.pk for post in reversed(self.posts)][3:],
+        )
+        self.assertIsNone(data['next'])
+
+    def test_method_not_allowed(self):
+        response = self.author_client.put(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, POST, HEAD')
+
+
+class WriteApiTests(ApiTestCase):
+    def test_token_by_password(self):
+        response = self.guest_client.post(
+            reverse('api:token'),
+            {'username': 'author', 'password': 'secret-password'},
+            content_type='application/json',
+        )
+        self.assertEqual(
+            read(response)['token'], Token.objects.get(user=self.author).key
+        )
+        response = self.guest_client.post(
+            reverse('api:token'),
+            {'username': 'author', 'password': 'wrong'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_post(self):
+        response = self.author_client.post(
+            reverse('api:post_list'),
+            {'text': 'Из приложения', 'group': 'group'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(pk=read(response)['id'])
+        self.assertEqual(
+            (post.text, post.author, post.group),
+            ('Из приложения', self.author, self.group),
+        )
+
+    def test_create_post_validation(self):
+        response = self.author_client.post(
+            reverse('api:post_list'),
+            {'text': '', 'group': 'missing'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(read(response)['errors']), {'text', 'group'})
+
+    def test_guest_cannot_create(self):
+        response = self.guest_client.post(
+            reverse('api:post_list'),
+            {'text': 'Аноним'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_bad_token(self):
+        response = Client(HTTP_AUTHORIZATION='Token nope').get(
+            reverse('api:post_list')
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_session_writes_need_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.reader)
+        response = client.post(
+            reverse('api:follow_list'),
+            {'author': 'author'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_only_author_edits(self):
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.reader_client.patch(
+            url, {'text': 'Чужое'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.author_client.patch(
+            url, {'text': 'Исправлено'}, content_type='application/json'
+        )
+        self.assertEqual(read(response)['text'], 'Исправлено')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Исправлено')
+        self.assertIsNone(self.post.group)
+
+    def test_delete_post(self):
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertEqual(self.reader_client.delete(url).status_code, 403)
+        self.assertEqual(self.author_client.delete(url).status_code, 204)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_comments(self):
+        url = reverse('api:comment_list', kwargs={'post_id': self.post.pk})
+        response = self.guest_client.post(
+            url, {'text': 'Гость'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.reader_client.post(
+            url, {'text': 'Комментарий'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.author, self.reader)
+        data = read(self.guest_client.get(url))
+        self.assertEqual(data['results'], [{
+            'id': comment.pk,
+            'post': self.post.pk,
+            'author': 'reader',
+            'text': 'Комментарий',
+            'created': comment.created.isoformat(),
+        }])
+
+    def test_follow_and_unfollow(self):
+        url = reverse('api:follow_list')
+        response = self.reader_client.post(
+            url, {'author': 'author'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            read(response), {'user': 'reader', 'author': 'author'}
+        )
+        self.assertEqual(
+            read(self.reader_client.get(url))['results'],
+            [{'user': 'reader', 'author': 'author'}],
+        )
+        self.assertTrue(self.reader.timeline.exists())
+        response = self.reader_client.post(
+            url, {'author': 'author'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.reader_client.post(
+            url, {'author': 'reader'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        detail = reverse('api:follow_detail', kwargs={'username': 'author'})
+        self.assertEqual(self.reader_client.delete(detail).status_code, 204)
+        self.assertEqual(self.reader_client.delete(detail).status_code, 404)
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(self.reader.timeline.exists())
+
+    def test_follow_batch(self):
+        url = reverse('api:follow_list')
+        Follow.objects.create(user=self.reader, author=self.author)
+        other = User.objects.create(username='other')
+        response = self.reader_client.patch(url, {
+            'follow': ['other', 'reader', 'nobody'],
+            'unfollow': ['author'],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(read(response), {
+            'followed': ['other'],
+            'unfollowed': ['author'],
+            'missing': ['nobody'],
+        })
+        self.assertEqual(
+            list(Follow.objects.values_list('user', 'author')),
+            [(self.reader.pk, other.pk)],
+        )
+        for data in (
+            {'follow': 'other'},
+            {'follow': ['other'], 'unfollow': ['other']},
+        ):
+            response = self.reader_client.patch(
+                url, data, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,27 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/token/', views.token, name='token'),
+    path('v1/posts/', views.post_list, name='post_list'),
+    path('v1/posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'v1/posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comment_list'
+    ),
+    path('v1/groups/', views.group_list, name='group_list'),
+    path(
+        'v1/groups/<slug:slug>/', views.group_detail, name='group_detail'
+    ),
+    path('v1/feed/', views.feed, name='feed'),
+    path('v1/follows/', views.follow_list, name='follow_list'),
+    path(
+        'v1/follows/<str:username>/',
+        views.follow_detail,
+        name='follow_detail'
+    ),
+]
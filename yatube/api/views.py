@@ -0,0 +1,251 @@
+"""JSON API версии 1 для постов, групп, комментариев и подписок.
+
+Права те же, что у страниц сайта (posts.permissions). Списки отдаются
+потоком с курсорной пагинацией; параметр fields оставляет в ответе только
+перечисленные поля.
+"""
+from django.contrib.auth import authenticate
+from django.shortcuts import get_object_or_404
+
+from core.db_router import read_only
+from posts import follows, permissions
+from posts.forms import CommentForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.timeline import get_feed
+
+from .decorators import endpoint
+from .errors import ApiError
+from .forms import ApiPostForm
+from .models import Token
+from .responses import (
+    json_response, no_content, paginated_response, parse_body,
+    stream_response,
+)
+from .serializers import (
+    CommentSerializer, FollowSerializer, GroupSerializer, PostSerializer,
+)
+
+FOLLOW_BATCH_LIMIT = 500
+
+
+def serializer_for(request, serializer_class):
+    return serializer_class(request.GET.get('fields'))
+
+
+def validate(form):
+    if not form.is_valid():
+        raise ApiError(
+            400, 'Данные не прошли проверку.', form.errors.get_json_data()
+        )
+    return form
+
+
+def post_data(post):
+    return {'text': post.text, 'group': post.group and post.group.slug}
+
+
+@endpoint('POST')
+def token(request):
+    """Ключ доступа для Authorization: Token <ключ> по логину и паролю."""
+    data = parse_body(request)
+    user = authenticate(
+        request,
+        username=data.get('username'),
+        password=data.get('password'),
+    )
+    if user is None:
+        raise ApiError(400, 'Неверное имя пользователя или пароль.')
+    key, _ = Token.objects.get_or_create(user=user)
+    return json_response({'token': key.key})
+
+
+@read_only
+@endpoint('GET', 'POST')
+def post_list(request):
+    """Посты от новых к старым, с фильтрами ?group=<slug>, ?author=<имя>."""
+    if request.method == 'POST':
+        return create_post(request)
+    serializer = serializer_for(request, PostSerializer)
+    queryset = Post.objects.all()
+    if 'group' in request.GET:
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return paginated_response(
+        request, serializer.prepare(queryset, 'pub_date'), serializer
+    )
+
+
+def create_post(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужно войти.')
+    form = validate(ApiPostForm(parse_body(request), request.FILES or None))
+    post = form.save(commit=False)
+    post.author = request.user
+    post.save()
+    return json_response(PostSerializer().to_dict(post), status=201)
+
+
+@read_only
+@endpoint('GET', 'PATCH', 'DELETE')
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    if request.method == 'GET':
+        return json_response(
+            serializer_for(request, PostSerializer).to_dict(post)
+        )
+    if not permissions.can_edit_post(request.user, post):
+        raise ApiError(403, 'Менять пост может только его автор.')
+    if request.method == 'DELETE':
+        post.delete()
+        return no_content()
+    form = validate(ApiPostForm(
+        {**post_data(post), **parse_body(request)}, instance=post
+    ))
+    return json_response(PostSerializer().to_dict(form.save()))
+
+
+@read_only
+@endpoint('GET', 'POST')
+def comment_list(request, post_id):
+    """Комментарии поста от новых к старым."""
+    post = get_object_or_404(Post, pk=post_id)
+    if request.method == 'POST':
+        if not permissions.can_comment(request.user, post):
+            raise ApiError(401, 'Нужно войти.')
+        comment = validate(CommentForm(parse_body(request))).save(
+            commit=False
+        )
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+        return json_response(
+            CommentSerializer().to_dict(comment), status=201
+        )
+    serializer = serializer_for(request, CommentSerializer)
+    return paginated_response(
+        request,
+        serializer.prepare(Comment.objects.filter(post=post), 'created'),
+        serializer,
+        field='created',
+    )
+
+
+@read_only
+@endpoint('GET')
+def group_list(request):
+    serializer = serializer_for(request, GroupSerializer)
+    return stream_response(
+        serializer.prepare(Group.objects.order_by('title')).iterator(),
+        serializer,
+    )
+
+
+@read_only
+@endpoint('GET')
+def group_detail(request, slug):
+    return json_response(serializer_for(request, GroupSerializer).to_dict(
+        get_object_or_404(Group, slug=slug)
+    ))
+
+
+@read_only
+@endpoint('GET', login_required=True)
+def feed(request):
+    """Лента подписок, как на странице «Избранные авторы»."""
+    serializer = serializer_for(request, PostSerializer)
+    return paginated_response(
+        request,
+        serializer.prepare(get_feed(request.user)),
+        serializer,
+        field='feed_date',
+        key='feed_post',
+    )
+
+
+def follow_one(request):
+    author = get_object_or_404(
+        User, username=parse_body(request).get('author')
+    )
+    if not permissions.can_follow(request.user, author):
+        raise ApiError(400, 'На себя подписаться нельзя.')
+    created = follows.follow(request.user, [author])
+    return json_response(
+        FollowSerializer().to_dict(Follow(user=request.user, author=author)),
+        status=201 if created else 200,
+    )
+
+
+def usernames(data, key):
+    names = data.get(key, [])
+    if (
+        not isinstance(names, list)
+        or not all(isinstance(name, str) for name in names)
+    ):
+        raise ApiError(400, f'{key}: нужен список имён.')
+    if len(names) > FOLLOW_BATCH_LIMIT:
+        raise ApiError(
+            400, f'{key}: не больше {FOLLOW_BATCH_LIMIT} имён за раз.'
+        )
+    return set(names)
+
+
+def follow_batch(request):
+    data = parse_body(request)
+    wanted = {key: usernames(data, key) for key in ('follow', 'unfollow')}
+    if wanted['follow'] & wanted['unfollow']:
+        raise ApiError(400, 'Одно имя и в follow, и в unfollow.')
+    authors = {
+        author.username: author
+        for author in User.objects.filter(
+            username__in=wanted['follow'] | wanted['unfollow']
+        ).only('pk', 'username')
+    }
+    changed = {}
+    for key, apply in (('follow', follows.follow),
+                       ('unfollow', follows.unfollow)):
+        found = [authors[name] for name in wanted[key] if name in authors]
+        pks = apply(request.user, found)
+        changed[key] = sorted(
+            author.username for author in found if author.pk in pks
+        )
+    return json_response({
+        'followed': changed['follow'],
+        'unfollowed': changed['unfollow'],
+        'missing': sorted(
+            (wanted['follow'] | wanted['unfollow']) - authors.keys()
+        ),
+    })
+
+
+@read_only
+@endpoint('GET', 'POST', 'PATCH', login_required=True)
+def follow_list(request):
+    """Подписки пользователя.
+
+    POST {"author": <имя>} подписывает на одного автора. PATCH
+    {"follow": [<имя>, ...], "unfollow": [...]} меняет подписки пачкой
+    и отвечает, на кого подписка появилась, от кого снята и каких имён
+    нет.
+    """
+    if request.method == 'POST':
+        return follow_one(request)
+    if request.method == 'PATCH':
+        return follow_batch(request)
+    serializer = serializer_for(request, FollowSerializer)
+    return stream_response(
+        serializer.prepare(
+            Follow.objects.filter(user=request.user).order_by('pk')
+        ).iterator(),
+        serializer,
+    )
+
+
+@endpoint('DELETE', login_required=True)
+def follow_detail(request, username):
+    author = User.objects.filter(username=username).only('pk').first()
+    if author is None or not follows.unfollow(request.user, [author]):
+        raise ApiError(404, 'Подписки нет.')
+    return no_content()
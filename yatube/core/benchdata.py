@@ -0,0 +1,237 @@
+"""Синтетические данные для нагрузочных замеров.
+
+Объёмы по умолчанию — как у крупного сайта: 100 тысяч пользователей и
+миллион постов. Популярность авторов подчиняется степенному закону:
+у немногих тысячи подписчиков и постов, у большинства — единицы.
+Строки пишутся пачками через bulk_create, без сигналов, поэтому
+счётчики, ленты и поиск после загрузки пересчитываются, как после
+import_jsonl.
+"""
+import io
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from posts import counters, timeline
+from posts.jsonl import original_dates
+from posts.models import Comment, Follow, Group, Post, User
+from search import index, suggest
+
+DEFAULTS = {
+    'users': 100_000,
+    'groups': 100,
+    'posts': 1_000_000,
+    'comments': 500_000,
+    # Среднее число подписок пользователя.
+    'follows': 20,
+    'images': 200,
+}
+# Пароль всех созданных пользователей: прогон входит под ними на сайт.
+PASSWORD = 'bench-password'
+BATCH_SIZE = 5000
+# Показатель степенного закона популярности авторов.
+ALPHA = 1.1
+HISTORY = timedelta(days=3 * 365)
+IMAGE_SHARE = 0.2
+NO_GROUP_SHARE = 0.3
+IMAGE_SIZE = (1200, 800)
+
+
+def batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Generator:
+    def __init__(self, seed=0, log=None):
+        self.random = random.Random(seed)
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(seed)
+        self.log = log or (lambda message: None)
+        # Тексты собираются из готовых предложений: Faker медленный.
+        self.sentences = [
+            self.fake.sentence(nb_words=10) for _ in range(2000)
+        ]
+        self.started = timezone.now() - HISTORY
+
+    def text(self, low, high):
+        return ' '.join(self.random.choices(
+            self.sentences, k=self.random.randint(low, high)
+        ))
+
+    def popularity(self, user_ids):
+        """Авторы в случайном порядке и накопленные веса их популярности."""
+        authors = list(user_ids)
+        self.random.shuffle(authors)
+        weights = itertools.accumulate(
+            1 / rank ** ALPHA for rank in range(1, len(authors) + 1)
+        )
+        return authors, list(weights)
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        first = User.objects.count()
+        for batch in batches(range(first, first + count)):
+            User.objects.bulk_create(
+                (
+                    User(
+                        username=f'{self.fake.user_name()}{number}',
+                        first_name=self.fake.first_name(),
+                        last_name=self.fake.last_name(),
+                        password=password,
+                    )
+                    for number in batch
+                ),
+                ignore_conflicts=True,
+            )
+        self.log(f'Пользователей: {count}')
+        return list(User.objects.values_list('pk', flat=True))
+
+    def create_groups(self, count):
+        first = Group.objects.count()
+        Group.objects.bulk_create(
+            (
+                Group(
+                    title=self.fake.word().capitalize() + f' {number}',
+                    slug=f'group-{number}',
+                    description=self.text(1, 3),
+                )
+                for number in range(first, first + count)
+            ),
+            ignore_conflicts=True,
+        )
+        self.log(f'Групп: {count}')
+        return list(Group.objects.values_list('pk', flat=True))
+
+    def create_images(self, count):
+        """Картинки с градиентом, общие для многих постов."""
+        names = []
+        for number in range(count):
+            image = Image.new('RGB', IMAGE_SIZE)
+            draw = ImageDraw.Draw(image)
+            start = [self.random.randrange(256) for _ in range(3)]
+            end = [self.random.randrange(256) for _ in range(3)]
+            height = IMAGE_SIZE[1]
+            for y in range(height):
+                draw.line((0, y, IMAGE_SIZE[0], y), fill=tuple(
+                    a + (b - a) * y // height for a, b in zip(start, end)
+                ))
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=85)
+            names.append(default_storage.save(
+                f'posts/bench-{number}.jpg', ContentFile(buffer.getvalue())
+            ))
+        self.log(f'Картинок: {count}')
+        return names
+
+    def post_date(self, position, count):
+        """Даты постов растут вместе с pk, как на живом сайте."""
+        return self.started + HISTORY * position / count
+
+    def group(self, group_ids):
+        if not group_ids or self.random.random() < NO_GROUP_SHARE:
+            return None
+        return self.random.choice(group_ids)
+
+    def create_posts(self, count, ranking, group_ids, images):
+        authors, weights = ranking
+        first_pk = (Post.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        with original_dates():
+            for batch in batches(range(count)):
+                posts = []
+                for position in batch:
+                    date = self.post_date(position, count)
+                    with_image = images and self.random.random() < IMAGE_SHARE
+                    posts.append(Post(
+                        text=self.text(1, 8),
+                        author_id=self.random.choices(
+                            authors, cum_weights=weights
+                        )[0],
+                        group_id=self.group(group_ids),
+                        image=self.random.choice(images) if with_image else '',
+                        pub_date=date,
+                        updated=date,
+                    ))
+                Post.objects.bulk_create(posts)
+        self.log(f'Постов: {count}')
+        return first_pk
+
+    def create_comments(self, count, user_ids, first_pk, posts):
+        """Комментарии к постам из последних posts, созданных с first_pk."""
+        with original_dates():
+            for batch in batches(range(count)):
+                comments = []
+                for _ in batch:
+                    position = self.random.randrange(posts)
+                    delay = (HISTORY * (1 - position / posts)) * (
+                        self.random.random() ** 4
+                    )
+                    comments.append(Comment(
+                        post_id=first_pk + position,
+                        author_id=self.random.choice(user_ids),
+                        text=self.text(1, 2),
+                        created=self.post_date(position, posts) + delay,
+                    ))
+                Comment.objects.bulk_create(comments)
+        self.log(f'Комментариев: {count}')
+
+    def create_follows(self, mean, user_ids, ranking):
+        """Подписки: у каждого их в среднем mean, авторы выбираются
+        по степенному закону популярности."""
+        authors, weights = ranking
+        total = 0
+
+        def follows():
+            for user_id in user_ids:
+                count = min(
+                    int(self.random.expovariate(1 / mean)), len(authors) - 1
+                )
+                chosen = set(self.random.choices(
+                    authors, cum_weights=weights, k=count
+                ))
+                chosen.discard(user_id)
+                for author_id in chosen:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        for batch in batches(follows()):
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        self.log(f'Подписок: {total}')
+
+    def generate(self, users, groups, posts, comments, follows, images):
+        user_ids = self.create_users(users)
+        group_ids = self.create_groups(groups)
+        image_names = self.create_images(images)
+        # Самые плодовитые авторы и самые читаемые — одни и те же.
+        ranking = self.popularity(user_ids)
+        with transaction.atomic():
+            first_pk = self.create_posts(
+                posts, ranking, group_ids, image_names
+            )
+        if posts:
+            with transaction.atomic():
+                self.create_comments(comments, user_ids, first_pk, posts)
+        self.create_follows(follows, user_ids, ranking)
+
+
+def rebuild():
+    """Пересчитывает счётчики, ленты, поиск и подсказки после загрузки."""
+    counters.rebuild()
+    timeline.rebuild()
+    index.rebuild()
+    suggest.rebuild()
+    cache.clear()
@@ -0,0 +1,452 @@
+"""Нагрузочный прогон по всем адресам posts, users и about.
+
+План — список запросов, который строится по seed из смеси MIX и данных
+базы. Его можно сохранить в файл и прогнать ещё раз на другом коммите.
+Запросы идут через django.test.Client внутри процесса, без сети и без
+веб-сервера, поэтому замер показывает время самого Django: представлений,
+шаблонов и базы. Для каждого маршрута отчёт даёт p50 и p99 времени ответа,
+пропускную способность, число SQL-запросов и пик выделенной памяти.
+"""
+import json
+import multiprocessing
+import random
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Max, Min
+from django.test import Client
+from django.urls import get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts.models import Follow, Group, Post, User
+
+from .benchdata import PASSWORD
+
+NAMESPACES = ('posts', 'users', 'about')
+SAMPLE_SIZE = 200
+PERCENTILES = (50, 99)
+
+
+class Sample:
+    """Пользователи, посты, группы и подписки, к которым обращается план.
+
+    Выбираются по seed из диапазонов pk, так что на тех же данных план
+    получается тем же.
+    """
+
+    def __init__(self, rnd, size=SAMPLE_SIZE):
+        self.users = list(User.objects.filter(
+            pk__in=self.pick(rnd, User.objects, size)
+        ).values_list('pk', 'username').order_by('pk'))
+        self.posts = list(Post.objects.filter(
+            pk__in=self.pick(rnd, Post.objects, size)
+        ).values_list('pk', 'author_id', 'author__username').order_by('pk'))
+        self.groups = list(
+            Group.objects.values_list('slug', flat=True).order_by('pk')[:size]
+        )
+        self.follows = list(Follow.objects.filter(
+            user_id__in=[pk for pk, _ in self.users]
+        ).values_list('user_id', 'author__username').order_by('pk')[:size])
+        if not (self.users and self.posts and self.groups):
+            raise ValueError(
+                'Нужны пользователи, посты и группы: запустите bench_data'
+            )
+
+    @staticmethod
+    def pick(rnd, queryset, size):
+        bounds = queryset.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return []
+        return [
+            rnd.randint(bounds['first'], bounds['last'])
+            for _ in range(size * 2)
+        ]
+
+
+def request(route, method='GET', user=None, fresh=False, data=None,
+            **kwargs):
+    """Запрос плана: route — имя URL, user — pk или None для гостя.
+
+    fresh — отдельный клиент, для входа и выхода, которые меняют сессию.
+    """
+    query = kwargs.pop('query', '')
+    return {
+        'route': route,
+        'method': method,
+        'path': reverse(route, kwargs=kwargs) + query,
+        'user': user,
+        'fresh': fresh,
+        'data': data,
+    }
+
+
+def page(rnd):
+    return '' if rnd.random() < 0.7 else f'?page={rnd.randint(2, 5)}'
+
+
+def post_form(rnd):
+    return {'text': f'Текст замера {rnd.random()}'}
+
+
+def any_user(rnd, sample):
+    return rnd.choice(sample.users)[0]
+
+
+def any_post(rnd, sample):
+    return rnd.choice(sample.posts)
+
+
+def edit(rnd, sample, method='GET', data=None):
+    post_id, author_id, _ = any_post(rnd, sample)
+    return request(
+        'posts:post_edit', method, user=author_id, data=data,
+        post_id=post_id,
+    )
+
+
+def reset_link(rnd, sample):
+    user = User.objects.get(pk=any_user(rnd, sample))
+    return {
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+def unfollow(rnd, sample):
+    user_id, username = rnd.choice(sample.follows or [
+        (any_user(rnd, sample), any_post(rnd, sample)[2])
+    ])
+    return request('posts:profile_unfollow', user=user_id, username=username)
+
+
+# Маршрут с методом: (вес в смеси, построитель запроса).
+# Смесь примерно как на живом сайте: в основном чтение лент и постов.
+MIX = {
+    'posts:index GET': (20, lambda rnd, sample: request(
+        'posts:index', query=page(rnd)
+    )),
+    'posts:group_list GET': (10, lambda rnd, sample: request(
+        'posts:group_list', slug=rnd.choice(sample.groups), query=page(rnd)
+    )),
+    'posts:profile GET': (10, lambda rnd, sample: request(
+        'posts:profile',
+        username=any_post(rnd, sample)[2],
+        query=page(rnd),
+    )),
+    'posts:post_detail GET': (15, lambda rnd, sample: request(
+        'posts:post_detail', post_id=any_post(rnd, sample)[0]
+    )),
+    'posts:follow_index GET': (8, lambda rnd, sample: request(
+        'posts:follow_index', user=any_user(rnd, sample), query=page(rnd)
+    )),
+    'posts:post_create GET': (1, lambda rnd, sample: request(
+        'posts:post_create', user=any_user(rnd, sample)
+    )),
+    'posts:post_create POST': (2, lambda rnd, sample: request(
+        'posts:post_create', 'POST', user=any_user(rnd, sample),
+        data=post_form(rnd),
+    )),
+    'posts:post_edit GET': (1, lambda rnd, sample: edit(rnd, sample)),
+    'posts:post_edit POST': (1, lambda rnd, sample: edit(
+        rnd, sample, 'POST', data=post_form(rnd)
+    )),
+    'posts:add_comment POST': (3, lambda rnd, sample: request(
+        'posts:add_comment', 'POST', user=any_user(rnd, sample),
+        data={'text': 'Комментарий замера'},
+        post_id=any_post(rnd, sample)[0],
+    )),
+    'posts:profile_follow GET': (2, lambda rnd, sample: request(
+        'posts:profile_follow', user=any_user(rnd, sample),
+        username=rnd.choice(sample.users)[1],
+    )),
+    'posts:profile_unfollow GET': (1, unfollow),
+    'users:signup GET': (1, lambda rnd, sample: request('users:signup')),
+    'users:signup POST': (1, lambda rnd, sample: request(
+        'users:signup', 'POST', fresh=True, data={
+            'username': f'bench{rnd.getrandbits(48)}',
+            'password1': PASSWORD,
+            'password2': PASSWORD,
+        },
+    )),
+    'users:login GET': (1, lambda rnd, sample: request('users:login')),
+    'users:login POST': (1, lambda rnd, sample: request(
+        'users:login', 'POST', fresh=True, data={
+            'username': rnd.choice(sample.users)[1], 'password': PASSWORD,
+        },
+    )),
+    'users:logout GET': (1, lambda rnd, sample: request(
+        'users:logout', user=any_user(rnd, sample), fresh=True
+    )),
+    'users:password_change GET': (1, lambda rnd, sample: request(
+        'users:password_change', user=any_user(rnd, sample)
+    )),
+    'users:password_change POST': (1, lambda rnd, sample: request(
+        'users:password_change', 'POST', user=any_user(rnd, sample),
+        fresh=True, data={
+            'old_password': PASSWORD,
+            'new_password1': PASSWORD,
+            'new_password2': PASSWORD,
+        },
+    )),
+    'users:password_change_done GET': (1, lambda rnd, sample: request(
+        'users:password_change_done', user=any_user(rnd, sample)
+    )),
+    'users:password_reset GET': (1, lambda rnd, sample: request(
+        'users:password_reset'
+    )),
+    'users:password_reset POST': (1, lambda rnd, sample: request(
+        'users:password_reset', 'POST',
+        data={'email': f'bench{rnd.randint(0, 999)}@example.com'},
+    )),
+    'users:password_reset_done GET': (1, lambda rnd, sample: request(
+        'users:password_reset_done'
+    )),
+    'users:password_reset_confirm GET': (1, lambda rnd, sample: request(
+        'users:password_reset_confirm', **reset_link(rnd, sample)
+    )),
+    'users:password_reset_complete GET': (1, lambda rnd, sample: request(
+        'users:password_reset_complete'
+    )),
+    'about:author GET': (2, lambda rnd, sample: request('about:author')),
+    'about:tech GET': (2, lambda rnd, sample: request('about:tech')),
+}
+
+
+def routes():
+    """Имена всех URL из NAMESPACES."""
+    resolver = get_resolver()
+    return {
+        f'{namespace}:{name}'
+        for namespace in NAMESPACES
+        for name in resolver.namespace_dict[namespace][1].reverse_dict
+        if isinstance(name, str)
+    }
+
+
+def missing_routes():
+    """Маршруты, которых нет в смеси: их нужно туда добавить."""
+    covered = {key.split()[0] for key in MIX}
+    return routes() - covered
+
+
+# GET-запросы, которые меняют данные или сессию.
+CHANGING = {
+    'posts:profile_follow GET',
+    'posts:profile_unfollow GET',
+    'users:logout GET',
+}
+
+
+def build_plan(seed, count, reads_only=False):
+    """План из count запросов; reads_only — только чтение."""
+    rnd = random.Random(seed)
+    sample = Sample(rnd)
+    mix = [
+        (key, weight, build) for key, (weight, build) in MIX.items()
+        if not reads_only or key.endswith(' GET') and key not in CHANGING
+    ]
+    keys = [key for key, _, _ in mix]
+    builders = {key: build for key, _, build in mix}
+    weights = [weight for _, weight, _ in mix]
+    return [
+        {'key': key, **builders[key](rnd, sample)}
+        for key in rnd.choices(keys, weights=weights, k=count)
+    ]
+
+
+class Runner:
+    """Выполняет запросы плана и собирает замеры по ключам MIX."""
+
+    def __init__(self, cold=False, memory=False):
+        self.cold = cold
+        self.memory = memory
+        self.clients = {}
+        self.samples = defaultdict(list)
+
+    def client(self, user, fresh):
+        if fresh or user not in self.clients:
+            client = Client()
+            if user is not None:
+                client.force_login(User.objects.get(pk=user))
+            if fresh:
+                return client
+            self.clients[user] = client
+        return self.clients[user]
+
+    def send(self, item):
+        client = self.client(item['user'], item['fresh'])
+        if item['fresh']:
+            # Смена пароля и выход завершают и другие сессии пользователя.
+            self.clients.pop(item['user'], None)
+        if self.cold:
+            cache.clear()
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            if item['method'] == 'POST':
+                response = client.post(item['path'], item['data'])
+            else:
+                response = client.get(item['path'])
+            status = response.status_code
+            queries = getattr(response.wsgi_request, 'query_count', None)
+        except Exception:
+            # Клиент тестов пробрасывает исключения представлений.
+            status, queries = 500, None
+        elapsed = time.perf_counter() - started
+        peak = (
+            tracemalloc.get_traced_memory()[1] - before
+            if self.memory else None
+        )
+        self.samples[item['key']].append((elapsed, status, queries, peak))
+
+    def run(self, plan):
+        if self.memory:
+            tracemalloc.start()
+        try:
+            for item in plan:
+                self.send(item)
+        finally:
+            if self.memory:
+                tracemalloc.stop()
+        return dict(self.samples)
+
+
+def run_worker(plan, cold, memory):
+    connections.close_all()
+    return Runner(cold=cold, memory=memory).run(plan)
+
+
+def run(plan, workers=1, cold=False, memory=False):
+    """Прогоняет план в workers процессах; возвращает замеры и время."""
+    started = time.perf_counter()
+    if workers == 1:
+        samples = Runner(cold=cold, memory=memory).run(plan)
+    else:
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers) as pool:
+            parts = pool.starmap(run_worker, [
+                (plan[number::workers], cold, memory)
+                for number in range(workers)
+            ])
+        samples = defaultdict(list)
+        for part in parts:
+            for key, rows in part.items():
+                samples[key] += rows
+    return samples, time.perf_counter() - started
+
+
+def percentile(values, percent):
+    """Значение, не меньше которого percent процентов values."""
+    ordered = sorted(values)
+    index = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[index]
+
+
+def summarize_route(rows):
+    times = [elapsed for elapsed, _, _, _ in rows]
+    queries = [count for _, _, count, _ in rows if count is not None]
+    peaks = [peak for _, _, _, peak in rows if peak is not None]
+    summary = {
+        'requests': len(rows),
+        'errors': sum(status >= 500 for _, status, _, _ in rows),
+        'rps': round(len(rows) / sum(times), 1) if sum(times) else None,
+        'queries': round(sum(queries) / len(queries), 1) if queries else None,
+        'max_queries': max(queries) if queries else None,
+        'peak_kb': round(max(peaks) / 1024) if peaks else None,
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(
+            percentile(times, percent) * 1000, 2
+        )
+    return summary
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(samples, wall, **meta):
+    """Отчёт о прогоне: сводка по маршрутам и общая пропускная способность."""
+    total = sum(len(rows) for rows in samples.values())
+    return {
+        'meta': {
+            'commit': commit(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            **meta,
+        },
+        'total': {
+            'requests': total,
+            'seconds': round(wall, 2),
+            'rps': round(total / wall, 1) if wall else None,
+        },
+        'routes': {
+            key: summarize_route(rows) for key, rows in sorted(samples.items())
+        },
+    }
+
+
+def compare(base, current, threshold=0.1, noise_ms=0.5):
+    """Ухудшения current относительно base.
+
+    Время считается ухудшившимся, если p50 или p99 выросли больше чем на
+    threshold и больше чем на noise_ms; число запросов — если выросло
+    хоть на один; ошибки — если их не было, а теперь есть.
+    """
+    regressions = []
+    for key, now in current['routes'].items():
+        was = base['routes'].get(key)
+        if was is None:
+            continue
+        for metric in [f'p{percent}_ms' for percent in PERCENTILES]:
+            if (
+                now[metric] > was[metric] * (1 + threshold)
+                and now[metric] - was[metric] > noise_ms
+            ):
+                regressions.append((key, metric, was[metric], now[metric]))
+        if (now['queries'] or 0) > (was['queries'] or 0):
+            regressions.append(
+                (key, 'queries', was['queries'], now['queries'])
+            )
+        if now['errors'] and not was['errors']:
+            regressions.append((key, 'errors', 0, now['errors']))
+    return regressions
+
+
+def save_plan(plan, path):
+    """Пишет план в JSON Lines, по запросу на строку."""
+    with open(path, 'w') as file:
+        for item in plan:
+            file.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+
+def load_plan(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def dump(data, path):
+    with open(path, 'w') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
@@ -0,0 +1,183 @@
+"""Кэш в файле SQLite, общий для всех процессов на одной машине.
+
+Не требует отдельного сервиса, в отличие от Redis и memcached, и, в
+отличие от LocMemCache, один на все воркеры gunicorn. Целые числа
+хранятся как есть, поэтому incr атомарен.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CULL_EVERY = 100
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        # После fork соединение родителя использовать нельзя.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB, expires REAL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.writes = 0
+        return self._local.connection
+
+    @staticmethod
+    def _encode(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self, rows, replace=True):
+        connection = self._connection()
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+        now = time.time()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            if not replace:
+                connection.executemany(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    [(key, now) for key, _, _ in rows],
+                )
+            try:
+                connection.executemany(
+                    f'{verb} INTO cache (key, value, expires) '
+                    f'VALUES (?, ?, ?)',
+                    rows,
+                )
+            except sqlite3.IntegrityError:
+                return False
+        self._local.writes += len(rows)
+        if self._local.writes >= CULL_EVERY:
+            self._local.writes = 0
+            self._cull()
+        return True
+
+    def _cull(self):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+            )
+            count, = connection.execute(
+                'SELECT COUNT(*) FROM cache'
+            ).fetchone()
+            if count > self._max_entries:
+                # Бессрочные записи (счётчики версий) не вытесняются:
+                # в SQLite NULL сортируется первым и ушёл бы раньше всех.
+                connection.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                    'WHERE expires IS NOT NULL ORDER BY expires LIMIT ?)',
+                    (count // self._cull_frequency,),
+                )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        return self._write([(key, self._encode(value), expires)], False)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        cache_keys = {self._key(key, version): key for key in keys}
+        rows = self._connection().execute(
+            'SELECT key, value FROM cache WHERE key IN (%s) '
+            'AND (expires IS NULL OR expires > ?)'
+            % ', '.join('?' * len(cache_keys)),
+            (*cache_keys, time.time()),
+        ).fetchall()
+        return {cache_keys[key]: self._decode(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        self._write([
+            (self._key(key, version), self._encode(value), expires)
+            for key, value in data.items()
+        ])
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._connection() as connection:
+            cursor = connection.execute(
+                'UPDATE cache SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (
+                    self.get_backend_timeout(timeout),
+                    self._key(key, version),
+                    time.time(),
+                ),
+            )
+        return bool(cursor.rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            cursor = connection.execute(
+                "UPDATE cache SET value = value + ? WHERE key = ? "
+                "AND typeof(value) = 'integer' "
+                "AND (expires IS NULL OR expires > ?)",
+                (delta, key, time.time()),
+            )
+            row = cursor.rowcount and connection.execute(
+                'SELECT value FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+        if not row:
+            raise ValueError("Key '%s' not found" % key)
+        return row[0]
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        with self._connection() as connection:
+            connection.executemany(
+                'DELETE FROM cache WHERE key = ?',
+                [(self._key(key, version),) for key in keys],
+            )
+
+    def has_key(self, key, version=None):
+        return bool(self.get_many([key], version=version))
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт весь срок процесса, как у LocMemCache.
+        pass
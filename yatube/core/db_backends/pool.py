@@ -0,0 +1,230 @@
+"""Пул соединений с базой на процесс.
+
+Django держит одно соединение на поток и при CONN_MAX_AGE = 0 закрывает
+его после каждого запроса. Бэкенды из этого пакета вместо закрытия
+возвращают соединение в пул, а следующее подключение берут из пула:
+так запрос не тратит время на установку соединения, а число соединений
+процесса ограничено сверху.
+"""
+import os
+import threading
+import time
+
+DEFAULTS = {
+    # Сколько соединений процесс держит открытыми одновременно.
+    'MAX_SIZE': 10,
+    # Сколько секунд ждать свободного соединения, прежде чем сдаться.
+    'TIMEOUT': 30,
+    # Соединение старше стольких секунд закрывается и создаётся заново.
+    'MAX_LIFETIME': 3600,
+    # Соединение, пролежавшее без дела дольше, проверяется запросом.
+    'HEALTH_CHECK_AFTER': 30,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    def __init__(self, max_size=DEFAULTS['MAX_SIZE'],
+                 timeout=DEFAULTS['TIMEOUT'],
+                 max_lifetime=DEFAULTS['MAX_LIFETIME'],
+                 health_check_after=DEFAULTS['HEALTH_CHECK_AFTER']):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self._idle = []
+        self._born = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self._stats = dict.fromkeys((
+            'checkouts', 'waits', 'timeouts', 'created', 'recycled',
+            'health_check_failures', 'closed',
+        ), 0)
+        self._wait_time = 0.0
+        self._lifetime = 0.0
+        self._max_lifetime_seen = 0.0
+
+    def checkout(self, connect, ping, error_class):
+        """Берёт соединение из пула или создаёт новое через connect().
+
+        ping(connection) проверяет давно не использованное соединение.
+        Если пул исчерпан дольше timeout секунд, бросает error_class.
+        """
+        started = time.monotonic()
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise error_class(
+                        f'Нет свободных соединений за {self.timeout} с '
+                        f'(в пуле {self.max_size})'
+                    )
+                self._condition.wait(remaining)
+            waited = time.monotonic() - started
+            self._stats['checkouts'] += 1
+            if waited > 0.001:
+                self._stats['waits'] += 1
+                self._wait_time += waited
+            if self._idle:
+                connection, last_used = self._idle.pop()
+            else:
+                connection, last_used = None, None
+                self._size += 1
+        if connection is not None:
+            connection = self._validate(connection, last_used, ping)
+        if connection is None:
+            connection = self._create(connect)
+        return connection
+
+    def _validate(self, connection, last_used, ping):
+        """Возвращает соединение из пула или None, если оно закрыто."""
+        now = time.monotonic()
+        if now - self._born[id(connection)] > self.max_lifetime:
+            self._discard(connection, reserve=True, reason='recycled')
+            return None
+        if now - last_used > self.health_check_after:
+            try:
+                ping(connection)
+            except Exception:
+                self._discard(
+                    connection, reserve=True, reason='health_check_failures'
+                )
+                return None
+        return connection
+
+    def checkin(self, connection, usable=True):
+        """Возвращает соединение в пул; негодное закрывается."""
+        too_old = (
+            time.monotonic() - self._born.get(id(connection), 0)
+            > self.max_lifetime
+        )
+        if not usable or too_old:
+            self._discard(connection, reason='recycled' if too_old else None)
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def _create(self, connect):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._born[id(connection)] = time.monotonic()
+            self._stats['created'] += 1
+        return connection
+
+    def _discard(self, connection, reserve=False, reason=None):
+        """Закрывает соединение.
+
+        При reserve место в пуле не освобождается: взамен сразу
+        создаётся новое соединение. reason — счётчик причины закрытия.
+        """
+        lifetime = time.monotonic() - self._born.pop(id(connection), 0)
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._stats['closed'] += 1
+            if reason:
+                self._stats[reason] += 1
+            self._lifetime += lifetime
+            self._max_lifetime_seen = max(self._max_lifetime_seen, lifetime)
+            if not reserve:
+                self._size -= 1
+                self._condition.notify()
+
+    def close_idle(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            closed = self._stats['closed']
+            return {
+                **self._stats,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                'wait_time': round(self._wait_time, 6),
+                'average_lifetime': round(
+                    self._lifetime / closed if closed else 0.0, 3
+                ),
+                'max_lifetime': round(self._max_lifetime_seen, 3),
+            }
+
+
+def get_pool(alias, options):
+    """Пул базы alias текущего процесса: после fork пул у ребёнка свой."""
+    key = alias, os.getpid()
+    with _pools_lock:
+        if key not in _pools:
+            settings = {**DEFAULTS, **options}
+            _pools[key] = ConnectionPool(
+                max_size=settings['MAX_SIZE'],
+                timeout=settings['TIMEOUT'],
+                max_lifetime=settings['MAX_LIFETIME'],
+                health_check_after=settings['HEALTH_CHECK_AFTER'],
+            )
+        return _pools[key]
+
+
+def pool_stats():
+    """Статистика пулов текущего процесса по алиасам баз."""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = dict(_pools)
+    return {
+        alias: pool.stats()
+        for (alias, pool_pid), pool in pools.items() if pool_pid == pid
+    }
+
+
+class PooledDatabaseWrapperMixin:
+    """Соединения DatabaseWrapper берутся из пула и возвращаются в него.
+
+    Параметры пула задаются в DATABASES[alias]['POOL'].
+    """
+
+    def get_pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        return self.get_pool().checkout(
+            lambda: connect(conn_params),
+            self.ping_connection,
+            self.Database.OperationalError,
+        )
+
+    @staticmethod
+    def ping_connection(connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        usable = True
+        try:
+            # Незавершённая транзакция не должна достаться следующему.
+            self.connection.rollback()
+        except Exception:
+            usable = False
+        if self.errors_occurred:
+            usable = usable and self.is_usable()
+        self.get_pool().checkin(self.connection, usable=usable)
@@ -0,0 +1,72 @@
+"""Чтение с реплик для представлений, которые только читают.
+
+ReplicaMiddleware заводит на запрос состояние ReplicaState; представления,
+помеченные read_only, читают с реплики, всё остальное — с основной базы.
+Любая запись в запросе закрепляет клиента за основной базой на
+REPLICA_STICKINESS секунд, чтобы он сразу увидел свои изменения.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+        self._alias = None
+
+    @property
+    def alias(self):
+        # Одна реплика на весь запрос: её данные согласованы между собой.
+        if self._alias is None:
+            self._alias = random.choice(settings.REPLICA_DATABASES)
+        return self._alias
+
+
+def get_state():
+    return _state.get()
+
+
+def set_state(state):
+    return _state.set(state)
+
+
+def reset_state(token):
+    _state.reset(token)
+
+
+def read_only(view):
+    """Разрешает представлению view читать с реплики."""
+    view.read_only = True
+    return view
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or not settings.REPLICA_DATABASES
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет смесь запросов ко всем страницам сайта и печатает '
+        'задержки, пропускную способность и число SQL-запросов по маршрутам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Сколько процессов шлют запросы одновременно',
+        )
+        parser.add_argument(
+            '--reads-only', action='store_true',
+            help='Только GET-запросы, не меняющие данных',
+        )
+        parser.add_argument(
+            '--plan', help='Прогнать план из файла вместо нового',
+        )
+        parser.add_argument(
+            '--save-plan', help='Сохранить план в файл, чтобы повторить',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--memory', action='store_true',
+            help='Замерять пик памяти запроса (медленнее)',
+        )
+        parser.add_argument(
+            '--output', help='Записать отчёт в JSON для bench_compare',
+        )
+
+    def handle(self, *args, **options):
+        if options['plan']:
+            plan = benchmark.load_plan(options['plan'])
+        else:
+            plan = benchmark.build_plan(
+                options['seed'], options['requests'], options['reads_only']
+            )
+        if options['save_plan']:
+            benchmark.save_plan(plan, options['save_plan'])
+        samples, wall = benchmark.run(
+            plan, workers=options['workers'], cold=options['cold'],
+            memory=options['memory'],
+        )
+        report = benchmark.report(
+            samples, wall, seed=options['seed'], plan=options['plan'],
+            workers=options['workers'], cold=options['cold'],
+        )
+        self.print_report(report)
+        if options['output']:
+            benchmark.dump(report, options['output'])
+        total = report['total']
+        self.stdout.write(self.style.SUCCESS(
+            f'Запросов: {total["requests"]} за {total["seconds"]} с, '
+            f'{total["rps"]} в секунду'
+        ))
+
+    def print_report(self, report):
+        columns = (
+            'requests', 'p50_ms', 'p99_ms', 'rps', 'queries', 'max_queries',
+            'errors', 'peak_kb',
+        )
+        self.stdout.write(
+            f'{"маршрут":<36}' + ''.join(f'{name:>12}' for name in columns)
+        )
+        for key, summary in report['routes'].items():
+            self.stdout.write(f'{key:<36}' + ''.join(
+                f'{"-" if summary[name] is None else summary[name]:>12}'
+                for name in columns
+            ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает два отчёта bench и завершается с ошибкой, если '
+        'какой-то маршрут стал медленнее или делает больше SQL-запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', help='Отчёт до изменений')
+        parser.add_argument('current', help='Отчёт после изменений')
+        parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help='Допустимый рост задержки, доля: 0.1 — на 10%%',
+        )
+
+    def handle(self, *args, **options):
+        base = benchmark.load(options['base'])
+        current = benchmark.load(options['current'])
+        regressions = benchmark.compare(
+            base, current, threshold=options['threshold']
+        )
+        for key, metric, was, now in regressions:
+            self.stdout.write(f'{key}: {metric} {was} → {now}')
+        if regressions:
+            raise CommandError(f'Ухудшений: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Ухудшений нет ({base["meta"]["commit"]} → '
+            f'{current["meta"]["commit"]})'
+        ))
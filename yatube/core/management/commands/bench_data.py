@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import benchdata
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками для нагрузочных замеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Множитель объёмов по умолчанию, например 0.01',
+        )
+        for name, default in benchdata.DEFAULTS.items():
+            parser.add_argument(
+                f'--{name}', type=int,
+                help=f'Вместо {default} × scale (подписок — без scale)',
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковые индексы',
+        )
+
+    def handle(self, *args, **options):
+        volumes = {
+            name: max(round(default * options['scale']), 1)
+            for name, default in benchdata.DEFAULTS.items()
+        }
+        # Подписок на пользователя столько же при любом масштабе.
+        volumes['follows'] = benchdata.DEFAULTS['follows']
+        volumes.update(
+            (name, options[name]) for name in benchdata.DEFAULTS
+            if options[name] is not None
+        )
+        started = time.perf_counter()
+        generator = benchdata.Generator(
+            seed=options['seed'], log=self.stdout.write
+        )
+        generator.generate(**volumes)
+        if not options['no_rebuild']:
+            benchdata.rebuild()
+            self.stdout.write(
+                'Счётчики, ленты и поисковые индексы пересчитаны'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные созданы за {time.perf_counter() - started:.0f} с; '
+            f'пароль пользователей: {benchdata.PASSWORD}'
+        ))
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает снимки профилировщика по URL: время по фазам и файлы '
+        'для flamegraph.pl (collapsed) или speedscope'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'routes', nargs='*', help='Имена URL, например posts:index',
+        )
+        parser.add_argument(
+            '--format', choices=('collapsed', 'speedscope'),
+            default='collapsed',
+        )
+        parser.add_argument('--output', default='.', help='Каталог файлов')
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить снимки после выгрузки',
+        )
+
+    def handle(self, *args, **options):
+        records = profiling.load()
+        routes = options['routes'] or sorted(records)
+        unknown = [route for route in routes if route not in records]
+        if unknown:
+            raise CommandError(f'Нет снимков для {", ".join(unknown)}')
+        os.makedirs(options['output'], exist_ok=True)
+        profiles = []
+        for route in routes:
+            stacks, phases = profiling.merge(records[route])
+            self.stdout.write(f'{route}: запросов {len(records[route])}, ' + (
+                ', '.join(f'{phase} {ms} мс' for phase, ms in phases.items())
+            ))
+            if options['format'] == 'collapsed':
+                self.write(
+                    options['output'],
+                    f'{profiling.file_name(route)}.collapsed',
+                    profiling.collapsed(stacks),
+                )
+            else:
+                interval = records[route][0]['interval_ms']
+                profiles.append((route, (stacks, interval)))
+        if profiles:
+            self.write(
+                options['output'], 'profile.speedscope.json',
+                json.dumps(profiling.speedscope(profiles)),
+            )
+        if options['clear']:
+            shutil.rmtree(settings.PROFILER_DIR, ignore_errors=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Профили записаны в {os.path.abspath(options["output"])}'
+        ))
+
+    def write(self, directory, name, content):
+        with open(os.path.join(directory, name), 'w') as file:
+            file.write(content)
@@ -0,0 +1,369 @@
+"""Метрики в формате Prometheus, общие для всех воркеров.
+
+Каждый процесс копит значения в памяти и не чаще раза в
+METRICS_FLUSH_INTERVAL секунд сбрасывает их в свой файл в METRICS_DIR.
+/metrics складывает файлы всех процессов: счётчики и гистограммы
+суммируются, так что перезапуск воркера их не обнуляет. Файлы
+завершившихся процессов при сборе складываются в один EXITED_FILE, и
+каталог не растёт от перезапусков воркеров. Состояние пулов соединений
+берётся только у живых процессов, с меткой pid. Каталог очищается при
+запуске сервера (on_starting в deploy/gunicorn.conf.py).
+Без METRICS_DIR, как в runserver и тестах, файлов нет, и /metrics
+показывает значения своего процесса.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from .db_backends.pool import pool_stats
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 4, 6, 8, 12, 16, 32, 64)
+DEPTH_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+INF = float('inf')
+EXITED_FILE = 'exited.json'
+LOCK_FILE = 'collect.lock'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=(), buckets=None):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = buckets
+        registry.register(self)
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        registry.add(self, self.key(labels), amount)
+
+
+class Histogram(Metric):
+    """Гистограмма: число наблюдений по корзинам, сумма и количество."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels, tuple(buckets))
+
+    def observe(self, value, **labels):
+        registry.add(self, self.key(labels), value)
+
+
+class Registry:
+    """Значения метрик текущего процесса.
+
+    После fork ребёнок начинает с нуля и пишет в свой файл: значения
+    родителя уже учтены в его файле.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._token = uuid.uuid4().hex[:8]
+        self._values = {}
+        self._flushed = time.monotonic()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def add(self, metric, key, value):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            values = self._values.setdefault(metric.name, {})
+            if metric.kind == 'counter':
+                values[key] = values.get(key, 0) + value
+                return
+            state = values.get(key)
+            if state is None:
+                # Корзины, корзина +Inf, затем сумма и количество.
+                state = values[key] = [0] * (len(metric.buckets) + 3)
+            index = next(
+                (
+                    index for index, bound in enumerate(metric.buckets)
+                    if value <= bound
+                ),
+                len(metric.buckets),
+            )
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def path(self, directory):
+        return os.path.join(directory, f'{self._pid}-{self._token}.json')
+
+    def snapshot(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            return {
+                'pid': self._pid,
+                'values': {
+                    # Копии корзин: их меняют другие потоки.
+                    name: [
+                        [list(key), value[:] if isinstance(value, list)
+                         else value]
+                        for key, value in values.items()
+                    ]
+                    for name, values in self._values.items()
+                },
+                'pools': pool_stats(),
+            }
+
+    def flush(self, directory=None):
+        """Пишет значения процесса в его файл атомарной заменой."""
+        directory = directory or settings.METRICS_DIR
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = self.path(directory)
+        data = self.snapshot()
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(data, file)
+        os.replace(temporary, path)
+        self._flushed = time.monotonic()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+registry = Registry()
+# Воркер, перезапущенный после max_requests, успевает записать последнее.
+atexit.register(registry.flush)
+
+REQUEST_SECONDS = Histogram(
+    'yatube_request_duration_seconds',
+    'Время ответа по имени URL, методу и классу статуса',
+    ('view', 'method', 'status'),
+)
+PAGE_CACHE = Counter(
+    'yatube_page_cache_total',
+    'Обращения к кэшу страниц: hit, miss или not_modified (304)',
+    ('view', 'result'),
+)
+DB_QUERIES = Histogram(
+    'yatube_db_queries',
+    'Число SQL-запросов на запрос к сайту',
+    ('view',),
+    buckets=QUERY_BUCKETS,
+)
+DB_SECONDS = Counter(
+    'yatube_db_seconds_total',
+    'Время SQL-запросов',
+    ('view',),
+)
+THUMBNAIL_SECONDS = Histogram(
+    'yatube_thumbnail_seconds',
+    'Создание миниатюр (thumbnail) и копий для srcset (variants)',
+    ('kind',),
+)
+PAGE_DEPTH = Histogram(
+    'yatube_page_depth',
+    'Номер запрошенной страницы ленты',
+    ('view',),
+    buckets=DEPTH_BUCKETS,
+)
+CURSOR_PAGES = Counter(
+    'yatube_cursor_pages_total',
+    'Страницы лент по курсору: их номер неизвестен',
+    ('view',),
+)
+
+
+def paginated(view):
+    """Помечает представление с лентой: метрики учтут номер страницы."""
+    view.paginated = True
+    return view
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        # Файл процесса, который перезаписывают прямо сейчас.
+        return None
+
+
+def write(path, data):
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+def merge(totals, values):
+    """Прибавляет значения одного процесса к totals."""
+    for name, rows in values.items():
+        merged = totals.setdefault(name, {})
+        for key, value in rows:
+            key = tuple(key)
+            if key not in merged:
+                merged[key] = value
+            elif isinstance(value, list):
+                merged[key] = [a + b for a, b in zip(merged[key], value)]
+            else:
+                merged[key] += value
+    return totals
+
+
+def fold_exited(directory):
+    """Складывает файлы завершившихся процессов в EXITED_FILE.
+
+    Вызывается под блокировкой каталога: иначе параллельный сбор мог бы
+    прочитать значения дважды, из файла процесса и из EXITED_FILE.
+    """
+    exited_path = os.path.join(directory, EXITED_FILE)
+    exited = []
+    for path in glob.glob(os.path.join(directory, '*-*.json')):
+        pid = int(os.path.basename(path).split('-')[0])
+        if pid != os.getpid() and not alive(pid):
+            exited.append(path)
+    if not exited:
+        return
+    data = read(exited_path) or {'pid': None, 'values': {}, 'pools': {}}
+    totals = merge({}, data['values'])
+    for path in exited:
+        found = read(path)
+        if found:
+            merge(totals, found['values'])
+    data['values'] = {
+        name: [[list(key), value] for key, value in values.items()]
+        for name, values in totals.items()
+    }
+    write(exited_path, data)
+    for path in exited:
+        os.remove(path)
+
+
+def snapshots(directory=None):
+    """Значения всех процессов из файлов или, без каталога, только свои."""
+    directory = directory or settings.METRICS_DIR
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(directory)
+    with open(os.path.join(directory, LOCK_FILE), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        fold_exited(directory)
+        found = [
+            read(path)
+            for path in glob.glob(os.path.join(directory, '*.json'))
+        ]
+    return [data for data in found if data]
+
+
+def collect(directory=None):
+    """Сумма значений всех процессов и состояния пулов живых процессов."""
+    totals = {}
+    pools = {}
+    for data in snapshots(directory):
+        merge(totals, data['values'])
+        if data['pools'] and alive(data['pid']):
+            pools[data['pid']] = data['pools']
+    return totals, pools
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+    )
+
+
+def label_string(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(
+        f'{name}="{escape(str(value))}"' for name, value in pairs
+    )
+
+
+def format_number(value):
+    if value == INF:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def histogram_lines(metric, key, state):
+    lines = []
+    cumulative = 0
+    for bound, count in zip((*metric.buckets, INF), state[:-2]):
+        cumulative += count
+        labels = label_string(
+            metric.labels, key, [('le', format_number(bound))]
+        )
+        lines.append(f'{metric.name}_bucket{labels} {cumulative}')
+    labels = label_string(metric.labels, key)
+    lines.append(f'{metric.name}_sum{labels} {format_number(state[-2])}')
+    lines.append(f'{metric.name}_count{labels} {state[-1]}')
+    return lines
+
+
+def exposition(directory=None):
+    """Текст для Prometheus со значениями всех процессов."""
+    totals, pools = collect(directory)
+    lines = []
+    for name, metric in registry.metrics.items():
+        lines += [
+            f'# HELP {name} {metric.help}',
+            f'# TYPE {name} {metric.kind}',
+        ]
+        for key, value in sorted(totals.get(name, {}).items()):
+            if metric.kind == 'histogram':
+                lines += histogram_lines(metric, key, value)
+            else:
+                labels = label_string(metric.labels, key)
+                lines.append(f'{name}{labels} {format_number(value)}')
+    name = 'yatube_db_pool'
+    lines += [
+        f'# HELP {name} Состояние пулов соединений живых процессов',
+        f'# TYPE {name} gauge',
+    ]
+    for pid, aliases in sorted(pools.items()):
+        for alias, stats in sorted(aliases.items()):
+            for stat, value in sorted(stats.items()):
+                labels = label_string(
+                    ('alias', 'pid', 'stat'), (alias, pid, stat)
+                )
+                lines.append(f'{name}{labels} {format_number(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+
+from core import metrics
+
+
+class MetricsMiddleware:
+    """Время ответа, SQL-запросы и глубина лент по имени URL.
+
+    Стоит первым: время включает остальные middleware, а число запросов
+    к базе уже посчитал QueryBudgetMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.REQUEST_SECONDS.observe(
+            elapsed, view=view, method=request.method,
+            status=f'{response.status_code // 100}xx',
+        )
+        if hasattr(request, 'query_count'):
+            metrics.DB_QUERIES.observe(request.query_count, view=view)
+            metrics.DB_SECONDS.inc(request.query_duration, view=view)
+        if getattr(request, 'paginated', False):
+            self.observe_depth(request, view)
+        metrics.registry.maybe_flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.paginated = getattr(view_func, 'paginated', False)
+
+    @staticmethod
+    def observe_depth(request, view):
+        if (
+            settings.POSTS_CURSOR_PAGINATION
+            or 'after' in request.GET
+            or 'before' in request.GET
+        ):
+            metrics.CURSOR_PAGES.inc(view=view)
+            return
+        try:
+            depth = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            depth = 1
+        metrics.PAGE_DEPTH.observe(depth, view=view)
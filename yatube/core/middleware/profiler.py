@@ -0,0 +1,40 @@
+import random
+
+from django.conf import settings
+
+from core import profiling
+
+HEADER = 'HTTP_X_PROFILE'
+
+
+class ProfilerMiddleware:
+    """Профилирует долю PROFILER_SAMPLE_RATE запросов.
+
+    Сотрудник может профилировать и конкретный запрос заголовком
+    X-Profile: 1. Время по фазам профилированного запроса добавляется
+    в заголовок Server-Timing, снимки стеков пишутся в PROFILER_DIR.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.wanted(request):
+            return self.get_response(request)
+        with profiling.Profile() as profile:
+            response = self.get_response(request)
+        match = request.resolver_match
+        route = match.view_name if match else 'unresolved'
+        profiling.save(profile.record(route, request.path))
+        response['Server-Timing'] = ', '.join(
+            f'prof-{phase};dur={ms}'
+            for phase, ms in profile.phases().items()
+        )
+        return response
+
+    @staticmethod
+    def wanted(request):
+        if request.META.get(HEADER) == '1' and request.user.is_staff:
+            return True
+        rate = settings.PROFILER_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
@@ -0,0 +1,66 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    """Считает SQL-запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class QueryBudgetMiddleware:
+    """Сверяет число запросов к БД с бюджетом из settings.QUERY_BUDGETS.
+
+    Бюджеты задаются по имени URL ('posts:index'). Превышение пишется в
+    лог, а при QUERY_BUDGET_RAISE = True прерывает запрос исключением.
+    Число запросов и время в БД отдаются в заголовке Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        request.query_count = recorder.count
+        request.query_duration = recorder.duration
+        timing = 'db;dur=%.1f;desc="%d queries"' % (
+            recorder.duration * 1000, recorder.count
+        )
+        if response.has_header('Server-Timing'):
+            timing = f'{timing}, {response["Server-Timing"]}'
+        response['Server-Timing'] = timing
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is not None and recorder.count > budget:
+            message = (
+                f'{view_name}: {recorder.count} SQL-запросов '
+                f'при бюджете {budget} ({request.path})'
+            )
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+
+from core import db_router
+
+COOKIE_NAME = 'primary_until'
+
+
+class ReplicaMiddleware:
+    """Отдаёт чтения представлений read_only репликам из REPLICA_DATABASES.
+
+    После запроса, который что-то записал, клиент получает cookie и
+    следующие REPLICA_STICKINESS секунд читает с основной базы: реплика
+    могла ещё не получить его изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = db_router.ReplicaState()
+        token = db_router.set_state(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.reset_state(token)
+        if state.wrote and settings.REPLICA_DATABASES:
+            until = time.time() + settings.REPLICA_STICKINESS
+            response.set_cookie(
+                COOKIE_NAME,
+                str(int(until)),
+                max_age=settings.REPLICA_STICKINESS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = db_router.get_state()
+        state.use_replica = (
+            bool(settings.REPLICA_DATABASES)
+            and getattr(view_func, 'read_only', False)
+            and request.method in ('GET', 'HEAD')
+            and not self.pinned(request)
+        )
+
+    @staticmethod
+    def pinned(request):
+        try:
+            return float(request.COOKIES[COOKIE_NAME]) > time.time()
+        except (KeyError, ValueError):
+            return False
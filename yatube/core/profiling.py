@@ -0,0 +1,213 @@
+"""Выборочный профилировщик запросов.
+
+Пока идёт профилируемый запрос, отдельный поток раз в interval секунд
+снимает стек потока запроса через sys._current_frames. Каждый снимок
+относится к фазе по самому глубокому кадру из известного пакета: база,
+миниатюры, кэш или шаблоны; остальное — Python. Время фазы — её доля
+снимков от полного времени запроса. Остальные запросы профилировщик не
+трогает, поэтому его можно держать включённым для 1% запросов.
+
+Снимки пишутся в PROFILER_DIR по файлу на URL и процесс, строкой JSON на
+запрос, а profile_export собирает из них collapsed stacks для
+flamegraph.pl или JSON для speedscope.
+"""
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import django
+from django.conf import settings
+
+# Фаза снимка — по первому с конца стека кадру из этих путей.
+PHASES = (
+    ('db', ('django/db/backends/', 'psycopg2/')),
+    ('image', ('sorl/', 'PIL/')),
+    ('cache', (
+        'django/core/cache/', 'django_redis/', 'redis/', 'memcache',
+    )),
+    ('template', ('django/template/',)),
+)
+PYTHON = 'python'
+MAX_DEPTH = 200
+DJANGO_ROOT = os.path.dirname(os.path.dirname(django.__file__))
+
+
+def short_path(path):
+    """Путь файла от корня проекта или от каталога пакетов."""
+    for root in (settings.BASE_DIR, DJANGO_ROOT):
+        if path.startswith(root + os.sep):
+            return path[len(root) + 1:]
+    return os.path.basename(path)
+
+
+class Sampler(threading.Thread):
+    """Снимает стеки потока thread_id, пока не вызван stop()."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.phases = Counter()
+        self._stopped = threading.Event()
+        self._labels = {}
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.sample(frame)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def label(self, code):
+        """Имя кадра и его фаза; считаются один раз на функцию."""
+        if code not in self._labels:
+            path = short_path(code.co_filename)
+            phase = next(
+                (
+                    name for name, prefixes in PHASES
+                    if any(prefix in path for prefix in prefixes)
+                ),
+                None,
+            )
+            self._labels[code] = (
+                f'{code.co_name} ({path}:{code.co_firstlineno})', phase
+            )
+        return self._labels[code]
+
+    def sample(self, frame):
+        names = []
+        phase = None
+        while frame is not None and len(names) < MAX_DEPTH:
+            name, frame_phase = self.label(frame.f_code)
+            names.append(name)
+            phase = phase or frame_phase
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(names))] += 1
+        self.phases[phase or PYTHON] += 1
+
+
+class Profile:
+    """Профиль одного запроса: with Profile() as profile: ..."""
+
+    def __init__(self, interval=None):
+        self.interval = interval or settings.PROFILER_INTERVAL
+        self.sampler = None
+        self.started = None
+        self.wall = None
+
+    def __enter__(self):
+        self.sampler = Sampler(threading.get_ident(), self.interval)
+        self.started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall = time.perf_counter() - self.started
+        self.sampler.stop()
+
+    def phases(self):
+        """Миллисекунды по фазам: доли снимков от времени запроса."""
+        total = sum(self.sampler.phases.values())
+        if not total:
+            return {PYTHON: round(self.wall * 1000, 2)}
+        return {
+            phase: round(self.wall * 1000 * count / total, 2)
+            for phase, count in self.sampler.phases.most_common()
+        }
+
+    def record(self, route, path):
+        return {
+            'route': route,
+            'path': path,
+            'time': time.time(),
+            'wall_ms': round(self.wall * 1000, 2),
+            'interval_ms': self.interval * 1000,
+            'phases': self.phases(),
+            'stacks': dict(self.sampler.stacks),
+        }
+
+
+def file_name(route):
+    return route.replace(':', '.')
+
+
+def save(record, directory=None):
+    """Дописывает запись в файл маршрута текущего процесса."""
+    directory = directory or settings.PROFILER_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f'{file_name(record["route"])}.{os.getpid()}.jsonl'
+    )
+    with open(path, 'a') as file:
+        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def load(directory=None):
+    """Записи всех процессов по маршрутам."""
+    directory = directory or settings.PROFILER_DIR
+    records = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.jsonl'))):
+        with open(path) as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    records.setdefault(record['route'], []).append(record)
+    return records
+
+
+def merge(records):
+    """Сумма снимков и средние миллисекунды фаз по записям маршрута."""
+    stacks = Counter()
+    phases = Counter()
+    for record in records:
+        stacks.update(record['stacks'])
+        phases.update(record['phases'])
+    return stacks, {
+        phase: round(total / len(records), 2)
+        for phase, total in phases.most_common()
+    }
+
+
+def collapsed(stacks):
+    """Строки «кадр;кадр;… число» для flamegraph.pl и speedscope."""
+    return ''.join(
+        f'{stack} {count}\n' for stack, count in sorted(stacks.items())
+    )
+
+
+def speedscope(profiles):
+    """Файл speedscope из пар (маршрут, (снимки, interval_ms))."""
+    frames = {}
+    documents = []
+    for route, (stacks, interval_ms) in profiles:
+        samples = []
+        weights = []
+        for stack, count in sorted(stacks.items()):
+            samples.append([
+                frames.setdefault(name, len(frames))
+                for name in stack.split(';')
+            ])
+            weights.append(count * interval_ms)
+        documents.append({
+            'type': 'sampled',
+            'name': route,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        })
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'exporter': 'yatube',
+        'shared': {'frames': [{'name': name} for name in frames]},
+        'profiles': documents,
+    }
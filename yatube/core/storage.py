@@ -0,0 +1,55 @@
+"""Хранилище статики для работы за nginx.
+
+collectstatic кладёт в STATIC_ROOT копии файлов с хэшем содержимого в
+имени (их можно кэшировать навсегда) и рядом сжатые копии .gz, которые
+nginx с gzip_static on отдаёт без сжатия на лету.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.html', '.json', '.xml',
+)
+# Файлы меньше этого размера сжатие почти не уменьшает.
+MIN_COMPRESS_SIZE = 256
+
+
+def compress(path):
+    """Пишет path.gz, если сжатие заметно уменьшает файл."""
+    with open(path, 'rb') as file:
+        content = file.read()
+    if len(content) < MIN_COMPRESS_SIZE:
+        return False
+    # mtime=0: одинаковый файл всегда сжимается в одинаковые байты.
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) > len(content) * 0.95:
+        return False
+    with open(path + '.gz', 'wb') as file:
+        file.write(compressed)
+    return True
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in hashed_names:
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                compress(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файла нет в собранной статике: ссылка без хэша лучше ошибки
+            # 500 на каждой странице.
+            return name
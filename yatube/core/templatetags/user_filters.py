@@ -6,3 +6,13 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.simple_tag(takes_context=True)
+def cursor_query(context, **cursor):
+    """Строка запроса для ссылки курсора: остальные параметры остаются."""
+    query = context['request'].GET.copy()
+    for name in ('after', 'before', 'page'):
+        query.pop(name, None)
+    query.update(cursor)
+    return query.urlencode()
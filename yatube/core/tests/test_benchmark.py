@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Follow, Group, Post, User
+
+from .. import benchmark
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=os.path.join(TEMP_DIR, 'media'))
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'bench_data', users=20, groups=3, posts=100, comments=50,
+            follows=3, images=0, stdout=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def bench(self, *args, **options):
+        path = os.path.join(TEMP_DIR, 'report.json')
+        call_command('bench', *args, output=path, stdout=StringIO(), **options)
+        return benchmark.load(path)
+
+    def test_data_is_generated(self):
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+
+    def test_mix_covers_every_route(self):
+        self.assertEqual(benchmark.missing_routes(), set())
+
+    def test_plan_is_reproducible(self):
+        self.assertEqual(
+            benchmark.build_plan(1, 50), benchmark.build_plan(1, 50)
+        )
+
+    def test_report_has_every_route(self):
+        report = self.bench(requests=len(benchmark.MIX) * 10, seed=1)
+        self.assertEqual(report['total']['requests'], len(benchmark.MIX) * 10)
+        self.assertLessEqual(set(report['routes']), set(benchmark.MIX))
+        for summary in report['routes'].values():
+            self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
+
+    def test_reads_run_without_errors(self):
+        report = self.bench(requests=100, reads_only=True, memory=True)
+        for key, summary in report['routes'].items():
+            self.assertTrue(key.endswith(' GET'))
+            self.assertEqual(summary['errors'], 0, key)
+            self.assertIsNotNone(summary['queries'])
+            self.assertIsNotNone(summary['peak_kb'])
+
+    def test_saved_plan_is_replayed(self):
+        path = os.path.join(TEMP_DIR, 'plan.jsonl')
+        first = self.bench(requests=20, reads_only=True, save_plan=path)
+        second = self.bench(plan=path)
+        self.assertEqual(
+            {key: summary['requests']
+             for key, summary in first['routes'].items()},
+            {key: summary['requests']
+             for key, summary in second['routes'].items()},
+        )
+
+
+class CompareTests(TestCase):
+    def report(self, p50, p99, queries, errors=0):
+        return {
+            'meta': {'commit': None},
+            'routes': {'posts:index GET': {
+                'p50_ms': p50, 'p99_ms': p99, 'queries': queries,
+                'errors': errors,
+            }},
+        }
+
+    def test_regressions_are_found(self):
+        base = self.report(10, 20, 2)
+        self.assertEqual(benchmark.compare(base, self.report(10.5, 21, 2)), [])
+        self.assertEqual(benchmark.compare(base, self.report(15, 40, 3, 1)), [
+            ('posts:index GET', 'p50_ms', 10, 15),
+            ('posts:index GET', 'p99_ms', 20, 40),
+            ('posts:index GET', 'queries', 2, 3),
+            ('posts:index GET', 'errors', 0, 1),
+        ])
+
+    def test_command_fails_on_regression(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        base = os.path.join(directory, 'base.json')
+        current = os.path.join(directory, 'current.json')
+        with open(base, 'w') as file:
+            json.dump(self.report(10, 20, 2), file)
+        with open(current, 'w') as file:
+            json.dump(self.report(10, 20, 3), file)
+        with self.assertRaises(CommandError):
+            call_command('bench_compare', base, current, stdout=StringIO())
+        call_command('bench_compare', base, base, stdout=StringIO())
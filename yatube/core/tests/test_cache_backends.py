@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..cache_backends.sqlite import CULL_EVERY, SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        self.cache = SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'), {}
+        )
+        self.cache.clear()
+
+    def test_set_get_many(self):
+        self.cache.set_many({'first': {'value': 1}, 'second': 'text'})
+        self.assertEqual(
+            self.cache.get_many(['first', 'second', 'missing']),
+            {'first': {'value': 1}, 'second': 'text'},
+        )
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_expired_values_are_missing(self):
+        self.cache.set('expired', 'value', timeout=0)
+        self.assertIsNone(self.cache.get('expired'))
+        self.assertTrue(self.cache.add('expired', 'new value'))
+
+    def test_shared_between_instances(self):
+        self.cache.set('shared', 'value')
+        another = SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'), {}
+        )
+        self.assertEqual(another.get('shared'), 'value')
+
+    def test_cull_keeps_entries_without_timeout(self):
+        cache = SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'),
+            {'OPTIONS': {'MAX_ENTRIES': 10}},
+        )
+        cache.set_many({'version:index': 1, 'version:group:1': 2}, None)
+        cache.set_many({f'page:{n}': n for n in range(CULL_EVERY)})
+        self.assertEqual(
+            cache.get_many(['version:index', 'version:group:1']),
+            {'version:index': 1, 'version:group:1': 2},
+        )
+        self.assertLess(
+            len(cache.get_many([f'page:{n}' for n in range(CULL_EVERY)])),
+            CULL_EVERY,
+        )
@@ -0,0 +1,112 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.models import User
+
+from ..db_backends.pool import ConnectionPool
+from ..db_backends.sqlite3.base import DatabaseWrapper
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+def ping(connection):
+    connection.execute('SELECT 1')
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.checkout(connect, ping, RuntimeError)
+        pool.checkin(first)
+        self.assertIs(pool.checkout(connect, ping, RuntimeError), first)
+        stats = pool.stats()
+        self.assertEqual((stats['checkouts'], stats['created']), (2, 1))
+        self.assertEqual((stats['in_use'], stats['idle']), (1, 0))
+
+    def test_exhausted_pool_times_out(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        pool.checkout(connect, ping, RuntimeError)
+        with self.assertRaises(RuntimeError):
+            pool.checkout(connect, ping, RuntimeError)
+        stats = pool.stats()
+        self.assertEqual((stats['timeouts'], stats['size']), (1, 1))
+
+    def test_failed_health_check_replaces_connection(self):
+        pool = ConnectionPool(health_check_after=0)
+        broken = pool.checkout(connect, ping, RuntimeError)
+        pool.checkin(broken)
+        broken.close()
+        time.sleep(0.01)
+        connection = pool.checkout(connect, ping, RuntimeError)
+        self.assertIsNot(connection, broken)
+        ping(connection)
+        stats = pool.stats()
+        self.assertEqual(stats['health_check_failures'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_old_connections_are_recycled(self):
+        pool = ConnectionPool(max_lifetime=0)
+        first = pool.checkout(connect, ping, RuntimeError)
+        time.sleep(0.01)
+        pool.checkin(first)
+        self.assertIsNot(pool.checkout(connect, ping, RuntimeError), first)
+        stats = pool.stats()
+        self.assertEqual((stats['recycled'], stats['created']), (1, 2))
+        self.assertGreater(stats['max_lifetime'], 0)
+
+    def test_unusable_connection_is_discarded(self):
+        pool = ConnectionPool()
+        pool.checkin(pool.checkout(connect, ping, RuntimeError), False)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class PooledBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_close_returns_connection_to_pool(self):
+        wrapper = DatabaseWrapper({
+            'ENGINE': 'core.db_backends.sqlite3',
+            'NAME': os.path.join(self.directory, 'pool.sqlite3'),
+            'POOL': {'MAX_SIZE': 1},
+            'ATOMIC_REQUESTS': False,
+            'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {},
+            'TIME_ZONE': None,
+            'USER': '',
+            'PASSWORD': '',
+            'HOST': '',
+            'PORT': '',
+            'TEST': {},
+        }, alias='pool_test')
+        for _ in range(3):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+        stats = wrapper.get_pool().stats()
+        self.assertEqual((stats['checkouts'], stats['created']), (3, 1))
+        wrapper.get_pool().close_idle()
+        self.assertEqual(wrapper.get_pool().stats()['size'], 0)
+
+
+class PoolStatsViewTests(TestCase):
+    def test_staff_only(self):
+        client = Client()
+        url = reverse('core:db_pool_stats')
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(
+            User.objects.create(username='admin', is_staff=True)
+        )
+        response = client.get(url)
+        self.assertEqual(response.json()['pid'], os.getpid())
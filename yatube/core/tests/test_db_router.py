@@ -0,0 +1,94 @@
+import time
+
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..db_router import ReplicaRouter, read_only
+from ..middleware.replica import COOKIE_NAME, ReplicaMiddleware
+
+router = ReplicaRouter()
+
+
+@read_only
+def reading_view(request):
+    return HttpResponse()
+
+
+def writing_view(request):
+    router.db_for_write(Post)
+    return HttpResponse()
+
+
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_STICKINESS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    # Без транзакции TestCase: внутри транзакции чтения идут в основную базу.
+    databases = {'default'}
+
+    def run_view(self, view, method='get', cookies=None):
+        """Прогоняет view через middleware; возвращает базу чтения и ответ."""
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            seen['db'] = router.db_for_read(Post)
+            return view(request)
+
+        middleware = ReplicaMiddleware(get_response)
+        response = middleware(request)
+        return seen['db'], response
+
+    def test_read_only_view_reads_from_replica(self):
+        database, response = self.run_view(reading_view)
+        self.assertEqual(database, 'replica1')
+        self.assertNotIn(COOKIE_NAME, response.cookies)
+
+    def test_other_views_read_from_primary(self):
+        self.assertIsNone(self.run_view(writing_view)[0])
+        self.assertIsNone(self.run_view(reading_view, method='post')[0])
+
+    def test_outside_request_reads_from_primary(self):
+        self.assertIsNone(router.db_for_read(Post))
+
+    def test_write_pins_client_to_primary(self):
+        _, response = self.run_view(writing_view)
+        cookie = response.cookies[COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 5)
+        database, _ = self.run_view(
+            reading_view, cookies={COOKIE_NAME: cookie.value}
+        )
+        self.assertIsNone(database)
+        database, _ = self.run_view(
+            reading_view, cookies={COOKIE_NAME: str(int(time.time()) - 1)}
+        )
+        self.assertEqual(database, 'replica1')
+
+    def test_transaction_reads_from_primary(self):
+        def view(request):
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Post))
+            return HttpResponse()
+
+        self.run_view(read_only(view))
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica1', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class ReplicaStickinessTests(TestCase):
+    def test_post_create_sets_cookie(self):
+        client = Client()
+        client.force_login(User.objects.create(username='test_user'))
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Test text'}
+        )
+        self.assertIn(COOKIE_NAME, response.cookies)
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+from .. import metrics
+
+
+class RegistryTests(SimpleTestCase):
+    def setUp(self):
+        metrics.registry.clear()
+
+    def test_histogram_exposition(self):
+        for value in (0.003, 0.2, 30):
+            metrics.REQUEST_SECONDS.observe(
+                value, view='posts:index', method='GET', status='2xx'
+            )
+        text = metrics.exposition()
+        labels = 'view="posts:index",method="GET",status="2xx"'
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            f'yatube_request_duration_seconds_bucket{{{labels},le="0.005"}} 1',
+            f'yatube_request_duration_seconds_bucket{{{labels},le="0.25"}} 2',
+            f'yatube_request_duration_seconds_bucket{{{labels},le="10"}} 2',
+            f'yatube_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3',
+            f'yatube_request_duration_seconds_sum{{{labels}}} 30.203',
+            f'yatube_request_duration_seconds_count{{{labels}}} 3',
+        ):
+            self.assertIn(line, text.splitlines())
+
+    def test_labels_are_escaped(self):
+        metrics.CURSOR_PAGES.inc(view='a"b\\c')
+        self.assertIn(
+            'yatube_cursor_pages_total{view="a\\"b\\\\c"} 1',
+            metrics.exposition(),
+        )
+
+    def test_processes_are_summed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        metrics.PAGE_CACHE.inc(view='posts:index', result='hit')
+        pid = os.fork()
+        if pid == 0:
+            metrics.PAGE_CACHE.inc(view='posts:index', result='hit')
+            metrics.PAGE_CACHE.inc(view='posts:index', result='miss')
+            metrics.registry.flush(directory)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        totals, _ = metrics.collect(directory)
+        self.assertEqual(totals['yatube_page_cache_total'], {
+            ('posts:index', 'hit'): 2,
+            ('posts:index', 'miss'): 1,
+        })
+        # Файл завершившегося процесса сложен в EXITED_FILE.
+        self.assertEqual(
+            sorted(os.listdir(directory)),
+            sorted([
+                os.path.basename(metrics.registry.path(directory)),
+                metrics.EXITED_FILE,
+                metrics.LOCK_FILE,
+            ]),
+        )
+        pid = os.fork()
+        if pid == 0:
+            metrics.PAGE_CACHE.inc(view='posts:index', result='hit')
+            metrics.registry.flush(directory)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        totals, _ = metrics.collect(directory)
+        self.assertEqual(totals['yatube_page_cache_total'], {
+            ('posts:index', 'hit'): 3,
+            ('posts:index', 'miss'): 1,
+        })
+        self.assertEqual(len(os.listdir(directory)), 3)
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        self.url = reverse('metrics')
+
+    def test_access(self):
+        self.assertEqual(Client().get(self.url).status_code, 403)
+        self.assertEqual(
+            Client().get(
+                self.url, HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code,
+            403,
+        )
+        response = Client().get(self.url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        staff = Client()
+        staff.force_login(User.objects.create(username='staff', is_staff=True))
+        self.assertEqual(staff.get(self.url).status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_empty_token_is_not_accepted(self):
+        response = Client().get(self.url, HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 403)
+
+    def test_requests_are_counted(self):
+        client = Client()
+        client.get('/')
+        response = client.get('/')
+        client.get('/', HTTP_IF_NONE_MATCH=response['ETag'])
+        client.get('/?page=3')
+        client.get('/?after=abc')
+        totals, _ = metrics.collect()
+        self.assertEqual(totals['yatube_page_cache_total'], {
+            ('posts:index', 'miss'): 3,
+            ('posts:index', 'hit'): 1,
+            ('posts:index', 'not_modified'): 1,
+        })
+        requests = totals['yatube_request_duration_seconds']
+        self.assertEqual(requests[('posts:index', 'GET', '2xx')][-1], 4)
+        self.assertEqual(requests[('posts:index', 'GET', '3xx')][-1], 1)
+        depth = totals['yatube_page_depth'][('posts:index',)]
+        self.assertEqual((depth[0], depth[2], depth[-1]), (3, 1, 4))
+        self.assertEqual(
+            totals['yatube_cursor_pages_total'], {('posts:index',): 1}
+        )
+        queries = totals['yatube_db_queries'][('posts:index',)]
+        self.assertEqual(queries[-1], 5)
+        self.assertIn(('posts:index',), totals['yatube_db_seconds_total'])
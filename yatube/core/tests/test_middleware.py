@@ -0,0 +1,26 @@
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+
+from ..middleware.query_budget import QueryBudgetExceeded
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.guest_client.get('/')
+        self.assertIn('queries', response['Server-Timing'])
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': 0}, QUERY_BUDGET_RAISE=True
+    )
+    def test_raises_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.guest_client.get('/')
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_logs_over_budget(self):
+        with self.assertLogs('core.middleware.query_budget', 'WARNING'):
+            self.guest_client.get('/')
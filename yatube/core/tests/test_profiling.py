@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from posts.models import User
+
+from .. import profiling
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+class SamplerTests(SimpleTestCase):
+    def test_phase_is_taken_from_innermost_frame(self):
+        sampler = profiling.Sampler(None, 1)
+
+        def capture():
+            sampler.sample(sys._getframe())
+            return ''
+
+        Template('{{ capture }}').render(Context({'capture': capture}))
+        capture()
+        self.assertEqual(sampler.phases, {'template': 1, 'python': 1})
+        stack = next(iter(sampler.stacks))
+        self.assertIn('render (django/template/base.py:', stack)
+        self.assertTrue(stack.endswith(
+            f'capture (core/tests/test_profiling.py:'
+            f'{capture.__code__.co_firstlineno})'
+        ))
+
+    def test_speedscope_shares_frames(self):
+        document = profiling.speedscope([
+            ('posts:index', ({'a;b': 2, 'a;c': 1}, 5)),
+        ])
+        self.assertEqual(
+            document['shared']['frames'],
+            [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}],
+        )
+        profile = document['profiles'][0]
+        self.assertEqual(profile['samples'], [[0, 1], [0, 2]])
+        self.assertEqual(profile['weights'], [10, 5])
+        self.assertEqual(profile['endValue'], 15)
+
+
+@override_settings(PROFILER_DIR=TEMP_DIR, PROFILER_INTERVAL=0.001)
+class ProfilerMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(shutil.rmtree, TEMP_DIR, ignore_errors=True)
+
+    @override_settings(PROFILER_SAMPLE_RATE=1)
+    def test_sampled_request_is_saved(self):
+        response = Client().get('/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('prof-', response['Server-Timing'])
+        [record] = profiling.load()['posts:index']
+        self.assertEqual(record['path'], '/')
+        self.assertAlmostEqual(
+            sum(record['phases'].values()), record['wall_ms'], delta=0.1
+        )
+
+    def test_not_sampled_by_default(self):
+        response = Client().get('/')
+        self.assertNotIn('prof-', response['Server-Timing'])
+        self.assertEqual(profiling.load(), {})
+
+    def test_staff_can_profile_request(self):
+        staff = Client()
+        staff.force_login(User.objects.create(username='staff', is_staff=True))
+        user = Client()
+        user.force_login(User.objects.create(username='user'))
+        user.get('/', HTTP_X_PROFILE='1')
+        self.assertEqual(profiling.load(), {})
+        response = staff.get('/', HTTP_X_PROFILE='1')
+        self.assertIn('prof-', response['Server-Timing'])
+        self.assertEqual(len(profiling.load()['posts:index']), 1)
+
+    @override_settings(PROFILER_SAMPLE_RATE=1)
+    def test_export(self):
+        Client().get('/')
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output)
+        call_command('profile_export', output=output, stdout=StringIO())
+        with open(os.path.join(output, 'posts.index.collapsed')) as file:
+            for line in file:
+                stack, count = line.rsplit(' ', 1)
+                self.assertGreater(int(count), 0)
+        call_command(
+            'profile_export', 'posts:index', format='speedscope',
+            output=output, clear=True, stdout=StringIO(),
+        )
+        with open(os.path.join(output, 'profile.speedscope.json')) as file:
+            document = json.load(file)
+        self.assertEqual(document['profiles'][0]['name'], 'posts:index')
+        self.assertEqual(profiling.load(), {})
+        with self.assertRaises(CommandError):
+            call_command('profile_export', 'posts:index', stdout=StringIO())
@@ -0,0 +1,87 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from ..storage import MIN_COMPRESS_SIZE
+
+CSS = 'body { color: #333; }\n' * MIN_COMPRESS_SIZE
+
+
+class CompressedManifestStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.source = os.path.join(directory, 'static')
+        self.root = os.path.join(directory, 'staticfiles')
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as file:
+            file.write(CSS)
+        with open(os.path.join(self.source, 'logo.png'), 'wb') as file:
+            file.write(b'\x89PNG' + bytes(MIN_COMPRESS_SIZE))
+        overrides = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_collectstatic_hashes_and_compresses(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        url = staticfiles_storage.url('css/site.css')
+        self.assertRegex(url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.root, url[len('/static/'):])
+        with gzip.open(path + '.gz', 'rt') as file:
+            self.assertEqual(file.read(), CSS)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, staticfiles_storage.stored_name(
+                'logo.png'
+            )) + '.gz'
+        ))
+
+    def test_missing_file_keeps_plain_url(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.assertEqual(
+            staticfiles_storage.url('img/missing.png'),
+            '/static/img/missing.png',
+        )
+
+
+class MediaOffloadTests(SimpleTestCase):
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_accel_redirect(self):
+        response = self.client.get('/media/posts/кот.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/posts/%D0%BA%D0%BE%D1%82.jpg',
+        )
+        self.assertIn('public', response['Cache-Control'])
+
+    @override_settings(MEDIA_OFFLOAD='x-sendfile')
+    def test_sendfile(self):
+        response = self.client.get('/media/posts/a/../cat.jpg')
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(settings.MEDIA_ROOT, 'posts/cat.jpg'),
+        )
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_path_outside_media_root(self):
+        response = self.client.get('/media/posts/../../settings.py')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_OFFLOAD=None, DEBUG=False)
+    def test_no_python_serving_without_debug(self):
+        response = self.client.get('/media/posts/cat.jpg')
+        self.assertEqual(response.status_code, 404)
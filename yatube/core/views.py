@@ -1,4 +1,23 @@
+import hmac
+import mimetypes
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+)
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from . import metrics
+from .db_backends.pool import pool_stats
 
 
 def page_not_found(request, exception):
@@ -7,3 +26,59 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def db_pool_stats(request):
+    """Статистика пулов соединений процесса, ответившего на запрос."""
+    return JsonResponse({'pid': os.getpid(), 'pools': pool_stats()})
+
+
+def prometheus_metrics(request):
+    """Метрики всех воркеров для Prometheus.
+
+    Доступны по заголовку Authorization: Bearer METRICS_TOKEN или
+    сотрудникам, вошедшим на сайт.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    allowed = request.user.is_staff or bool(token) and hmac.compare_digest(
+        header.encode(), f'Bearer {token}'.encode()
+    )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def media(request, path):
+    """Медиафайл из MEDIA_ROOT.
+
+    При MEDIA_OFFLOAD ответ без тела, а файл по заголовку отдаёт веб-сервер:
+    воркер не читает и не передаёт байты картинок. Без него файлы отдаёт
+    сам Django, но только при DEBUG.
+    """
+    if not settings.MEDIA_OFFLOAD:
+        if not settings.DEBUG:
+            raise Http404
+        return serve(request, path, document_root=settings.MEDIA_ROOT)
+    name = posixpath.normpath(path).lstrip('/')
+    if name in ('', '.') or name.startswith('..'):
+        raise Http404
+    content_type, encoding = mimetypes.guess_type(name)
+    response = HttpResponse(
+        content_type=content_type or 'application/octet-stream'
+    )
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_OFFLOAD_PREFIX + quote(name)
+        )
+    else:
+        response['X-Sendfile'] = os.path.join(settings.MEDIA_ROOT, name)
+    # Имена загруженных файлов не повторяются, так что их можно кэшировать.
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+    )
+    return response
@@ -1,29 +1,35 @@
 from django.contrib import admin
 
+from search.admin import IndexedSearchMixin, TrigramSearchMixin
+from search.models import Document, Suggestion
+
 from .models import Post, Group, Comment, Follow
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
+    search_kind = Document.POST
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
 
 @admin.register(Group)
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(TrigramSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
     search_fields = ('description',)
+    suggest_kind = Suggestion.GROUP
     list_filter = ('title',)
     empty_value_display = '-пусто-'
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'post', 'author', 'created')
     search_fields = ('text',)
+    search_kind = Document.COMMENT
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
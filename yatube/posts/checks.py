@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core import checks
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Поколения кэша страниц должны быть общими для всех воркеров."""
+    backend = settings.CACHES['default']['BACKEND']
+    if not backend.endswith('.LocMemCache'):
+        return []
+    return [checks.Warning(
+        'Кэш по умолчанию — LocMemCache, он свой у каждого процесса: '
+        'сброс поколения в одном воркере не дойдёт до других, и они '
+        'будут отдавать старые страницы до POSTS_CACHE_TIMEOUT.',
+        hint='Выберите общий кэш: YATUBE_CACHE=sqlite, memcached или redis.',
+        id='posts.W001',
+    )]
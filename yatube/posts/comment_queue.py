@@ -0,0 +1,267 @@
+"""Отложенная запись комментариев.
+
+При COMMENT_QUEUE новый комментарий не пишется в базу в запросе, а
+добавляется в очередь: отдельный файл SQLite в режиме WAL на этой
+машине. Фоновый поток каждого процесса раз в COMMENT_QUEUE_INTERVAL
+секунд переносит очередь в базу пачками через bulk_create, одной
+транзакцией на пачку, и сам делает то же, что сигналы при сохранении:
+счётчики, поисковый индекс и сброс кэша страниц постов. Так всплеск
+комментариев к одному посту не выстраивает запросы в очередь за
+блокировкой записи базы.
+
+Строку очереди сначала занимает один процесс на COMMENT_QUEUE_LEASE
+секунд и удаляет её только после коммита в базу: если процесс упал,
+строку заберёт другой. Пока комментарий в очереди, автор видит его под
+постом (pending).
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from search import index
+from search.models import Document
+
+from . import counters, versions
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+class CommentQueue:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # После fork соединение родителя использовать нельзя.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            queue = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            queue.execute('PRAGMA journal_mode=WAL')
+            queue.execute('PRAGMA synchronous=NORMAL')
+            queue.execute(
+                'CREATE TABLE IF NOT EXISTS comment ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'post_id INTEGER, author_id INTEGER, text TEXT, '
+                'created TEXT, claimed_until REAL DEFAULT 0)'
+            )
+            queue.execute(
+                'CREATE INDEX IF NOT EXISTS comment_post_author '
+                'ON comment (post_id, author_id)'
+            )
+            self._local.connection = queue
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def put(self, post_id, author_id, text):
+        self._connection().execute(
+            'INSERT INTO comment (post_id, author_id, text, created) '
+            'VALUES (?, ?, ?, ?)',
+            (post_id, author_id, text, timezone.now().isoformat()),
+        )
+
+    def pending(self, post_id, author_id):
+        """Ещё не записанные в базу комментарии автора к посту."""
+        return [
+            (text, parse_datetime(created))
+            for text, created in self._connection().execute(
+                'SELECT text, created FROM comment '
+                'WHERE post_id = ? AND author_id = ? ORDER BY id DESC',
+                (post_id, author_id),
+            )
+        ]
+
+    def claim(self, limit, lease):
+        """Занимает до limit свободных строк на lease секунд."""
+        queue = self._connection()
+        now = time.time()
+        # Пустая очередь проверяется без блокировки записи: воркер
+        # заглядывает в неё дважды в секунду.
+        if queue.execute(
+            'SELECT 1 FROM comment WHERE claimed_until < ? LIMIT 1', (now,)
+        ).fetchone() is None:
+            return []
+        with queue:
+            queue.execute('BEGIN IMMEDIATE')
+            rows = [
+                (pk, post_id, author_id, text, parse_datetime(created))
+                for pk, post_id, author_id, text, created in queue.execute(
+                    'SELECT id, post_id, author_id, text, created '
+                    'FROM comment WHERE claimed_until < ? '
+                    'ORDER BY id LIMIT ?',
+                    (now, limit),
+                )
+            ]
+            queue.executemany(
+                'UPDATE comment SET claimed_until = ? WHERE id = ?',
+                [(now + lease, row[0]) for row in rows],
+            )
+        return rows
+
+    def release(self, ids):
+        self._execute_many(
+            'UPDATE comment SET claimed_until = 0 WHERE id = ?', ids
+        )
+
+    def remove(self, ids):
+        self._execute_many('DELETE FROM comment WHERE id = ?', ids)
+
+    def _execute_many(self, sql, ids):
+        queue = self._connection()
+        with queue:
+            queue.executemany(sql, [(pk,) for pk in ids])
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM comment'
+        ).fetchone()[0]
+
+
+_queues = {}
+
+
+def get_queue():
+    """Очередь из COMMENT_QUEUE или None, если комментарии пишутся сразу."""
+    path = settings.COMMENT_QUEUE
+    if not path:
+        return None
+    if path not in _queues:
+        _queues[path] = CommentQueue(path)
+    return _queues[path]
+
+
+def put(post, author, text):
+    get_queue().put(post.pk, author.pk, text)
+    # Страница поста закэширована и для автора: покажем её с его
+    # комментарием из очереди.
+    versions.bump(versions.post(post.pk))
+    start_worker()
+
+
+def pending(post, user):
+    """Комментарии user к post из очереди, как несохранённые объекты."""
+    queue = get_queue()
+    if queue is None or not user.is_authenticated:
+        return []
+    comments = []
+    for text, created in queue.pending(post.pk, user.pk):
+        comment = Comment(post=post, author=user, text=text, created=created)
+        comment.pending = True
+        comments.append(comment)
+    return comments
+
+
+def save(rows):
+    """Пишет строки очереди в базу одной транзакцией.
+
+    Комментарии к удалённым постам и от удалённых пользователей
+    пропускаются. Время комментария — время отправки, а не переноса.
+    Возвращает число записанных комментариев по постам.
+    """
+    post_ids = set(Post.objects.filter(
+        pk__in={row[1] for row in rows}
+    ).values_list('pk', flat=True))
+    author_ids = set(User.objects.filter(
+        pk__in={row[2] for row in rows}
+    ).values_list('pk', flat=True))
+    rows = [
+        row for row in rows if row[1] in post_ids and row[2] in author_ids
+    ]
+    if not rows:
+        return Counter()
+    comments = [
+        Comment(post_id=post_id, author_id=author_id, text=text)
+        for _, post_id, author_id, text, _ in rows
+    ]
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        for comment, pk, row in zip(comments, saved_pks(comments), rows):
+            comment.pk = pk
+            comment.created = row[4]
+        # auto_now_add при вставке ставит текущее время.
+        Comment.objects.bulk_update(comments, ['created'])
+        index.index_documents(Document.COMMENT, [
+            (comment.pk, comment.text) for comment in comments
+        ])
+        per_post = Counter(comment.post_id for comment in comments)
+        for post_id, count in per_post.items():
+            counters.increment(counters.post_comments(post_id), count)
+    return per_post
+
+
+def saved_pks(comments):
+    """pk комментариев после bulk_create в той же транзакции.
+
+    SQLite их не возвращает, но пока транзакция держит блокировку
+    записи, последние len(comments) строк таблицы — это они, по порядку.
+    """
+    if all(comment.pk for comment in comments):
+        return [comment.pk for comment in comments]
+    pks = Comment.objects.order_by('-pk').values_list('pk', flat=True)
+    return list(pks[:len(comments)])[::-1]
+
+
+def flush(batch_size=None):
+    """Переносит очередь в базу; возвращает число записанных комментариев."""
+    queue = get_queue()
+    if queue is None:
+        return 0
+    batch_size = batch_size or settings.COMMENT_QUEUE_BATCH_SIZE
+    saved = 0
+    while True:
+        rows = queue.claim(batch_size, settings.COMMENT_QUEUE_LEASE)
+        if not rows:
+            return saved
+        ids = [row[0] for row in rows]
+        try:
+            per_post = save(rows)
+        except Exception:
+            queue.release(ids)
+            raise
+        queue.remove(ids)
+        # Кэш сбрасывается, когда комментарии уже не в очереди: иначе
+        # страница успела бы закэшироваться с ними дважды.
+        versions.bump(*map(versions.post, per_post))
+        saved += sum(per_post.values())
+
+
+def run_worker(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Не удалось записать комментарии из очереди')
+        finally:
+            connection.close()
+
+
+def start_worker():
+    """Запускает поток записи очереди в этом процессе, если его нет.
+
+    При COMMENT_QUEUE_INTERVAL = 0 поток не запускается, и очередь
+    переносит только команда flush_comments.
+    """
+    global _worker
+    interval = settings.COMMENT_QUEUE_INTERVAL
+    if not interval:
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=run_worker, args=(interval,),
+                name='comment-queue', daemon=True,
+            )
+            _worker.start()
@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Counter, Group, Post, User
+
+TOTAL_POSTS = 'posts'
+# Значение строки счётчика, который ещё считается.
+UNSET = -1
+
+
+def author_posts(author_id):
+    return f'posts:author:{author_id}'
+
+
+def group_posts(group_id):
+    return f'posts:group:{group_id}'
+
+
+def post_comments(post_id):
+    return f'comments:post:{post_id}'
+
+
+def increment(name, delta=1):
+    Counter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def get_count(name, queryset):
+    """Значение счётчика name.
+
+    Если счётчика ещё нет, он один раз считается по queryset и
+    сохраняется; дальше его поддерживают сигналы.
+    """
+    value = Counter.objects.filter(name=name).values_list(
+        'value', flat=True
+    ).first()
+    if value is not None:
+        return value
+    with transaction.atomic():
+        # Сначала пишем строку: транзакция держит блокировку записи, и
+        # пост, сохранённый между COUNT и созданием счётчика, не
+        # потеряется.
+        Counter.objects.bulk_create(
+            [Counter(name=name, value=UNSET)], ignore_conflicts=True
+        )
+        Counter.objects.filter(name=name, value=UNSET).update(
+            value=queryset.count()
+        )
+        return Counter.objects.filter(name=name).values_list(
+            'value', flat=True
+        ).get()
+
+
+def forget(*names):
+    Counter.objects.filter(name__in=names).delete()
+
+
+def create(name):
+    """Заводит нулевой счётчик для нового объекта."""
+    Counter.objects.bulk_create([Counter(name=name)], ignore_conflicts=True)
+
+
+def rebuild():
+    """Пересчитывает все счётчики по текущему содержимому базы."""
+    counters = [Counter(name=TOTAL_POSTS, value=Post.objects.count())]
+    counters += (
+        Counter(name=author_posts(pk), value=value)
+        for pk, value in User.objects.annotate(
+            value=Count('posts')
+        ).values_list('pk', 'value')
+    )
+    counters += (
+        Counter(name=group_posts(pk), value=value)
+        for pk, value in Group.objects.annotate(
+            value=Count('posts')
+        ).values_list('pk', 'value')
+    )
+    counters += (
+        Counter(name=post_comments(pk), value=value)
+        for pk, value in Post.objects.annotate(
+            value=Count('comments')
+        ).values_list('pk', 'value').order_by()
+    )
+    with transaction.atomic():
+        Counter.objects.all().delete()
+        Counter.objects.bulk_create(counters, batch_size=500)
+    return len(counters)
@@ -0,0 +1,67 @@
+"""Подписка и отписка пачкой.
+
+Сигналы Follow обновляют ленту и сбрасывают кэш на каждую подписку
+отдельно, и подписка на сотню авторов стоила бы сотен запросов. Здесь
+подписки пишутся одним bulk_create, отписки удаляются одним DELETE по
+парам (user, author), а лента и кэш обновляются один раз на пачку.
+"""
+from django.db import connections, router, transaction
+
+from . import permissions, timeline, versions
+from .models import Follow
+
+
+def follow(user, authors):
+    """Подписывает user на authors; возвращает pk новых авторов.
+
+    Себя и уже отслеживаемых авторов пропускает.
+    """
+    author_ids = {
+        author.pk for author in authors
+        if permissions.can_follow(user, author)
+    }
+    if not author_ids:
+        return set()
+    # Без точки сохранения, как при QuerySet.delete(): во внешней
+    # транзакции это два лишних запроса.
+    with transaction.atomic(savepoint=False):
+        added = author_ids - set(Follow.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+        # bulk_create не вызывает сигналы: ленту дополняем сами. Пару,
+        # подписанную параллельным запросом, ignore_conflicts пропустит.
+        Follow.objects.bulk_create(
+            [Follow(user=user, author_id=pk) for pk in added],
+            ignore_conflicts=True,
+        )
+        timeline.backfill_many(user.pk, added)
+    if added:
+        versions.bump(versions.follower(user.pk))
+    return added
+
+
+def unfollow(user, authors):
+    """Отписывает user от authors; возвращает pk бывших авторов."""
+    author_ids = {author.pk for author in authors}
+    if not author_ids:
+        return set()
+    with transaction.atomic(savepoint=False):
+        removed = set(Follow.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+        if not removed:
+            return removed
+        # QuerySet.delete() отправил бы post_delete на каждую подписку, и
+        # prune_timeline чистил бы ленту по одному автору. Сырой DELETE
+        # сигналов не вызывает: ленту за раз чистит prune_many.
+        connection = connections[router.db_for_write(Follow)]
+        table = connection.ops.quote_name(Follow._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE user_id = %s '
+                f'AND author_id IN ({", ".join(["%s"] * len(removed))})',
+                [user.pk, *removed],
+            )
+        timeline.prune_many(user.pk, removed)
+    versions.bump(versions.follower(user.pk))
+    return removed
@@ -0,0 +1,47 @@
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import thumbnails
+
+POST_CARD = 'posts/includes/post_card.html'
+FRAGMENT_TIMEOUT = 60 * 60
+
+
+def fragment_key(post, template_name=POST_CARD):
+    # Карточка показывает имя автора и группу: их правка тоже меняет ключ.
+    shown = hashlib.md5('\n'.join((
+        post.author.username,
+        post.author.get_full_name(),
+        post.group.slug if post.group else '',
+    )).encode()).hexdigest()
+    return (
+        f'fragment:{template_name}:{post.pk}:{post.updated.timestamp()}:'
+        f'{shown}'
+    )
+
+
+def render_fragments(posts, template_name=POST_CARD):
+    """Возвращает HTML карточек постов в порядке posts.
+
+    Готовые карточки берутся из кэша одним get_many; ключ содержит время
+    изменения поста, имя автора и группу, так что правка поста
+    сбрасывает только его карточку.
+    """
+    posts = list(posts)
+    keys = [fragment_key(post, template_name) for post in posts]
+    cached = cache.get_many(keys)
+    thumbnails.prefetch(
+        post for post, key in zip(posts, keys) if key not in cached
+    )
+    rendered = {}
+    fragments = []
+    for post, key in zip(posts, keys):
+        if key not in cached:
+            rendered[key] = render_to_string(template_name, {'post': post})
+        fragments.append(mark_safe(cached.get(key) or rendered[key]))
+    if rendered:
+        cache.set_many(rendered, FRAGMENT_TIMEOUT)
+    return fragments
@@ -0,0 +1,334 @@
+"""Выгрузка и загрузка групп, постов, комментариев и подписок в JSON Lines.
+
+Каждая строка — один объект с ключом model. Пользователи и группы
+указываются по username и slug, посты и комментарии сохраняют свои pk,
+чтобы комментарии нашли посты и после загрузки в другую базу. Родители
+выгружаются раньше детей, поэтому файл можно загружать по порядку.
+Если pk из файла в базе уже занят другим постом или комментарием,
+загрузка останавливается с ImportConflict.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 2000
+MODELS = ('group', 'post', 'comment', 'follow')
+
+# Поля записи и пути к ним в values_list.
+FIELDS = {
+    'group': (
+        ('title', 'title'),
+        ('slug', 'slug'),
+        ('description', 'description'),
+    ),
+    'post': (
+        ('pk', 'pk'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+        ('updated', 'updated'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('image', 'image'),
+    ),
+    'comment': (
+        ('pk', 'pk'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    ),
+    'follow': (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    ),
+}
+QUERYSETS = {
+    'group': Group.objects.order_by('pk'),
+    'post': Post.objects.order_by('pk'),
+    'comment': Comment.objects.order_by('pk'),
+    'follow': Follow.objects.order_by('pk'),
+}
+
+
+def export(stream, models=MODELS, chunk_size=CHUNK_SIZE):
+    """Пишет объекты models в stream по строке на объект.
+
+    Строки читаются из базы порциями по chunk_size, без создания
+    объектов моделей, так что память не растёт с размером базы.
+    Возвращает число выгруженных объектов каждой модели.
+    """
+    counts = {}
+    for model in models:
+        keys, paths = zip(*FIELDS[model])
+        counts[model] = 0
+        for row in QUERYSETS[model].values_list(*paths).iterator(
+            chunk_size=chunk_size
+        ):
+            stream.write(json.dumps(
+                {'model': model, **dict(zip(keys, row))},
+                ensure_ascii=False,
+                cls=DjangoJSONEncoder,
+            ) + '\n')
+            counts[model] += 1
+    return counts
+
+
+def copy_files(names, source, target, workers=8, chunk_size=CHUNK_SIZE):
+    """Копирует файлы names из хранилища source в target в потоках.
+
+    Уже существующие в target файлы пропускаются, так что копирование
+    можно повторять. Возвращает число скопированных файлов.
+    """
+    def copy(name):
+        if target.exists(name) or not source.exists(name):
+            return False
+        with source.open(name) as file:
+            target.save(name, file)
+        return True
+
+    copied = 0
+    chunk = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name in names:
+            chunk.append(name)
+            if len(chunk) == chunk_size:
+                copied += sum(executor.map(copy, chunk))
+                chunk = []
+        copied += sum(executor.map(copy, chunk))
+    return copied
+
+
+class ImportConflict(Exception):
+    """pk из файла занят в базе другим объектом."""
+
+
+def to_milliseconds(value):
+    """Дата с точностью DjangoJSONEncoder, как она записана в файле."""
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+@contextmanager
+def original_dates():
+    """Не даёт auto_now и auto_now_add затереть даты из файла."""
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('created'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Загружает записи пачками через bulk_create.
+
+    Каждая пачка — записи одной модели подряд — сохраняется в своей
+    транзакции, после чего вызывается checkpoint(offset) с позицией
+    файла за последней записью пачки. Уже существующие объекты
+    пропускаются, поэтому пачку, прерванную посередине, можно загрузить
+    ещё раз; в counts попадают только действительно добавленные строки.
+    Сигналы при этом не срабатывают: счётчики, ленты и поиск после
+    загрузки нужно пересчитать.
+    """
+
+    def __init__(self, batch_size=CHUNK_SIZE, copy_images=None,
+                 checkpoint=None):
+        self.batch_size = batch_size
+        self.copy_images = copy_images
+        self.checkpoint = checkpoint
+        self.counts = dict.fromkeys(MODELS, 0)
+
+    def load(self, records):
+        """records — пары (позиция после записи, запись)."""
+        model, batch, offset = None, [], None
+        with original_dates():
+            for offset_after, record in records:
+                if batch and (
+                    record['model'] != model or len(batch) >= self.batch_size
+                ):
+                    self.flush(model, batch, offset)
+                    batch = []
+                model = record['model']
+                batch.append(record)
+                offset = offset_after
+            if batch:
+                self.flush(model, batch, offset)
+        self.reset_sequences()
+        return self.counts
+
+    def flush(self, model, records, offset):
+        with transaction.atomic():
+            self.counts[model] += getattr(self, f'load_{model}')(records)
+        if model == 'post' and self.copy_images:
+            self.copy_images(
+                record['image'] for record in records if record['image']
+            )
+        if self.checkpoint:
+            self.checkpoint(offset)
+
+    @staticmethod
+    def users(usernames):
+        """pk пользователей по username; недостающие создаются без пароля."""
+        usernames = set(usernames)
+        found = dict(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'pk'))
+        missing = usernames.difference(found)
+        if missing:
+            User.objects.bulk_create(
+                (
+                    User(username=username, password=make_password(None))
+                    for username in missing
+                ),
+                ignore_conflicts=True,
+            )
+            found.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk'))
+        return found
+
+    @staticmethod
+    def save(model, objects):
+        objects = list(objects)
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+        return len(objects)
+
+    @staticmethod
+    def new_records(model, records, paths, identity):
+        """Записи, pk которых в базе ещё нет.
+
+        Объект с тем же pk и тем же identity(запись) уже загружен прежде,
+        например прерванной загрузкой, и пропускается. Другой объект с
+        этим pk — конфликт: пропусти мы запись, её комментарии попали
+        бы к чужому посту.
+        """
+        found = {
+            pk: tuple(
+                to_milliseconds(value) if isinstance(value, datetime)
+                else value
+                for value in rest
+            )
+            for pk, *rest in model.objects.filter(
+                pk__in=[record['pk'] for record in records]
+            ).values_list('pk', *paths)
+        }
+        fresh = []
+        for record in records:
+            if record['pk'] not in found:
+                fresh.append(record)
+            elif found[record['pk']] != identity(record):
+                raise ImportConflict(
+                    f'{model._meta.verbose_name} с pk {record["pk"]} уже '
+                    f'есть в базе и не совпадает с записью из файла; '
+                    f'загружайте в пустую базу'
+                )
+        return fresh
+
+    def load_group(self, records):
+        existing = set(Group.objects.filter(
+            slug__in=[record['slug'] for record in records]
+        ).values_list('slug', flat=True))
+        return self.save(Group, (
+            Group(
+                title=record['title'],
+                slug=record['slug'],
+                description=record['description'],
+            )
+            for record in {
+                record['slug']: record for record in records
+                if record['slug'] not in existing
+            }.values()
+        ))
+
+    def load_post(self, records):
+        records = self.new_records(
+            Post, records, ('author__username', 'pub_date'),
+            lambda record: (
+                record['author'], parse_datetime(record['pub_date'])
+            ),
+        )
+        users = self.users(record['author'] for record in records)
+        groups = dict(Group.objects.filter(
+            slug__in={record['group'] for record in records}
+        ).values_list('slug', 'pk'))
+        return self.save(Post, (
+            Post(
+                pk=record['pk'],
+                text=record['text'],
+                pub_date=parse_datetime(record['pub_date']),
+                updated=parse_datetime(
+                    record.get('updated') or record['pub_date']
+                ),
+                author_id=users[record['author']],
+                group_id=groups.get(record['group']),
+                image=record['image'] or None,
+            )
+            for record in records
+        ))
+
+    def load_comment(self, records):
+        records = self.new_records(
+            Comment, records, ('post_id', 'author__username', 'created'),
+            lambda record: (
+                record['post'], record['author'],
+                parse_datetime(record['created']),
+            ),
+        )
+        users = self.users(record['author'] for record in records)
+        posts = set(Post.objects.filter(
+            pk__in={record['post'] for record in records}
+        ).values_list('pk', flat=True))
+        return self.save(Comment, (
+            Comment(
+                pk=record['pk'],
+                post_id=record['post'],
+                author_id=users[record['author']],
+                text=record['text'],
+                created=parse_datetime(record['created']),
+            )
+            for record in records if record['post'] in posts
+        ))
+
+    def load_follow(self, records):
+        users = self.users(
+            username
+            for record in records
+            for username in (record['user'], record['author'])
+        )
+        pairs = {
+            (users[record['user']], users[record['author']])
+            for record in records if record['user'] != record['author']
+        }
+        pairs.difference_update(Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            author_id__in={author_id for _, author_id in pairs},
+        ).values_list('user_id', 'author_id'))
+        return self.save(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs
+        ))
+
+    @staticmethod
+    def reset_sequences():
+        """Сдвигает автоинкремент за загруженные pk (нужно не в SQLite)."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,108 @@
+"""Хранилище метаданных миниатюр, читающее всю страницу за раз.
+
+Стандартное хранилище sorl-thumbnail ищет каждую миниатюру отдельным
+запросом к кэшу, а при промахе ещё и к базе. Здесь ключи миниатюр всей
+страницы загружаются заранее: одним get_many из общего кэша и одним
+запросом к таблице для промахов. Загруженное живёт до конца запроса
+и только в потоке запроса.
+"""
+import threading
+
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE,
+    KVStore as CachedDBKVStore,
+)
+
+from .models import ThumbnailRecord
+
+_prefetched = threading.local()
+
+
+def _get_prefetched():
+    """Загруженное в этом запросе; вне запроса — None.
+
+    Фоновые потоки (миниатюры, очередь комментариев) живут долго, и
+    там записи не запоминаются: иначе они копились бы без конца и
+    устаревали после удаления миниатюры в другом потоке.
+    """
+    return getattr(_prefetched, 'values', None)
+
+
+def start_prefetching():
+    _prefetched.values = {}
+
+
+def clear_prefetched():
+    _prefetched.values = None
+
+
+class KVStore(CachedDBKVStore):
+    def _load(self, raw_keys):
+        """Одним get_many и одним запросом к базе для промахов кэша."""
+        values = self.cache.get_many(raw_keys)
+        missing = set(raw_keys).difference(values)
+        if missing:
+            found = dict(ThumbnailRecord.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            # Как и в cached_db_kvstore, отсутствие записи тоже кэшируется.
+            found.update(
+                (key, EMPTY_VALUE) for key in missing.difference(found)
+            )
+            self.cache.set_many(found, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(found)
+        return values
+
+    def prefetch(self, keys):
+        """Загружает записи миниатюр с ключами keys до конца запроса."""
+        prefetched = _get_prefetched()
+        if prefetched is None:
+            return
+        raw_keys = {add_prefix(key) for key in keys}.difference(prefetched)
+        if raw_keys:
+            prefetched.update(self._load(raw_keys))
+
+    def clear(self, delete_thumbnails=False):
+        prefetched = _get_prefetched()
+        if prefetched is not None:
+            prefetched.clear()
+        prefix = settings.THUMBNAIL_KEY_PREFIX
+        for key in self._find_keys_raw(prefix):
+            self.cache.delete(key)
+        ThumbnailRecord.objects.filter(key__startswith=prefix).delete()
+        if delete_thumbnails:
+            self.delete_all_thumbnail_files()
+
+    def _get_raw(self, key):
+        prefetched = _get_prefetched()
+        if prefetched is not None and key in prefetched:
+            value = prefetched[key]
+        else:
+            value = self._load([key])[key]
+        if value == EMPTY_VALUE:
+            return None
+        return value
+
+    def _set_raw(self, key, value):
+        ThumbnailRecord.objects.update_or_create(
+            key=key, defaults={'value': value}
+        )
+        self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+        prefetched = _get_prefetched()
+        if prefetched is not None:
+            prefetched[key] = value
+
+    def _delete_raw(self, *keys):
+        ThumbnailRecord.objects.filter(key__in=keys).delete()
+        self.cache.delete_many(keys)
+        prefetched = _get_prefetched()
+        if prefetched is not None:
+            for key in keys:
+                prefetched.pop(key, None)
+
+    def _find_keys_raw(self, prefix):
+        return ThumbnailRecord.objects.filter(
+            key__startswith=prefix
+        ).values_list('key', flat=True)
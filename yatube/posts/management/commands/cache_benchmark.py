@@ -0,0 +1,73 @@
+import multiprocessing
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+
+def run_worker(urls, requests, seed, barrier):
+    connections.close_all()
+    client = Client()
+    rnd = random.Random(seed)
+    barrier.wait()
+    hits = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(rnd.choice(urls))
+        hits += response.get('X-Cache') == 'HIT'
+    return hits, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет долю попаданий в кэш главной страницы, когда её '
+        'запрашивают несколько процессов, как воркеры gunicorn'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--pages', type=int, default=5,
+            help='Сколько страниц ленты запрашивать вперемешку',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        index = reverse('posts:index')
+        urls = [
+            f'{index}?page={number}'
+            for number in range(1, options['pages'] + 1)
+        ]
+        cache.clear()
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        manager = context.Manager()
+        barrier = manager.Barrier(workers)
+        with context.Pool(workers) as pool:
+            results = pool.starmap(run_worker, [
+                (urls, options['requests'], options['seed'] + number, barrier)
+                for number in range(workers)
+            ])
+        manager.shutdown()
+        self.stdout.write(
+            f'Кэш: {settings.CACHES["default"]["BACKEND"]}, '
+            f'воркеров: {workers}, страниц: {len(urls)}'
+        )
+        for number, (hits, elapsed) in enumerate(results, 1):
+            self.stdout.write(
+                f'  воркер {number}: попаданий {hits}/{options["requests"]}'
+                f' ({hits / options["requests"]:.1%}), '
+                f'{options["requests"] / elapsed:.0f} запросов/с'
+            )
+        total_hits = sum(hits for hits, _ in results)
+        total = workers * options['requests']
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего попаданий: {total_hits}/{total} ({total_hits / total:.1%})'
+        ))
@@ -0,0 +1,65 @@
+import gzip
+import sys
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import jsonl
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки в JSON Lines '
+        '(в .gz — со сжатием)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл; «-» — стандартный вывод')
+        parser.add_argument(
+            '--models', default=','.join(jsonl.MODELS),
+            help='Модели через запятую, по умолчанию все',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=jsonl.CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+        parser.add_argument(
+            '--media', help='Каталог, куда скопировать картинки постов',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Потоки для копирования картинок',
+        )
+
+    def handle(self, *args, **options):
+        models = options['models'].split(',')
+        unknown = set(models).difference(jsonl.MODELS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные модели: {", ".join(sorted(unknown))}'
+            )
+        path = options['path']
+        if path == '-':
+            counts = jsonl.export(sys.stdout, models, options['chunk_size'])
+        else:
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'wt', encoding='utf-8') as stream:
+                counts = jsonl.export(stream, models, options['chunk_size'])
+        copied = 0
+        if options['media'] and 'post' in models:
+            copied = jsonl.copy_files(
+                Post.objects.exclude(image='').exclude(image=None)
+                .values_list('image', flat=True).order_by('pk')
+                .iterator(chunk_size=options['chunk_size']),
+                default_storage,
+                FileSystemStorage(location=options['media']),
+                workers=options['workers'],
+            )
+        summary = ', '.join(
+            f'{model}: {count}' for model, count in counts.items()
+        )
+        # В stdout может идти сама выгрузка, поэтому итог — в stderr.
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено {summary}; картинок скопировано: {copied}'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import comment_queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит в базу комментарии из очереди COMMENT_QUEUE, например '
+        'оставшиеся после остановки сервера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        if comment_queue.get_queue() is None:
+            raise CommandError('Очередь комментариев выключена')
+        saved = comment_queue.flush(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Записано комментариев: {saved}')
+        )
@@ -0,0 +1,66 @@
+import csv
+from itertools import groupby, islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follows
+from posts.models import User
+
+
+def read_pairs(path):
+    """Пары (подписчик, автор) из CSV без заголовка."""
+    with open(path, newline='') as file:
+        for line, row in enumerate(csv.reader(file), 1):
+            if not row:
+                continue
+            if len(row) != 2:
+                raise CommandError(
+                    f'Строка {line}: нужно два имени, подписчик и автор'
+                )
+            yield row[0].strip(), row[1].strip()
+
+
+class Command(BaseCommand):
+    help = (
+        'Подписывает (или с --unfollow отписывает) пользователей по CSV '
+        'со строками «подписчик,автор»: пачкой на подписчика'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--unfollow', action='store_true',
+            help='Снять перечисленные подписки',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Строк файла на одно чтение пользователей из базы',
+        )
+
+    def handle(self, *args, **options):
+        apply = follows.unfollow if options['unfollow'] else follows.follow
+        pairs = read_pairs(options['path'])
+        changed = skipped = 0
+        while True:
+            batch = list(islice(pairs, options['batch_size']))
+            if not batch:
+                break
+            users = {
+                user.username: user
+                for user in User.objects.filter(
+                    username__in={name for pair in batch for name in pair}
+                ).only('pk', 'username')
+            }
+            batch.sort(key=lambda pair: pair[0])
+            for name, rows in groupby(batch, key=lambda pair: pair[0]):
+                authors = [users.get(author) for _, author in rows]
+                found = [author for author in authors if author]
+                skipped += len(authors) - len(found)
+                if name not in users:
+                    skipped += len(found)
+                    continue
+                changed += len(apply(users[name], found))
+        verb = 'Снято' if options['unfollow'] else 'Добавлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} подписок: {changed}, пропущено строк: {skipped}'
+        ))
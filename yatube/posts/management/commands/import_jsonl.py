@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+from functools import partial
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import counters, jsonl, timeline
+from search import index, suggest
+
+
+def read_records(path, offset):
+    """Пары (позиция после строки, запись) начиная с позиции offset."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as file:
+        file.seek(offset)
+        for line in file:
+            offset += len(line)
+            if line.strip():
+                yield offset, json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает JSON Lines из export_jsonl пачками через bulk_create; '
+        'прерванную загрузку можно продолжить с --resume'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--batch-size', type=int, default=jsonl.CHUNK_SIZE,
+            help='Записей в одной транзакции',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней сохранённой пачки',
+        )
+        parser.add_argument(
+            '--media', help='Каталог с картинками постов из export_jsonl',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Потоки для копирования картинок',
+        )
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковые индексы',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        checkpoint_path = f'{path}.checkpoint'
+        offset = 0
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as file:
+                offset = json.load(file)['offset']
+            self.stdout.write(f'Продолжаю с позиции {offset}')
+
+        def save_checkpoint(offset):
+            with open(f'{checkpoint_path}.tmp', 'w') as file:
+                json.dump({'offset': offset}, file)
+            os.replace(f'{checkpoint_path}.tmp', checkpoint_path)
+
+        copy_images = None
+        if options['media']:
+            copy_images = partial(
+                jsonl.copy_files,
+                source=FileSystemStorage(location=options['media']),
+                target=default_storage,
+                workers=options['workers'],
+            )
+        importer = jsonl.Importer(
+            batch_size=options['batch_size'],
+            copy_images=copy_images,
+            checkpoint=save_checkpoint,
+        )
+        try:
+            counts = importer.load(read_records(path, offset))
+        except jsonl.ImportConflict as error:
+            raise CommandError(error)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        summary = ', '.join(
+            f'{model}: {count}' for model, count in counts.items()
+        )
+        self.stdout.write(f'Загружено {summary}')
+        if not options['no_rebuild']:
+            counters.rebuild()
+            timeline.rebuild()
+            index.rebuild()
+            suggest.rebuild()
+            cache.clear()
+            self.stdout.write(
+                'Счётчики, ленты и поисковые индексы пересчитаны; '
+                'миниатюры создаст warm_thumbnails'
+            )
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики постов и комментариев'
+
+    def handle(self, *args, **options):
+        total = counters.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано счётчиков: {total}')
+        )
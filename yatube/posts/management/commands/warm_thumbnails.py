@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def process(job):
+    return thumbnails.process(*job)
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт миниатюры и копии всех картинок постов '
+        'в нескольких процессах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Число процессов; 1 — без дочерних процессов',
+        )
+
+    def handle(self, *args, **options):
+        jobs = list(
+            Post.objects.exclude(image='').exclude(image=None).values_list(
+                'pk', 'image'
+            ).order_by()
+        )
+        if options['processes'] > 1:
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(options['processes']) as pool:
+                results = list(pool.imap_unordered(
+                    process, jobs, chunksize=16
+                ))
+        else:
+            results = [process(job) for job in jobs]
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово миниатюр: {sum(results)} из {len(jobs)}'
+        ))
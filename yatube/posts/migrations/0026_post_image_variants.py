@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Описание уменьшенных копий картинки в формате JSON', verbose_name='Варианты картинки'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+def copy_thumbnail_records(apps, schema_editor):
+    KVStore = apps.get_model('thumbnail', 'KVStore')
+    ThumbnailRecord = apps.get_model('posts', 'ThumbnailRecord')
+    ThumbnailRecord.objects.bulk_create(
+        (
+            ThumbnailRecord(key=key, value=value)
+            for key, value in KVStore.objects.values_list('key', 'value')
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_post_image_variants'),
+        ('thumbnail', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThumbnailRecord',
+            fields=[
+                ('key', models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ('value', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(
+            copy_thumbnail_records, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def create_counters(apps, schema_editor):
+    """Заводит счётчики для уже существующих данных.
+
+    Иначе первый посетитель каждой страницы платил бы за COUNT и
+    get_or_create счётчика. Уже заведённые счётчики не меняются.
+    """
+    Counter = apps.get_model('posts', 'Counter')
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model('auth', 'User')
+    counters = [Counter(name='posts', value=Post.objects.count())]
+    counters += (
+        Counter(name=f'posts:author:{pk}', value=value)
+        for pk, value in User.objects.annotate(
+            value=Count('posts')
+        ).values_list('pk', 'value')
+    )
+    counters += (
+        Counter(name=f'posts:group:{pk}', value=value)
+        for pk, value in Group.objects.annotate(
+            value=Count('posts')
+        ).values_list('pk', 'value')
+    )
+    counters += (
+        Counter(name=f'comments:post:{pk}', value=value)
+        for pk, value in Post.objects.annotate(
+            value=Count('comments')
+        ).values_list('pk', 'value').order_by()
+    )
+    Counter.objects.bulk_create(
+        counters, batch_size=500, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+import json
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
@@ -31,15 +34,19 @@ class Post(models.Model):
         help_text='Текст нового поста'
     )
     pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated = models.DateTimeField(auto_now=True)
+    # Индексы по author и group — начало составных индексов из Meta.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='posts'
+        related_name='posts',
+        db_index=False,
     )
     group = models.ForeignKey(
         Group,
         related_name='posts',
         on_delete=models.SET_NULL,
+        db_index=False,
         blank=True,
         null=True,
         verbose_name='Группа',
@@ -52,12 +59,48 @@ class Post(models.Model):
         verbose_name='Картинка',
         help_text='Картинка для твоего поста поста <3'
     )
+    image_variants = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Варианты картинки',
+        help_text='Описание уменьшенных копий картинки в формате JSON'
+    )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Сигналы post_save обновляют счётчики: в одной транзакции с
+        # записью строки. Без точки сохранения, как удаление в Collector.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    @cached_property
+    def variants(self):
+        """Готовые копии картинки для <picture> или None.
+
+        Копии, сделанные для прежней картинки поста, не подходят.
+        """
+        if not self.image or not self.image_variants:
+            return None
+        variants = json.loads(self.image_variants)
+        if variants['image'] != self.image.name:
+            return None
+        return variants
+
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx',
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -70,6 +113,7 @@ class Comment(models.Model):
         related_name='comments',
         on_delete=models.CASCADE,
         null=False,
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
@@ -81,6 +125,17 @@ class Comment(models.Model):
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            )
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -92,11 +147,79 @@ class Follow(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='following',
+        db_index=False,
     )
 
     class Meta:
+        # Уникальный индекс (user, author) ищет подписки пользователя,
+        # (author, user) — подписчиков автора.
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'], name='unique_follows'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            )
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост в ленте подписчика."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entries'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_post_idx',
+            )
+        ]
+
+
+class PopularAuthor(models.Model):
+    """Автор, чьи посты не раскладываются по лентам, а читаются при запросе."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='popularity',
+    )
+    since = models.DateTimeField(auto_now_add=True)
+
+
+class Counter(models.Model):
+    """Денормализованный счётчик, например числа постов автора."""
+
+    name = models.CharField(max_length=100, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name}={self.value}'
+
+
+class ThumbnailRecord(models.Model):
+    """Запись хранилища метаданных миниатюр sorl-thumbnail."""
+
+    key = models.CharField(max_length=200, primary_key=True)
+    value = models.TextField()
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,119 @@
+import base64
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации: знает только соседей, но не их число."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page of %s objects>' % len(self.object_list)
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    @cached_property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.encode_cursor(self.object_list[-1])
+
+    @cached_property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (field, key): без COUNT(*) и без OFFSET.
+
+    Каждая страница выбирается поиском по индексу от курсора, поэтому
+    дальние страницы обходятся так же дёшево, как первая. key — поле с
+    уникальными значениями, разбивающее одинаковые field.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date', key='pk'):
+        # Порядок задаёт курсор, а не переданный queryset.
+        super().__init__(
+            object_list.order_by(f'-{field}', f'-{key}'), per_page
+        )
+        self.field = field
+        self.key = key
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.field).isoformat()
+        value = f'{value}|{getattr(obj, self.key)}'
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = base64.urlsafe_b64decode(
+                cursor.encode()
+            ).decode().rsplit('|', 1)
+            position = parse_datetime(value), int(pk)
+        except ValueError:
+            return None
+        if position[0] is None:
+            return None
+        return position
+
+    def seek(self, position=None):
+        """Объекты после позиции (value, key) от новых к старым."""
+        if not position:
+            return self.object_list
+        value, pk = position
+        return self.object_list.filter(
+            Q(**{f'{self.field}__lt': value})
+            | Q(**{self.field: value, f'{self.key}__lt': pk})
+        )
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед курсором before.
+
+        Некорректный курсор, как и в Paginator.get_page, даёт первую
+        страницу.
+        """
+        if before and self.decode_cursor(before):
+            value, pk = self.decode_cursor(before)
+            rows = list(self.object_list.filter(
+                Q(**{f'{self.field}__gt': value})
+                | Q(**{self.field: value, f'{self.key}__gt': pk})
+            ).order_by(self.field, self.key)[:self.per_page + 1])
+            return CursorPage(
+                rows[:self.per_page][::-1],
+                self,
+                has_next=True,
+                has_previous=len(rows) > self.per_page,
+            )
+        position = after and self.decode_cursor(after)
+        rows = list(self.seek(position)[:self.per_page + 1])
+        return CursorPage(
+            rows[:self.per_page],
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=bool(position),
+        )
+
+
+class CountedPaginator(Paginator):
+    """Paginator с заранее известным числом объектов вместо COUNT(*)."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
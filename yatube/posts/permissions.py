@@ -0,0 +1,13 @@
+"""Кто что может делать с постами: общие правила для страниц и API."""
+
+
+def can_edit_post(user, post):
+    return user.is_authenticated and post.author_id == user.pk
+
+
+def can_comment(user, post):
+    return user.is_authenticated
+
+
+def can_follow(user, author):
+    return user.is_authenticated and user.pk != author.pk
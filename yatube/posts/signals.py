@@ -0,0 +1,174 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, kvstore, thumbnails, timeline, versions
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+# Отложенные через only() и defer() поля не запоминаются: обращение к ним
+# стоило бы запроса, а при сохранении они не пишутся и не меняются.
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    if 'group_id' in instance.__dict__:
+        instance._initial_group_id = instance.group_id
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    if 'image' in instance.__dict__:
+        instance._initial_image = instance.image.name
+
+
+def bump_post_versions(post, group_ids):
+    slugs = Group.objects.filter(
+        pk__in=[group_id for group_id in group_ids if group_id]
+    ).values_list('slug', flat=True)
+    versions.bump(
+        versions.GLOBAL,
+        versions.post(post.pk),
+        versions.author(post.author.username),
+        *map(versions.group, slugs),
+    )
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    old_group_id = None if created else getattr(
+        instance, '_initial_group_id', instance.group_id
+    )
+    if created:
+        counters.increment(counters.TOTAL_POSTS)
+        counters.increment(counters.author_posts(instance.author_id))
+        counters.create(counters.post_comments(instance.pk))
+    if old_group_id != instance.group_id:
+        if old_group_id:
+            counters.increment(counters.group_posts(old_group_id), -1)
+        if instance.group_id:
+            counters.increment(counters.group_posts(instance.group_id))
+
+
+@receiver(post_save, sender=Post)
+def generate_thumbnail(sender, instance, **kwargs):
+    initial_image = getattr(instance, '_initial_image', instance.image.name)
+    if initial_image and instance.image.name != initial_image:
+        thumbnails.discard_variants(instance.pk)
+    if instance.image and instance.image.name != initial_image:
+        thumbnails.enqueue(instance)
+    instance._initial_image = instance.image.name
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, **kwargs):
+    bump_post_versions(instance, {
+        getattr(instance, '_initial_group_id', instance.group_id),
+        instance.group_id,
+    })
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.increment(counters.TOTAL_POSTS, -1)
+    counters.increment(counters.author_posts(instance.author_id), -1)
+    if instance.group_id:
+        counters.increment(counters.group_posts(instance.group_id), -1)
+    counters.forget(counters.post_comments(instance.pk))
+    bump_post_versions(instance, {instance.group_id})
+    if instance.image:
+        thumbnails.discard_variants(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(counters.post_comments(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.increment(counters.post_comments(instance.post_id), -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    versions.bump(versions.post(instance.post_id))
+
+
+@receiver(post_init, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    if 'slug' in instance.__dict__:
+        instance._initial_slug = instance.slug
+
+
+@receiver(post_save, sender=Group)
+def invalidate_saved_group(sender, instance, **kwargs):
+    versions.bump(
+        versions.GLOBAL,
+        versions.GROUPS,
+        versions.group(getattr(instance, '_initial_slug', instance.slug)),
+        versions.group(instance.slug),
+    )
+    instance._initial_slug = instance.slug
+
+
+@receiver(post_save, sender=Group)
+def create_group_counter(sender, instance, created, **kwargs):
+    if created:
+        counters.create(counters.group_posts(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def create_author_counter(sender, instance, created, **kwargs):
+    if created:
+        counters.create(counters.author_posts(instance.pk))
+
+
+@receiver(post_delete, sender=Group)
+def forget_group_counter(sender, instance, **kwargs):
+    counters.forget(counters.group_posts(instance.pk))
+    versions.bump(
+        versions.GLOBAL, versions.GROUPS, versions.group(instance.slug)
+    )
+
+
+@receiver(post_delete, sender=User)
+def forget_author_counter(sender, instance, **kwargs):
+    counters.forget(counters.author_posts(instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    versions.bump(versions.follower(instance.user_id))
+
+
+@receiver(request_started)
+def start_prefetching_thumbnails(sender, **kwargs):
+    kvstore.start_prefetching()
+
+
+@receiver(request_finished)
+def clear_prefetched_thumbnails(sender, **kwargs):
+    kvstore.clear_prefetched()
@@ -0,0 +1,10 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image):
+    return thumbnails.ready_thumbnail(image.name) if image else None
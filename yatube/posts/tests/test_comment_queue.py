@@ -0,0 +1,155 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from search.index import search
+from search.models import Document
+
+from .. import comment_queue, counters
+from ..models import Comment, Post, User
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    COMMENT_QUEUE=os.path.join(TEMP_DIR, 'comments.sqlite3'),
+    COMMENT_QUEUE_INTERVAL=0,
+)
+class CommentQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.post = Post.objects.create(text='Текст поста', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def tearDown(self):
+        queue = comment_queue.get_queue()
+        queue.remove([row[0] for row in queue.claim(1000, 0)])
+
+    def comment(self, text='Комментарий про котов', post=None):
+        return self.client.post(
+            reverse('posts:add_comment', args=[(post or self.post).pk]),
+            {'text': text},
+        )
+
+    def test_comment_is_queued_and_shown_to_author(self):
+        counters.get_count(
+            counters.post_comments(self.post.pk), self.post.comments
+        )
+        self.client.get(self.url)
+        self.comment()
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(len(comment_queue.get_queue()), 1)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Комментарий про котов')
+        self.assertContains(response, 'Публикуется')
+        self.assertEqual(response.context['comments_count'], 1)
+        guest = Client().get(self.url)
+        self.assertNotContains(guest, 'Комментарий про котов')
+
+        self.assertEqual(comment_queue.flush(), 1)
+        comment = Comment.objects.get()
+        self.assertEqual(
+            (comment.author, comment.post), (self.reader, self.post)
+        )
+        self.assertEqual(len(comment_queue.get_queue()), 0)
+        self.assertEqual(
+            [row['object_id'] for row in search('котов', Document.COMMENT)],
+            [comment.pk],
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Комментарий про котов')
+        self.assertNotContains(response, 'Публикуется')
+        self.assertEqual(response.context['comments_count'], 1)
+
+    def test_flush_in_batches(self):
+        for number in range(5):
+            self.comment(f'Комментарий {number}')
+        self.assertEqual(comment_queue.flush(batch_size=2), 5)
+        self.assertEqual(
+            sorted(Comment.objects.values_list('text', flat=True)),
+            [f'Комментарий {number}' for number in range(5)],
+        )
+
+    def test_comments_to_deleted_posts_are_dropped(self):
+        post = Post.objects.create(text='Удалённый', author=self.author)
+        self.comment(post=post)
+        self.comment()
+        post.delete()
+        self.assertEqual(comment_queue.flush(), 1)
+        self.assertEqual(len(comment_queue.get_queue()), 0)
+
+    def test_claimed_rows_wait_for_lease(self):
+        self.comment()
+        queue = comment_queue.get_queue()
+        claimed = queue.claim(10, 60)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(queue.claim(10, 60), [])
+        self.assertEqual(comment_queue.flush(), 0)
+        queue.release([claimed[0][0]])
+        self.assertEqual(comment_queue.flush(), 1)
+
+    def test_flush_keeps_submit_time(self):
+        self.comment('Первый')
+        self.comment('Второй')
+        queue = comment_queue.get_queue()
+        queue._connection().execute(
+            "UPDATE comment SET created = '2020-01-02T03:04:05+00:00' "
+            "WHERE text = 'Первый'"
+        )
+        Comment.objects.create(post=self.post, author=self.author, text='X')
+        self.assertEqual(comment_queue.flush(), 2)
+        first = Comment.objects.get(text='Первый')
+        self.assertEqual(first.created.year, 2020)
+        for comment in Comment.objects.filter(text__in=['Первый', 'Второй']):
+            self.assertEqual(
+                [
+                    row['object_id']
+                    for row in search(comment.text, Document.COMMENT)
+                ],
+                [comment.pk],
+            )
+
+    def test_empty_queue_is_checked_without_write_lock(self):
+        queue = comment_queue.get_queue()
+        queue.claim(1, 0)
+        other = sqlite3.connect(queue.path, isolation_level=None)
+        other.execute('BEGIN IMMEDIATE')
+        try:
+            self.assertEqual(queue.claim(10, 60), [])
+        finally:
+            other.execute('ROLLBACK')
+            other.close()
+
+    def test_invalid_comment_is_not_queued(self):
+        self.comment(text='')
+        self.assertEqual(len(comment_queue.get_queue()), 0)
+
+    def test_flush_command(self):
+        self.comment()
+        out = StringIO()
+        call_command('flush_comments', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(Comment.objects.count(), 1)
+        with override_settings(COMMENT_QUEUE=None):
+            with self.assertRaises(CommandError):
+                call_command('flush_comments', stdout=StringIO())
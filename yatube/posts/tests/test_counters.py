@@ -0,0 +1,126 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from .. import counters
+from ..models import Comment, Counter, Group, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+        cls.group = Group.objects.create(
+            title='Test title',
+            slug='test_slug',
+            description='Test description',
+        )
+        cls.another_group = Group.objects.create(
+            title='Another title',
+            slug='another_slug',
+            description='Another description',
+        )
+
+    def get_count(self, name):
+        return Counter.objects.get(name=name).value
+
+    def test_counters_follow_signals(self):
+        counters.get_count(counters.TOTAL_POSTS, Post.objects)
+        counters.get_count(
+            counters.author_posts(self.user.pk), self.user.posts
+        )
+        for group in (self.group, self.another_group):
+            counters.get_count(counters.group_posts(group.pk), group.posts)
+        post = Post.objects.create(
+            text='Test text', author=self.user, group=self.group
+        )
+        counters.get_count(counters.post_comments(post.pk), post.comments)
+        Comment.objects.create(
+            text='Test comment', post=post, author=self.user
+        )
+        self.assertEqual(self.get_count(counters.TOTAL_POSTS), 1)
+        self.assertEqual(
+            self.get_count(counters.author_posts(self.user.pk)), 1
+        )
+        self.assertEqual(
+            self.get_count(counters.post_comments(post.pk)), 1
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.another_group
+        post.save()
+        self.assertEqual(
+            self.get_count(counters.group_posts(self.group.pk)), 0
+        )
+        self.assertEqual(
+            self.get_count(counters.group_posts(self.another_group.pk)), 1
+        )
+        post.delete()
+        self.assertEqual(self.get_count(counters.TOTAL_POSTS), 0)
+        self.assertEqual(
+            self.get_count(counters.group_posts(self.another_group.pk)), 0
+        )
+        self.assertFalse(
+            Counter.objects.filter(
+                name=counters.post_comments(post.pk)
+            ).exists()
+        )
+
+    def test_missing_counter_is_counted(self):
+        Post.objects.create(text='Test text', author=self.user)
+        counters.forget(counters.TOTAL_POSTS)
+        self.assertEqual(counters.get_count(
+            counters.TOTAL_POSTS, Post.objects
+        ), 1)
+        self.assertEqual(self.get_count(counters.TOTAL_POSTS), 1)
+
+    def test_saving_deferred_post(self):
+        post = Post.objects.create(
+            text='Test text', author=self.user, group=self.group
+        )
+        counters.get_count(
+            counters.group_posts(self.group.pk), self.group.posts
+        )
+        post = Post.objects.only('id', 'text').get(pk=post.pk)
+        post.text = 'New text'
+        post.save()
+        self.assertEqual(
+            self.get_count(counters.group_posts(self.group.pk)), 1
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).text, 'New text')
+
+    def test_rebuild_counters_command(self):
+        post = Post.objects.create(
+            text='Test text', author=self.user, group=self.group
+        )
+        Comment.objects.create(
+            text='Test comment', post=post, author=self.user
+        )
+        Counter.objects.filter(name=counters.TOTAL_POSTS).update(value=42)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self.get_count(counters.TOTAL_POSTS), 1)
+        self.assertEqual(
+            self.get_count(counters.group_posts(self.group.pk)), 1
+        )
+        self.assertEqual(
+            self.get_count(counters.post_comments(post.pk)), 1
+        )
+
+
+class CounterTransactionTests(TransactionTestCase):
+    def test_failed_counter_update_rolls_back_save(self):
+        user = User.objects.create(username='test_user')
+        post = Post.objects.create(text='Test text', author=user)
+        with mock.patch.object(
+            counters, 'increment', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                Post.objects.create(text='Lost text', author=user)
+            with self.assertRaises(RuntimeError):
+                post.delete()
+        self.assertEqual(list(Post.objects.all()), [post])
+        self.assertEqual(
+            counters.get_count(counters.TOTAL_POSTS, Post.objects), 1
+        )
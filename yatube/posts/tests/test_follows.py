@@ -0,0 +1,114 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import follows, versions
+from ..models import Follow, PopularAuthor, Post, TimelineEntry, User
+
+
+class FollowsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='reader')
+        cls.authors = [
+            User.objects.create(username=f'author{number}')
+            for number in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=author)
+            for number, author in enumerate(cls.authors)
+        ]
+
+    def feed_posts(self, user):
+        return set(TimelineEntry.objects.filter(user=user).values_list(
+            'post', flat=True
+        ))
+
+    def test_follow_many(self):
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        scopes = [versions.follower(self.reader.pk)]
+        version = versions.get_versions(scopes)
+        with self.assertNumQueries(4):
+            added = follows.follow(
+                self.reader, [*self.authors, self.reader]
+            )
+        self.assertEqual(added, {self.authors[1].pk, self.authors[2].pk})
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader).count(), 3
+        )
+        self.assertEqual(
+            self.feed_posts(self.reader), {post.pk for post in self.posts}
+        )
+        self.assertNotEqual(versions.get_versions(scopes), version)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_not_backfilled(self):
+        PopularAuthor.objects.create(author=self.authors[0])
+        follows.follow(self.reader, self.authors[:2])
+        self.assertEqual(self.feed_posts(self.reader), {self.posts[1].pk})
+
+    def test_unfollow_is_scoped_to_user(self):
+        another_reader = User.objects.create(username='another_reader')
+        follows.follow(self.reader, self.authors)
+        follows.follow(another_reader, self.authors)
+        with self.assertNumQueries(3):
+            removed = follows.unfollow(self.reader, self.authors[:2])
+        self.assertEqual(removed, {self.authors[0].pk, self.authors[1].pk})
+        self.assertEqual(
+            list(Follow.objects.filter(user=self.reader).values_list(
+                'author', flat=True
+            )),
+            [self.authors[2].pk],
+        )
+        self.assertEqual(self.feed_posts(self.reader), {self.posts[2].pk})
+        self.assertEqual(
+            Follow.objects.filter(user=another_reader).count(), 3
+        )
+        self.assertEqual(len(self.feed_posts(another_reader)), 3)
+        self.assertEqual(
+            follows.unfollow(self.reader, self.authors[:2]), set()
+        )
+
+    def test_profile_unfollow_keeps_other_followers(self):
+        another_reader = User.objects.create(username='another_reader')
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        Follow.objects.create(user=another_reader, author=self.authors[0])
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author0'}
+        ))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(Follow.objects.values_list('user', flat=True)),
+            [another_reader.pk],
+        )
+
+    def test_follow_graph_command(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'follows.csv')
+        with open(path, 'w') as file:
+            file.write(
+                'reader,author0\nreader,author1\nreader,nobody\n'
+                'nobody,author0\nauthor0,author1\n'
+            )
+        out = StringIO()
+        call_command('follow_graph', path, '--batch-size', '2', stdout=out)
+        self.assertIn('Добавлено подписок: 3, пропущено строк: 2',
+                      out.getvalue())
+        self.assertEqual(
+            set(Follow.objects.values_list('user', 'author')),
+            {
+                (self.reader.pk, self.authors[0].pk),
+                (self.reader.pk, self.authors[1].pk),
+                (self.authors[0].pk, self.authors[1].pk),
+            },
+        )
+        call_command('follow_graph', path, '--unfollow', stdout=out)
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        os.remove(path)
+        os.rmdir(directory)
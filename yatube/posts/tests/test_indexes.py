@@ -0,0 +1,78 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Comment, Follow, Group, Post, User
+from ..paginators import CursorPaginator
+from ..timeline import get_feed
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedIndexTests(TestCase):
+    """Ленты читаются по индексу в нужном порядке, без сортировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post, _ = (
+            Post.objects.create(
+                text='Текст', author=cls.author, group=cls.group
+            )
+            for _ in range(2)
+        )
+
+    def assertOrderedScan(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f'INDEX {index} ', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def assertCursorScan(self, queryset, index, **cursor):
+        """Проверяет запрос второй страницы курсорной пагинации."""
+        paginator = CursorPaginator(queryset, per_page=1, **cursor)
+        after = paginator.get_page().next_cursor
+        self.assertIsNotNone(after)
+        with CaptureQueriesContext(connection) as context:
+            paginator.get_page(after=after)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + context.captured_queries[-1]['sql']
+            )
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        self.assertIn(f'INDEX {index} ', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_group_posts(self):
+        posts = self.group.posts.all()
+        self.assertOrderedScan(posts[:10], 'post_group_date_idx')
+        self.assertCursorScan(posts, 'post_group_date_idx')
+
+    def test_author_posts(self):
+        posts = self.author.posts.all()
+        self.assertOrderedScan(posts[:10], 'post_author_date_idx')
+        self.assertCursorScan(posts, 'post_author_date_idx')
+
+    def test_follow_feed(self):
+        feed = get_feed(self.user)
+        self.assertOrderedScan(feed[:10], 'timeline_user_date_post_idx')
+        self.assertCursorScan(
+            feed, 'timeline_user_date_post_idx',
+            field='feed_date', key='feed_post',
+        )
+
+    def test_post_comments(self):
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        comments = self.post.comments.order_by('-created', '-pk')
+        self.assertOrderedScan(comments[:50], 'comment_post_created_idx')
+
+    def test_author_followers(self):
+        followers = Follow.objects.filter(author=self.author).values_list(
+            'user_id', flat=True
+        )
+        self.assertIn(
+            'COVERING INDEX follow_author_user_idx', followers.explain()
+        )
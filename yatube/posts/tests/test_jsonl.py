@@ -0,0 +1,143 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from search.index import search
+
+from .. import jsonl
+from ..management.commands.import_jsonl import read_records
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = os.path.join(TEMP_DIR, 'media')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class JSONLinesTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.path = os.path.join(TEMP_DIR, 'dump.jsonl')
+        author = User.objects.create(username='author')
+        reader = User.objects.create(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        image = default_storage.save('posts/pic.jpg', ContentFile(b'jpg'))
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост про котов {number}', author=author, group=group,
+                image=image if number == 0 else None,
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=reader, text='Комментарий'
+        )
+        Follow.objects.create(user=reader, author=author)
+        self.pub_date = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        Post.objects.filter(pk=self.posts[0].pk).update(
+            pub_date=self.pub_date
+        )
+
+    def export_and_wipe(self, **options):
+        call_command('export_jsonl', self.path, stderr=StringIO(), **options)
+        for model in (Follow, Comment, Post, Group):
+            model.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_export_format(self):
+        call_command('export_jsonl', self.path, stderr=StringIO())
+        with open(self.path, encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(
+            [record['model'] for record in records],
+            ['group'] + ['post'] * 3 + ['comment', 'follow'],
+        )
+        self.assertEqual(records[1]['author'], 'author')
+        self.assertEqual(records[1]['group'], 'group')
+        self.assertEqual(records[-1], {
+            'model': 'follow', 'user': 'reader', 'author': 'author'
+        })
+
+    def test_round_trip(self):
+        media = os.path.join(TEMP_DIR, 'export-media')
+        self.export_and_wipe(media=media)
+        image = self.posts[0].image.name
+        default_storage.delete(image)
+        call_command(
+            'import_jsonl', self.path, media=media, batch_size=2,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 3)
+        post = Post.objects.get(pk=self.posts[0].pk)
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(post.author.username, 'author')
+        self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(post.comments.get().author.username, 'reader')
+        self.assertTrue(default_storage.exists(image))
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(), 3
+        )
+        self.assertEqual(len(search('кот')), 3)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_resume_from_checkpoint(self):
+        self.export_and_wipe()
+        offsets = []
+        importer = jsonl.Importer(batch_size=2, checkpoint=offsets.append)
+        records = list(read_records(self.path, 0))
+        # Загрузка «упала» после второй пачки: группа и два поста.
+        importer.load(records[:3])
+        self.assertEqual(offsets[-1], records[2][0])
+        with open(f'{self.path}.checkpoint', 'w') as file:
+            json.dump({'offset': offsets[-1]}, file)
+        call_command(
+            'import_jsonl', self.path, resume=True, stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_unknown_model_fails_export(self):
+        path = os.path.join(TEMP_DIR, 'unknown.jsonl')
+        with self.assertRaisesMessage(CommandError, 'posts'):
+            call_command('export_jsonl', path, models='post,posts')
+        self.assertFalse(os.path.exists(path))
+
+    def test_taken_pk_stops_import(self):
+        self.export_and_wipe()
+        other = User.objects.create(username='other')
+        Post.objects.create(
+            pk=self.posts[1].pk, text='Чужой пост', author=other
+        )
+        with self.assertRaises(CommandError):
+            call_command('import_jsonl', self.path, stdout=StringIO())
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[1].pk).text, 'Чужой пост'
+        )
+        self.assertFalse(Comment.objects.exists())
+
+    def test_counts_only_inserted_rows(self):
+        call_command('export_jsonl', self.path, stderr=StringIO())
+        out = StringIO()
+        call_command(
+            'import_jsonl', self.path, no_rebuild=True, stdout=out
+        )
+        self.assertIn(
+            'Загружено group: 0, post: 0, comment: 0, follow: 0',
+            out.getvalue(),
+        )
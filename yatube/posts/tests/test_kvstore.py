@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from .. import kvstore, thumbnails
+from ..models import Post, ThumbnailRecord, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class KVStoreTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        kvstore.start_prefetching()
+        self.posts = []
+        for number in range(3):
+            buffer = BytesIO()
+            Image.new('RGB', (100, 100), 'red').save(buffer, 'JPEG')
+            image = default_storage.save(
+                f'posts/test{number}.jpg', ContentFile(buffer.getvalue())
+            )
+            self.posts.append(Post.objects.create(
+                text='Test text', author=self.user, image=image
+            ))
+
+    def tearDown(self):
+        kvstore.clear_prefetched()
+
+    def get_thumbnails(self):
+        return [
+            get_thumbnail(
+                post.image.name, thumbnails.GEOMETRY, **thumbnails.OPTIONS
+            )
+            for post in self.posts
+        ]
+
+    def test_thumbnail_key_matches_sorl(self):
+        for post, thumbnail in zip(self.posts, self.get_thumbnails()):
+            self.assertEqual(
+                thumbnails.thumbnail_key(post.image.name), thumbnail.key
+            )
+
+    def test_records_persisted_in_own_table(self):
+        self.get_thumbnails()
+        self.assertTrue(ThumbnailRecord.objects.filter(
+            key__startswith='sorl-thumbnail||image||'
+        ).exists())
+
+    def test_prefetch_loads_page_in_one_query(self):
+        expected = [thumbnail.url for thumbnail in self.get_thumbnails()]
+        cache.clear()
+        kvstore.start_prefetching()
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(self.posts)
+        with self.assertNumQueries(0):
+            urls = [thumbnail.url for thumbnail in self.get_thumbnails()]
+        self.assertEqual(urls, expected)
+
+    def test_prefetch_warms_shared_cache(self):
+        self.get_thumbnails()
+        cache.clear()
+        kvstore.start_prefetching()
+        thumbnails.prefetch(self.posts)
+        kvstore.start_prefetching()
+        with self.assertNumQueries(0):
+            thumbnails.prefetch(self.posts)
+        self.assertEqual(
+            default.kvstore.get(self.get_thumbnails()[0]).name,
+            self.get_thumbnails()[0].name,
+        )
+
+    def test_nothing_is_kept_outside_requests(self):
+        kvstore.clear_prefetched()
+        self.get_thumbnails()
+        thumbnails.prefetch(self.posts)
+        self.assertIsNone(kvstore._get_prefetched())
+        with self.assertNumQueries(0):
+            self.get_thumbnails()
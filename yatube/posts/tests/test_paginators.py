@@ -0,0 +1,82 @@
+import warnings
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.paginator import UnorderedObjectListWarning
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..paginators import CursorPaginator, CursorPage
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+        Post.objects.bulk_create(
+            Post(text=f'Test text {number}', author=cls.user)
+            for number in range(25)
+        )
+        cls.posts = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_walk_forward_and_back(self):
+        paginator = CursorPaginator(Post.objects.all(), per_page=10)
+        first = paginator.get_page()
+        self.assertFalse(first.has_previous())
+        self.assertEqual(list(first), self.posts[:10])
+        second = paginator.get_page(after=first.next_cursor)
+        self.assertEqual(list(second), self.posts[10:20])
+        third = paginator.get_page(after=second.next_cursor)
+        self.assertEqual(list(third), self.posts[20:])
+        self.assertFalse(third.has_next())
+        back = paginator.get_page(before=third.previous_cursor)
+        self.assertEqual(list(back), self.posts[10:20])
+        self.assertTrue(back.has_previous())
+        self.assertEqual(
+            list(paginator.get_page(before=back.previous_cursor)),
+            self.posts[:10]
+        )
+
+    def test_orders_unordered_queryset(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            paginator = CursorPaginator(Post.objects.order_by(), per_page=10)
+        self.assertEqual(list(paginator.get_page()), self.posts[:10])
+
+    def test_invalid_cursor_gives_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), per_page=10)
+        page = paginator.get_page(after='not-a-cursor')
+        self.assertEqual(list(page), self.posts[:10])
+
+    def test_view_opt_in_by_query_parameter(self):
+        response = self.guest_client.get(reverse('posts:index') + '?after=')
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj, CursorPage)
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?after={page_obj.next_cursor}'
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), self.posts[10:20]
+        )
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_view_opt_in_by_setting(self):
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertIsInstance(response.context['page_obj'], CursorPage)
+        self.assertContains(response, '?after=')
+
+    def test_cursor_links_keep_query_parameters(self):
+        response = self.guest_client.get(
+            reverse('posts:index') + '?after=&lang=ru'
+        )
+        page_obj = response.context['page_obj']
+        query = urlencode({'lang': 'ru', 'after': page_obj.next_cursor})
+        self.assertContains(response, '?' + query.replace('&', '&amp;'))
@@ -0,0 +1,157 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core import metrics
+
+from .. import thumbnails
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def thumbnail_exists(image_name):
+    source = ImageFile(image_name)
+    return bool(default.kvstore._get(source.key, identity='thumbnails'))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post_with_image(self):
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(buffer, 'JPEG')
+        image = default_storage.save(
+            'posts/test.jpg', ContentFile(buffer.getvalue())
+        )
+        return Post.objects.create(
+            text='Test text', author=self.user, image=image
+        )
+
+    def test_generate(self):
+        post = self.create_post_with_image()
+        self.assertFalse(thumbnail_exists(post.image.name))
+        self.assertTrue(thumbnails.generate(post.image.name))
+        self.assertTrue(thumbnail_exists(post.image.name))
+
+    def test_generation_is_measured(self):
+        metrics.registry.clear()
+        post = self.create_post_with_image()
+        thumbnails.generate(post.image.name)
+        thumbnails.generate(post.image.name)
+        thumbnails.generate_variants(post.pk, post.image.name)
+        totals, _ = metrics.collect()
+        counts = {
+            key: state[-1]
+            for key, state in totals['yatube_thumbnail_seconds'].items()
+        }
+        self.assertEqual(counts, {('thumbnail',): 1, ('variants',): 1})
+
+    def test_generate_variants(self):
+        post = self.create_post_with_image()
+        self.assertTrue(
+            thumbnails.generate_variants(post.pk, post.image.name)
+        )
+        post.refresh_from_db()
+        variants = post.variants
+        self.assertEqual(
+            [source['type'] for source in variants['sources']],
+            [
+                thumbnails.VARIANT_FORMATS[name][0]
+                for name in thumbnails.supported_formats()[:-1]
+            ],
+        )
+        self.assertIn(' 480w, ', variants['srcset'])
+        self.assertNotIn('1440w', variants['srcset'])
+        self.assertTrue(variants['src'].endswith('-960.jpg'))
+        self.assertEqual((variants['width'], variants['height']), (960, 339))
+
+    def test_generate_variants_once(self):
+        post = self.create_post_with_image()
+        thumbnails.generate_variants(post.pk, post.image.name)
+        post.refresh_from_db()
+        prefix = thumbnails.variants_prefix(post.pk)
+        files = default_storage.listdir(prefix)
+        self.assertTrue(thumbnails.generate_variants(post.pk, post.image.name))
+        self.assertEqual(default_storage.listdir(prefix), files)
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).updated, post.updated
+        )
+        Post.objects.filter(pk=post.pk).update(image_variants='')
+        thumbnails.generate_variants(post.pk, post.image.name)
+        self.assertEqual(default_storage.listdir(prefix), files)
+
+    @mock.patch('posts.thumbnails.transaction.on_commit', lambda func: func())
+    def test_variants_are_deleted_with_image(self):
+        post = self.create_post_with_image()
+        prefix = thumbnails.variants_prefix(post.pk)
+        old_files = set(default_storage.listdir(prefix)[1])
+        self.assertTrue(old_files)
+        post.image = self.create_post_with_image().image
+        post.save()
+        new_files = set(default_storage.listdir(prefix)[1])
+        self.assertTrue(new_files)
+        self.assertFalse(old_files & new_files)
+        post.delete()
+        self.assertEqual(default_storage.listdir(prefix), ([], []))
+
+    def test_variants_of_replaced_image_are_ignored(self):
+        post = self.create_post_with_image()
+        thumbnails.generate_variants(post.pk, post.image.name)
+        post.refresh_from_db()
+        post.image = 'posts/other.jpg'
+        self.assertIsNone(post.variants)
+
+    def test_post_detail_renders_picture(self):
+        post = self.create_post_with_image()
+        thumbnails.generate_variants(post.pk, post.image.name)
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, '-480.jpg 480w')
+
+    def test_pages_do_not_create_thumbnails(self):
+        post = self.create_post_with_image()
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        response = Client().get(url)
+        self.assertContains(response, 'img/post_placeholder.svg')
+        self.assertNotContains(response, f'src="{post.image.url}"')
+        self.assertFalse(thumbnail_exists(post.image.name))
+        thumbnails.generate(post.image.name)
+        cache.clear()
+        response = Client().get(url)
+        self.assertContains(
+            response,
+            f'src="{thumbnails.ready_thumbnail(post.image.name).url}"',
+        )
+
+    def test_warm_thumbnails_command(self):
+        post = self.create_post_with_image()
+        out = StringIO()
+        call_command('warm_thumbnails', processes=1, stdout=out)
+        self.assertIn('1 из 1', out.getvalue())
+        self.assertTrue(thumbnail_exists(post.image.name))
+        post.refresh_from_db()
+        self.assertIsNotNone(post.variants)
@@ -0,0 +1,62 @@
+from django.test import TestCase, override_settings
+
+from ..models import Follow, PopularAuthor, Post, TimelineEntry, User
+from ..timeline import get_feed, rebuild
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.old_post = Post.objects.create(text='Old text', author=cls.author)
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(get_feed(self.reader)), [self.old_post])
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(get_feed(self.reader).exists())
+
+    def test_new_post_is_fanned_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='New text', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(get_feed(self.reader)[0], post)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_read_on_request(self):
+        another_reader = User.objects.create(username='another_reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=another_reader, author=self.author)
+        post = Post.objects.create(text='Popular text', author=self.author)
+        self.assertTrue(
+            PopularAuthor.objects.filter(author=self.author).exists()
+        )
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(
+            list(get_feed(another_reader)), [post, self.old_post]
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_rebuild(self):
+        another_reader = User.objects.create(username='another_reader')
+        quiet_author = User.objects.create(username='quiet_author')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=another_reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=quiet_author)
+        post = Post.objects.create(text='Quiet text', author=quiet_author)
+        TimelineEntry.objects.all().delete()
+        self.assertEqual(rebuild(), 1)
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list(
+                'user', 'post', 'pub_date'
+            )),
+            [(self.reader.pk, post.pk, post.pub_date)],
+        )
+        self.assertTrue(
+            PopularAuthor.objects.filter(author=self.author).exists()
+        )
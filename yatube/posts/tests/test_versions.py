@@ -0,0 +1,163 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import _create_cache, cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .. import versions
+from ..models import Comment, Follow, Group, Post, User
+
+
+class VersionedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+        cls.author = User.objects.create(username='test_author')
+        cls.group = Group.objects.create(
+            title='Test title',
+            slug='test_slug',
+            description='Test description',
+        )
+        cls.post = Post.objects.create(
+            text='Test text',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def assertServedFromCache(self, url):
+        response = self.authorized_client.get(url)
+        self.assertIsNone(response.context)
+
+    def assertRendered(self, url):
+        response = self.authorized_client.get(url)
+        self.assertIsNotNone(response.context)
+        return response
+
+    def test_bump_changes_versions(self):
+        before = versions.get_versions([versions.GLOBAL])
+        versions.bump(versions.GLOBAL)
+        self.assertNotEqual(versions.get_versions([versions.GLOBAL]), before)
+
+    def test_bump_reaches_other_processes(self):
+        directory = tempfile.mkdtemp()
+        preset = dict(
+            settings.CACHE_PRESETS['sqlite'],
+            LOCATION=os.path.join(directory, 'cache.sqlite3'),
+        )
+        url = reverse('posts:index')
+        with override_settings(CACHES={'default': preset}):
+            self.assertRendered(url)
+            self.assertServedFromCache(url)
+            # Кэш другого воркера: свой экземпляр на тот же файл.
+            other = _create_cache(
+                preset['BACKEND'], LOCATION=preset['LOCATION']
+            )
+            other.incr(versions._version_key(versions.GLOBAL))
+            self.assertRendered(url)
+        shutil.rmtree(directory)
+
+    def test_new_post_invalidates_group_page(self):
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.assertRendered(url)
+        self.assertServedFromCache(url)
+        Post.objects.create(
+            text='New text', author=self.author, group=self.group
+        )
+        response = self.assertRendered(url)
+        self.assertContains(response, 'New text')
+
+    def test_comment_invalidates_post_detail(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        # Первый ответ выдаёт CSRF-cookie и поэтому не кэшируется.
+        self.assertRendered(url)
+        self.assertRendered(url)
+        self.assertServedFromCache(url)
+        Comment.objects.create(
+            text='New comment', post=self.post, author=self.user
+        )
+        response = self.assertRendered(url)
+        self.assertContains(response, 'New comment')
+
+    def test_follow_invalidates_follow_index(self):
+        url = reverse('posts:follow_index')
+        self.assertRendered(url)
+        self.assertServedFromCache(url)
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.assertRendered(url)
+        self.assertContains(response, self.post.text)
+
+    def test_pages_are_cached_per_user(self):
+        url = reverse('posts:index')
+        self.assertRendered(url)
+        guest_response = Client().get(url)
+        self.assertIsNotNone(guest_response.context)
+        self.assertNotContains(guest_response, self.user.username)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='test_author')
+        cls.group = Group.objects.create(title='Test title', slug='slug')
+        cls.post = Post.objects.create(
+            text='Test text', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_unchanged_pages_are_not_modified(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'test_author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        client = Client()
+        for url in urls:
+            with self.subTest(url=url):
+                # Первый ответ post_detail выдаёт CSRF-cookie и ETag не
+                # получает.
+                client.get(url)
+                response = client.get(url)
+                etag = response['ETag']
+                self.assertIn('private', response['Cache-Control'])
+                with self.assertNumQueries(0):
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+    def test_new_post_changes_etag(self):
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        Post.objects.create(text='New text', author=self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'New text')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_is_per_user(self):
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_release_changes_etag(self):
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        with override_settings(RELEASE='next'):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
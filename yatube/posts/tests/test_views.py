@@ -2,8 +2,11 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from django import forms
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Post, Group, User, Follow
+from ..fragments import fragment_key, render_fragments
+from ..models import Comment, Post, Group, User, Follow
 
 
 class PostsVIEWTests(TestCase):
@@ -62,16 +65,30 @@ class PostsVIEWTests(TestCase):
 
     def test_cache(self):
         page = reverse('posts:index')
-        first_response = self.authorized_client.get(page)
-        Post.objects.create(
-            text='Test cache text',
-            author=self.user
+        self.authorized_client.get(page)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertIsNotNone(cache.get(fragment_key(post)))
+        post.text = 'Test edited text'
+        post.save()
+        response = self.authorized_client.get(page)
+        self.assertContains(response, post.text)
+        self.assertIsNotNone(cache.get(fragment_key(post)))
+
+    def test_fragment_follows_author_and_group(self):
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk
         )
-        second_response = self.authorized_client.get(page)
-        self.assertEqual(second_response.content, first_response.content)
-        cache.clear()
-        third_response = self.authorized_client.get(page)
-        self.assertNotEqual(second_response.content, third_response.content)
+        render_fragments([post])
+        post.author.first_name = 'Новое имя'
+        post.author.save()
+        post.group.slug = 'renamed-group'
+        post.group.save()
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk
+        )
+        fragment = render_fragments([post])[0]
+        self.assertIn('Новое имя', fragment)
+        self.assertIn('renamed-group', fragment)
 
     def test_index_context(self):
         response = self.authorized_client.get(reverse('posts:index'))
@@ -109,6 +126,44 @@ class PostsVIEWTests(TestCase):
         self.assertEqual(response.context['post'], self.post)
         self.check_first_page_context(response.context['post'])
 
+    def test_post_detail_comments_in_fixed_queries(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        Comment.objects.create(
+            text='Comment', post=self.post, author=self.user
+        )
+        self.guest_client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as few_comments:
+            self.guest_client.get(url)
+        Comment.objects.bulk_create(
+            Comment(text=f'Comment {number}', post=self.post, author=self.user)
+            for number in range(60)
+        )
+        cache.clear()
+        with CaptureQueriesContext(connection) as many_comments:
+            response = self.guest_client.get(url)
+        self.assertEqual(len(many_comments), len(few_comments))
+        self.assertEqual(len(response.context['comments']), 50)
+        self.assertTrue(response.context['comments'].has_next())
+
+    def test_post_detail_comments_back_link(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        Comment.objects.bulk_create(
+            Comment(text=f'Comment {number}', post=self.post, author=self.user)
+            for number in range(60)
+        )
+        first = self.guest_client.get(url).context['comments']
+        older = self.guest_client.get(
+            url, {'comments_after': first.next_cursor}
+        )
+        self.assertTrue(older.context['comments'].has_previous())
+        self.assertContains(older, f'href="{url}"')
+        newer = self.guest_client.get(url, {
+            'comments_before': older.context['comments'].previous_cursor,
+        }).context['comments']
+        self.assertEqual(list(newer), list(first))
+        self.assertFalse(newer.has_previous())
+
     def test_post_create_context(self):
         form_fields = {
             'text': forms.fields.CharField,
@@ -0,0 +1,263 @@
+import json
+import logging
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+from sorl.thumbnail import base, default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Должны совпадать с параметрами тега {% thumbnail %} в шаблонах.
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+# Ширины копий для srcset: телефон, колонка ленты, экран с высокой
+# плотностью пикселей.
+VARIANT_WIDTHS = (480, 960, 1440)
+VARIANT_RATIO = 339 / 960
+# Форматы в порядке предпочтения; JPEG понимают все браузеры.
+VARIANT_FORMATS = {
+    'AVIF': ('image/avif', 'avif', {'quality': 60}),
+    'WEBP': ('image/webp', 'webp', {'quality': 75, 'method': 4}),
+    'JPEG': ('image/jpeg', 'jpg', {'quality': 80, 'optimize': True}),
+}
+
+_executor = None
+
+
+class ThumbnailBackend(base.ThumbnailBackend):
+    """Учитывает в метриках время создания каждой миниатюры."""
+
+    def _create_thumbnail(self, *args, **kwargs):
+        started = time.perf_counter()
+        super()._create_thumbnail(*args, **kwargs)
+        metrics.THUMBNAIL_SECONDS.observe(
+            time.perf_counter() - started, kind='thumbnail'
+        )
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def generate(image_name):
+    """Создаёт миниатюру картинки поста, если её ещё нет."""
+    try:
+        get_thumbnail(image_name, GEOMETRY, **OPTIONS)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', image_name)
+        return False
+    return True
+
+
+def thumbnail_file(image_name):
+    """Файл миниатюры, как его вычисляет get_thumbnail.
+
+    Повторяет подготовку параметров из ThumbnailBackend.get_thumbnail, но
+    не обращается ни к хранилищу, ни к кэшу.
+    """
+    backend = default.backend
+    source = ImageFile(image_name)
+    options = dict(OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, GEOMETRY, options)
+    return ImageFile(name, default.storage)
+
+
+def thumbnail_key(image_name):
+    """Ключ хранилища миниатюры."""
+    return thumbnail_file(image_name).key
+
+
+def ready_thumbnail(image_name):
+    """Готовая миниатюра или None: при показе страницы её не создаём.
+
+    Миниатюру делает enqueue после загрузки или warm_thumbnails, а пока
+    её нет, шаблон показывает заглушку.
+    """
+    return default.kvstore.get(thumbnail_file(image_name))
+
+
+def prefetch(posts):
+    """Загружает метаданные миниатюр постов страницы за один раз.
+
+    Посты с готовыми копиями картинки миниатюру не показывают.
+    """
+    prefetch_keys = getattr(default.kvstore, 'prefetch', None)
+    if prefetch_keys is None:
+        return
+    prefetch_keys([
+        thumbnail_key(post.image.name)
+        for post in posts if post.image and not post.variants
+    ])
+
+
+def supported_formats():
+    """Форматы копий, которые умеет записывать установленный Pillow."""
+    Image.init()
+    return [
+        name for name in VARIANT_FORMATS
+        if name in Image.SAVE
+        and (name != 'WEBP' or features.check('webp'))
+    ]
+
+
+def make_variants(image_name, prefix):
+    """Режет картинку под пропорции ленты и сохраняет копии всех ширин.
+
+    Возвращает описание копий для Post.image_variants: по нему шаблон
+    строит <picture>, не обращаясь к хранилищу.
+    """
+    with default_storage.open(image_name) as file:
+        source = Image.open(file)
+        source.load()
+    if source.mode not in ('RGB', 'L'):
+        source = source.convert('RGB')
+    widths = [
+        width for width in VARIANT_WIDTHS if width <= source.width
+    ] or VARIANT_WIDTHS[:1]
+    stem = posixpath.splitext(posixpath.basename(image_name))[0]
+    sources = []
+    for name in supported_formats():
+        content_type, extension, options = VARIANT_FORMATS[name]
+        urls = []
+        for width in widths:
+            image = ImageOps.fit(
+                source,
+                (width, round(width * VARIANT_RATIO)),
+                Image.LANCZOS,
+            )
+            buffer = BytesIO()
+            image.save(buffer, name, **options)
+            # Имя постоянное: повторный запуск перезаписывает файл, а не
+            # добавляет рядом копию со случайным суффиксом.
+            path = f'{prefix}/{stem}-{width}.{extension}'
+            default_storage.delete(path)
+            saved = default_storage.save(path, ContentFile(buffer.getvalue()))
+            urls.append(default_storage.url(saved))
+        sources.append({
+            'type': content_type,
+            'srcset': ', '.join(
+                f'{url} {width}w' for url, width in zip(urls, widths)
+            ),
+        })
+    # Последний формат — JPEG: он идёт в сам <img>.
+    fallback = sources.pop()
+    index = max(
+        index for index, width in enumerate(widths)
+        if width <= 960 or index == 0
+    )
+    return {
+        'image': image_name,
+        'sources': sources,
+        'srcset': fallback['srcset'],
+        'src': urls[index],
+        'width': widths[index],
+        'height': round(widths[index] * VARIANT_RATIO),
+    }
+
+
+def variants_prefix(post_id):
+    return f'posts/variants/{post_id}'
+
+
+def delete_variants(post_id):
+    """Удаляет файлы копий картинки поста."""
+    prefix = variants_prefix(post_id)
+    try:
+        _, names = default_storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for name in names:
+        default_storage.delete(f'{prefix}/{name}')
+
+
+def discard_variants(post_id):
+    """Удаляет копии прежней картинки после коммита замены или удаления."""
+    transaction.on_commit(lambda: delete_variants(post_id))
+
+
+def generate_variants(post_id, image_name):
+    """Создаёт копии картинки поста и записывает их описание в пост.
+
+    Если копии этой картинки уже есть, ничего не делает: пост не
+    пересохраняется, и закэшированные страницы остаются в силе.
+    """
+    from .models import Post
+
+    post = Post.objects.filter(pk=post_id, image=image_name).first()
+    if post is None:
+        return False
+    if post.variants:
+        return True
+    started = time.perf_counter()
+    try:
+        variants = make_variants(image_name, variants_prefix(post_id))
+    except Exception:
+        logger.exception('Не удалось создать копии %s', image_name)
+        return False
+    metrics.THUMBNAIL_SECONDS.observe(
+        time.perf_counter() - started, kind='variants'
+    )
+    # Картинку могли заменить, пока делались копии.
+    post = Post.objects.filter(pk=post_id, image=image_name).first()
+    if post is None:
+        return False
+    post.image_variants = json.dumps(variants)
+    # post_save сбросит закэшированные страницы с этим постом.
+    post.save(update_fields=['image_variants', 'updated'])
+    return True
+
+
+def process(post_id, image_name):
+    """Вся обработка новой картинки поста."""
+    thumbnail = generate(image_name)
+    return generate_variants(post_id, image_name) and thumbnail
+
+
+def process_in_background(post_id, image_name):
+    try:
+        return process(post_id, image_name)
+    finally:
+        connection.close()
+
+
+def enqueue(post):
+    """Создаёт миниатюру и копии картинки сразу после коммита загрузки.
+
+    Тогда шаблоны находят уже готовые файлы и не декодируют оригинал
+    посреди показа ленты. При THUMBNAIL_WORKERS > 0 работа уходит в пул
+    фоновых потоков и не задерживает ответ на загрузку.
+    """
+    args = post.pk, post.image.name
+    if settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(process_in_background, *args)
+        )
+    else:
+        transaction.on_commit(lambda: process(*args))
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+
+from .models import Follow, PopularAuthor, Post, TimelineEntry
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Посты авторов, у которых подписчиков больше TIMELINE_FANOUT_LIMIT,
+    не раскладываются: такой автор помечается популярным, и его посты
+    подмешиваются в ленту при чтении.
+    """
+    author_id = post.author_id
+    if PopularAuthor.objects.filter(author_id=author_id).exists():
+        return
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = list(
+        Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        )[:limit + 1]
+    )
+    if len(followers) > limit:
+        PopularAuthor.objects.get_or_create(author_id=author_id)
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные посты автора."""
+    backfill_many(user_id, [author_id])
+
+
+def backfill_many(user_id, author_ids):
+    """Добавляет в ленту подписчика посты сразу нескольких авторов."""
+    posts = Post.objects.filter(
+        author_id__in=author_ids, author__popularity__isnull=True
+    ).order_by().values_list('pk', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts.iterator()
+        ),
+        batch_size=BACKFILL_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты бывшего подписчика посты автора."""
+    prune_many(user_id, [author_id])
+
+
+def prune_many(user_id, author_ids):
+    """Убирает из ленты посты нескольких авторов одним запросом."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id__in=author_ids
+    ).delete()
+
+
+def rebuild():
+    """Раскладывает заново все ленты, например после массовой загрузки.
+
+    Возвращает число записей в лентах.
+    """
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        PopularAuthor.objects.bulk_create(
+            (
+                PopularAuthor(author_id=author_id)
+                for author_id in Follow.objects.values(
+                    'author'
+                ).annotate(
+                    followers=Count('pk')
+                ).filter(
+                    followers__gt=settings.TIMELINE_FANOUT_LIMIT
+                ).values_list('author', flat=True).order_by()
+            ),
+            ignore_conflicts=True,
+        )
+        # Одним INSERT ... SELECT: построчно через ORM большая база
+        # раскладывалась бы часами.
+        entry, follow, post, popular = (
+            connection.ops.quote_name(model._meta.db_table)
+            for model in (TimelineEntry, Follow, Post, PopularAuthor)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {entry} (user_id, post_id, pub_date) '
+                f'SELECT follow.user_id, post.id, post.pub_date '
+                f'FROM {follow} follow '
+                f'JOIN {post} post ON post.author_id = follow.author_id '
+                f'WHERE follow.author_id NOT IN '
+                f'(SELECT author_id FROM {popular})'
+            )
+    return TimelineEntry.objects.count()
+
+
+def get_feed(user):
+    """Лента подписок пользователя.
+
+    Обычно это чтение диапазона по индексу (user, pub_date, post) таблицы
+    TimelineEntry: порядок задают её же поля feed_date и feed_post, так
+    что сортировать после выборки не нужно. Посты популярных авторов
+    добавляются при чтении, и тогда лента сортируется по полям поста.
+    """
+    posts = Post.objects.select_related('group', 'author')
+    popular = Follow.objects.filter(
+        user=user, author__popularity__isnull=False
+    ).values('author')
+    if not popular.exists():
+        posts = posts.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_post=F('timeline_entries__post'),
+        )
+    else:
+        posts = posts.filter(
+            Q(timeline_entries__user=user) | Q(author__in=popular)
+        ).distinct().annotate(feed_date=F('pub_date'), feed_post=F('pk'))
+    return posts.order_by('-feed_date', '-feed_post')
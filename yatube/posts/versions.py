@@ -0,0 +1,123 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from core import metrics
+
+GLOBAL = 'global'
+GROUPS = 'groups'
+
+
+def group(slug):
+    return f'group:{slug}'
+
+
+def author(username):
+    return f'author:{username}'
+
+
+def post(post_id):
+    return f'post:{post_id}'
+
+
+def follower(user_id):
+    return f'follower:{user_id}'
+
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def get_versions(scopes):
+    """Текущие поколения областей кэша scopes.
+
+    Пропавшее из кэша поколение начинается заново со значения от текущего
+    времени, чтобы не совпасть ни с одним из прежних.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Сбрасывает всё, что закэшировано под областями scopes."""
+    for scope in scopes:
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            pass
+
+
+def page_key(request, view_name, scopes):
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    material = '|'.join(map(str, [
+        view_name,
+        request.get_full_path(),
+        request.user.pk,
+        csrf_cookie,
+        settings.RELEASE,
+        *get_versions(scopes),
+    ]))
+    return 'page:' + hashlib.md5(material.encode()).hexdigest()
+
+
+def page_etag(key):
+    """Слабый ETag страницы: он меняется вместе с ключом её кэша."""
+    return 'W/"%s"' % key[len('page:'):]
+
+
+def cache_versioned(get_scopes, timeout=None):
+    """Кэширует ответ на GET-запрос до смены поколения его областей.
+
+    get_scopes(request, *args, **kwargs) возвращает области, от которых
+    зависит страница. Ключ включает пользователя, поэтому шапка страницы
+    всегда своя. Из ключа же получается ETag: на запрос с совпавшим
+    If-None-Match приходит 304 без чтения кэша и без запросов к базе,
+    кроме загрузки пользователя.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_key(
+                request, view.__name__, get_scopes(request, *args, **kwargs)
+            )
+            name = getattr(request.resolver_match, 'view_name', view.__name__)
+            etag = page_etag(key)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                response['ETag'] = etag
+                metrics.PAGE_CACHE.inc(view=name, result='not_modified')
+                return response
+            response = cache.get(key)
+            if response is not None:
+                response['X-Cache'] = 'HIT'
+                metrics.PAGE_CACHE.inc(view=name, result='hit')
+                return response
+            metrics.PAGE_CACHE.inc(view=name, result='miss')
+            response = view(request, *args, **kwargs)
+            new_csrf_cookie = (
+                request.META.get('CSRF_COOKIE_USED')
+                and settings.CSRF_COOKIE_NAME not in request.COOKIES
+            )
+            if response.status_code == 200 and not new_csrf_cookie:
+                response['ETag'] = etag
+                # Страница своя у каждого пользователя, и её нужно
+                # проверять при каждом показе.
+                patch_cache_control(response, private=True, no_cache=True)
+                cache.set(
+                    key, response, timeout or settings.POSTS_CACHE_TIMEOUT
+                )
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -1,36 +1,74 @@
+from django.conf import settings
 from django.core.paginator import Paginator
 from django.shortcuts import redirect, render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
 
+from core.db_router import read_only
+from core.metrics import paginated
+
+from . import (
+    comment_queue, counters, follows, permissions, thumbnails, versions,
+)
+from .fragments import render_fragments
 from .models import Post, Group, User, Follow
 from .forms import PostForm, CommentForm
+from .paginators import CountedPaginator, CursorPaginator
+from .timeline import get_feed
 
 POSTS_TO_DISPLAY = 10
+COMMENTS_TO_DISPLAY = 50
 
 
-def get_page_objects(object_list, request):
-    paginator = Paginator(object_list=object_list, per_page=POSTS_TO_DISPLAY)
+def get_page_objects(object_list, request, count=None, **cursor):
+    if (
+        settings.POSTS_CURSOR_PAGINATION
+        or 'after' in request.GET
+        or 'before' in request.GET
+    ):
+        paginator = CursorPaginator(
+            object_list=object_list, per_page=POSTS_TO_DISPLAY, **cursor
+        )
+        return paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    if count is not None:
+        paginator = CountedPaginator(
+            object_list=object_list, per_page=POSTS_TO_DISPLAY, count=count
+        )
+    else:
+        paginator = Paginator(
+            object_list=object_list, per_page=POSTS_TO_DISPLAY
+        )
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-@cache_page(timeout=20, key_prefix='index_page')
+@paginated
+@read_only
+@versions.cache_versioned(lambda request: [versions.GLOBAL])
 def index(request):
     posts = Post.objects.select_related('group', 'author').all()
-    page_obj = get_page_objects(posts, request)
+    count = counters.get_count(counters.TOTAL_POSTS, Post.objects)
+    page_obj = get_page_objects(posts, request, count)
     context = {
         'title': 'Последние обновления на сайте',
         'page_obj': page_obj,
+        'fragments': render_fragments(page_obj),
         'index': True
     }
     return render(request, 'posts/index.html', context)
 
 
+@paginated
+@read_only
+@versions.cache_versioned(lambda request, slug: [versions.group(slug)])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_page_objects(posts, request)
+    posts = group.posts.select_related('author')
+    count = counters.get_count(counters.group_posts(group.pk), group.posts)
+    page_obj = get_page_objects(posts, request, count)
+    thumbnails.prefetch(page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -38,26 +76,60 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@paginated
+@read_only
+@versions.cache_versioned(lambda request, username: [
+    versions.author(username),
+    versions.follower(request.user.pk),
+    versions.GROUPS,
+])
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = get_page_objects(posts, request)
+    posts = author.posts.select_related('group')
+    posts_count = counters.get_count(
+        counters.author_posts(author.pk), author.posts
+    )
+    page_obj = get_page_objects(posts, request, posts_count)
+    thumbnails.prefetch(page_obj)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author
     ).exists()
     context = {
         'author': author,
         'page_obj': page_obj,
+        'posts_count': posts_count,
         'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@read_only
+@versions.cache_versioned(lambda request, post_id: [
+    versions.GLOBAL, versions.post(post_id)
+])
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    comments = CursorPaginator(
+        post.comments.select_related('author').order_by('-created'),
+        per_page=COMMENTS_TO_DISPLAY,
+        field='created',
+    ).get_page(
+        after=request.GET.get('comments_after'),
+        before=request.GET.get('comments_before'),
+    )
+    pending = comment_queue.pending(post, request.user)
+    if pending and not comments.has_previous():
+        comments.object_list = pending + list(comments.object_list)
     context = {
         'post': post,
+        'author_posts_count': counters.get_count(
+            counters.author_posts(post.author_id), post.author.posts
+        ),
+        'comments_count': counters.get_count(
+            counters.post_comments(post.pk), post.comments
+        ) + len(pending),
         'comment_form': CommentForm(),
         'comments': comments,
     }
@@ -78,7 +150,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if post.author.username != request.user.username:
+    if not permissions.can_edit_post(request.user, post):
         return redirect('posts:post_detail', post_id)
     form = PostForm(
         request.POST or None,
@@ -99,7 +171,11 @@ def post_edit(request, post_id):
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
-    if form.is_valid():
+    if not permissions.can_comment(request.user, post) or not form.is_valid():
+        return redirect('posts:post_detail', post_id=post_id)
+    if comment_queue.get_queue() is not None:
+        comment_queue.put(post, request.user, form.cleaned_data['text'])
+    else:
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
@@ -107,15 +183,20 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@paginated
+@read_only
 @login_required
+@versions.cache_versioned(lambda request: [
+    versions.GLOBAL, versions.follower(request.user.pk)
+])
 def follow_index(request):
-    user_subscriptions = Follow.objects.filter(user=request.user)
-    authors = user_subscriptions.values_list('author')
-    posts = Post.objects.filter(author_id__in=authors)
-    page_obj = get_page_objects(posts, request)
+    page_obj = get_page_objects(
+        get_feed(request.user), request, field='feed_date', key='feed_post'
+    )
     context = {
         'title': 'Избранные авторы',
         'page_obj': page_obj,
+        'fragments': render_fragments(page_obj),
         'follow': True
     }
     return render(request, 'posts/follow.html', context)
@@ -124,17 +205,12 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author
-        )
+    follows.follow(request.user, [author])
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follows = get_object_or_404(Follow, author=author)
-    follows.delete()
+    follows.unfollow(request.user, [author])
     return redirect('posts:profile', username=username)
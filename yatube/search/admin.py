@@ -0,0 +1,38 @@
+from . import index, suggest
+
+
+class IndexedSearchMixin:
+    """Поиск в админке по обратному индексу вместо LIKE по всей таблице.
+
+    В search_kind задаётся вид документов Document, в search_fields —
+    хотя бы одно поле, иначе админка не покажет строку поиска.
+    """
+
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = index.search(search_term, self.search_kind).values_list(
+            'object_id', flat=True
+        )
+        return queryset.filter(pk__in=ids), False
+
+
+class TrigramSearchMixin:
+    """Поиск в админке по индексу подсказок, с учётом опечаток.
+
+    К найденному по триграммам добавляется обычный поиск админки по
+    search_fields: так находятся и поля, которых нет в индексе.
+    """
+
+    suggest_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        found, use_distinct = super().get_search_results(
+            request, queryset, search_term
+        )
+        ids = suggest.matching_ids(search_term, self.suggest_kind)
+        return queryset.filter(pk__in=ids) | found, use_distinct
@@ -0,0 +1,193 @@
+"""Обратный индекс постов и комментариев и ранжирование по BM25."""
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When,
+)
+
+from posts.models import Comment, Post
+
+from .models import Document, Posting, Statistics
+from .stemmer import stem
+
+# Параметры BM25: насыщение частоты слова и вес длины документа.
+K1 = 1.2
+B = 0.75
+BATCH_SIZE = 500
+TERM_LENGTH = Posting._meta.get_field('term').max_length
+
+MODELS = {
+    Document.POST: Post,
+    Document.COMMENT: Comment,
+}
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'был', 'была', 'были', 'было', 'быть', 'в', 'вам',
+    'вас', 'во', 'вот', 'все', 'всё', 'вы', 'да', 'для', 'до', 'его', 'ее',
+    'её', 'ей', 'ему', 'если', 'есть', 'еще', 'ещё', 'же', 'за', 'и', 'из',
+    'или', 'им', 'их', 'к', 'как', 'ко', 'когда', 'ли', 'меня', 'мне', 'мы',
+    'на', 'над', 'не', 'нет', 'ни', 'но', 'о', 'об', 'он', 'она', 'они',
+    'оно', 'от', 'по', 'под', 'при', 'с', 'со', 'так', 'то', 'только', 'ты',
+    'у', 'уже', 'что', 'это', 'я',
+))
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-яё]')
+
+
+def tokenize(text):
+    """Основы слов text без стоп-слов, в порядке следования."""
+    terms = []
+    for word in WORD.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if CYRILLIC.search(word):
+            word = stem(word)
+        terms.append(word[:TERM_LENGTH])
+    return terms
+
+
+def _update_statistics(kind, documents, length):
+    Statistics.objects.filter(kind=kind).update(
+        documents=F('documents') + documents,
+        length=F('length') + length,
+    )
+
+
+@transaction.atomic
+def index_document(kind, object_id, text, created=False):
+    """Добавляет документ в индекс или обновляет его.
+
+    created=True сообщает, что документа точно ещё нет в индексе.
+    """
+    frequencies = Counter(tokenize(text))
+    length = sum(frequencies.values())
+    document = None if created else Document.objects.filter(
+        kind=kind, object_id=object_id
+    ).first()
+    if document is None:
+        document = Document.objects.create(
+            kind=kind, object_id=object_id, length=length
+        )
+        _update_statistics(kind, 1, length)
+    else:
+        Posting.objects.filter(document=document).delete()
+        Document.objects.filter(pk=document.pk).update(length=length)
+        _update_statistics(kind, 0, length - document.length)
+    Posting.objects.bulk_create(
+        Posting(term=term, document=document, frequency=frequency)
+        for term, frequency in frequencies.items()
+    )
+
+
+@transaction.atomic
+def index_documents(kind, rows):
+    """Добавляет в индекс новые документы из пар (object_id, text)."""
+    if not rows:
+        return
+    lengths = _index_batch(kind, rows)
+    _update_statistics(kind, len(rows), lengths)
+
+
+@transaction.atomic
+def remove_documents(kind, object_ids):
+    documents = dict(Document.objects.filter(
+        kind=kind, object_id__in=object_ids
+    ).values_list('pk', 'length'))
+    if not documents:
+        return
+    Posting.objects.filter(document__in=documents).delete()
+    Document.objects.filter(pk__in=documents).delete()
+    _update_statistics(kind, -len(documents), -sum(documents.values()))
+
+
+def search(query, kind=Document.POST):
+    """id документов вида kind по убыванию релевантности запросу query.
+
+    Возвращает QuerySet словарей с ключами object_id и score. Читаются
+    только строки индекса со словами запроса, а не вся таблица.
+    """
+    terms = set(tokenize(query))
+    postings = Posting.objects.filter(term__in=terms, document__kind=kind)
+    statistics = Statistics.objects.filter(kind=kind).first()
+    if not terms or statistics is None or not statistics.documents:
+        return postings.none().values('document__object_id')
+    total = statistics.documents
+    average_length = statistics.length / total or 1
+    frequencies = postings.values('term').annotate(
+        documents=Count('pk')
+    ).values_list('term', 'documents').order_by()
+    weight = Case(
+        *(
+            When(term=term, then=Value(
+                math.log(1 + (total - documents + 0.5) / (documents + 0.5))
+            ))
+            for term, documents in frequencies
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    saturation = ExpressionWrapper(
+        F('frequency') * (K1 + 1) / (
+            F('frequency')
+            + K1 * (1 - B + B * F('document__length') / average_length)
+        ),
+        output_field=FloatField(),
+    )
+    return postings.values(
+        object_id=F('document__object_id')
+    ).annotate(
+        score=Sum(weight * saturation, output_field=FloatField())
+    ).order_by('-score', '-object_id')
+
+
+def _index_batch(kind, rows):
+    """Записывает документы и их слова; возвращает их общую длину."""
+    frequencies = {pk: Counter(tokenize(text)) for pk, text in rows}
+    Document.objects.bulk_create(
+        Document(kind=kind, object_id=pk, length=sum(counts.values()))
+        for pk, counts in frequencies.items()
+    )
+    documents = Document.objects.filter(
+        kind=kind, object_id__in=frequencies
+    ).values_list('object_id', 'pk')
+    Posting.objects.bulk_create(
+        (
+            Posting(term=term, document_id=document_id, frequency=frequency)
+            for object_id, document_id in documents
+            for term, frequency in frequencies[object_id].items()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return sum(sum(counts.values()) for counts in frequencies.values())
+
+
+def rebuild():
+    """Строит индекс заново по всем постам и комментариям.
+
+    Возвращает число проиндексированных документов.
+    """
+    with transaction.atomic():
+        Posting.objects.all().delete()
+        Document.objects.all().delete()
+        for kind, model in MODELS.items():
+            rows = []
+            for row in model.objects.values_list(
+                'pk', 'text'
+            ).order_by().iterator(chunk_size=BATCH_SIZE):
+                rows.append(row)
+                if len(rows) == BATCH_SIZE:
+                    _index_batch(kind, rows)
+                    rows = []
+            if rows:
+                _index_batch(kind, rows)
+            totals = Document.objects.filter(kind=kind).aggregate(
+                documents=Count('pk'), length=Sum('length')
+            )
+            Statistics.objects.update_or_create(kind=kind, defaults={
+                'documents': totals['documents'],
+                'length': totals['length'] or 0,
+            })
+    return Document.objects.count()
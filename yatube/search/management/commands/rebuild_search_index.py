@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from search import index, suggest
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит заново поисковый индекс постов и комментариев '
+        'и индекс подсказок по пользователям и группам'
+    )
+
+    def handle(self, *args, **options):
+        count = index.rebuild()
+        suggestions = suggest.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано документов: {count}, '
+            f'подсказок: {suggestions}'
+        ))
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_statistics(apps, schema_editor):
+    Statistics = apps.get_model('search', 'Statistics')
+    Statistics.objects.bulk_create(
+        Statistics(kind=kind) for kind in ('post', 'comment')
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Document',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('length', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Statistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, unique=True)),
+                ('documents', models.PositiveIntegerField(default=0)),
+                ('length', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('frequency', models.PositiveIntegerField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='search.Document')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_documents'),
+        ),
+        migrations.AddConstraint(
+            model_name='posting',
+            constraint=models.UniqueConstraint(fields=('term', 'document'), name='unique_search_postings'),
+        ),
+        migrations.RunPython(create_statistics, migrations.RunPython.noop),
+    ]
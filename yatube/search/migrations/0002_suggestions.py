@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Suggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('text', models.CharField(max_length=300)),
+                ('label', models.CharField(max_length=300)),
+                ('key', models.CharField(help_text='username или slug для ссылки', max_length=150)),
+                ('grams', models.PositiveSmallIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Trigram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('suggestion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='search.Suggestion')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='suggestion',
+            index=models.Index(fields=['kind', 'object_id'], name='suggestion_object_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trigram',
+            constraint=models.UniqueConstraint(fields=('gram', 'suggestion'), name='unique_trigrams'),
+        ),
+    ]
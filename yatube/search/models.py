@@ -0,0 +1,112 @@
+from django.db import models
+
+
+class Document(models.Model):
+    """Проиндексированный пост или комментарий."""
+
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField()
+    length = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_search_documents'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id}'
+
+
+class Posting(models.Model):
+    """Вхождение основы слова в документ: строка обратного индекса."""
+
+    term = models.CharField(max_length=50)
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='postings',
+    )
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'document'], name='unique_search_postings'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.term} в {self.document}'
+
+
+class Statistics(models.Model):
+    """Число документов вида kind и их суммарная длина для BM25."""
+
+    kind = models.CharField(
+        max_length=10, choices=Document.KINDS, unique=True
+    )
+    documents = models.PositiveIntegerField(default=0)
+    length = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.kind}: {self.documents}'
+
+
+class Suggestion(models.Model):
+    """Строка для подсказок: имя пользователя, полное имя, группа."""
+
+    USER = 'user'
+    GROUP = 'group'
+    KINDS = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField()
+    text = models.CharField(max_length=300)
+    label = models.CharField(max_length=300)
+    key = models.CharField(
+        max_length=150, help_text='username или slug для ссылки'
+    )
+    grams = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['kind', 'object_id'], name='suggestion_object_idx'
+            )
+        ]
+
+    def __str__(self):
+        return self.text
+
+
+class Trigram(models.Model):
+    """Триграмма строки подсказок."""
+
+    gram = models.CharField(max_length=3)
+    suggestion = models.ForeignKey(
+        Suggestion,
+        on_delete=models.CASCADE,
+        related_name='trigrams',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['gram', 'suggestion'], name='unique_trigrams'
+            )
+        ]
+
+    def __str__(self):
+        return self.gram
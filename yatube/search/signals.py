@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Group, Post
+
+from . import index, suggest
+from .models import Document, Suggestion
+
+User = get_user_model()
+
+KINDS = {
+    Post: Document.POST,
+    Comment: Document.COMMENT,
+}
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Comment)
+def remember_text(sender, instance, **kwargs):
+    # Отложенный текст при сохранении не пишется, запоминать его незачем.
+    if 'text' in instance.__dict__:
+        instance._indexed_text = instance.text
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def index_saved(sender, instance, created, **kwargs):
+    if created or instance.text != getattr(
+        instance, '_indexed_text', instance.text
+    ):
+        index.index_document(
+            KINDS[sender], instance.pk, instance.text, created
+        )
+        instance._indexed_text = instance.text
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def remove_deleted(sender, instance, **kwargs):
+    index.remove_documents(KINDS[sender], [instance.pk])
+
+
+SUGGESTED_FIELDS = {
+    User: ('username', 'first_name', 'last_name'),
+    Group: ('title', 'slug'),
+}
+
+
+def _suggested_text(instance):
+    if isinstance(instance, User):
+        return instance.username, instance.get_full_name()
+    return instance.title, instance.slug
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Group)
+def remember_suggested_text(sender, instance, **kwargs):
+    if all(name in instance.__dict__ for name in SUGGESTED_FIELDS[sender]):
+        instance._suggested_text = _suggested_text(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def index_suggestion(sender, instance, created, **kwargs):
+    # Вход пользователя тоже сохраняет его, но имени не меняет.
+    text = _suggested_text(instance)
+    if created or text != getattr(instance, '_suggested_text', text):
+        kind = Suggestion.USER if sender is User else Suggestion.GROUP
+        suggest.index_object(kind, instance)
+        instance._suggested_text = text
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def remove_suggestion(sender, instance, **kwargs):
+    kind = Suggestion.USER if sender is User else Suggestion.GROUP
+    suggest.remove_objects(kind, [instance.pk])
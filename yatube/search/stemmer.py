@@ -0,0 +1,130 @@
+"""Стеммер Портера для русского языка (алгоритм Snowball).
+
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+        'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует',
+        'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+))
+DERIVATIONAL = ('ост', 'ость')
+SUPERLATIVE = ('ейше', 'ейш')
+
+
+def _after_vowel_consonant(word, start=0):
+    """Начало области после первой пары «гласная, согласная»."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(word, endings):
+    """Отрезает самое длинное окончание из групп endings.
+
+    Окончания первой группы отрезаются, только если перед ними стоит
+    «а» или «я». Возвращает None, если ни одно окончание не подошло.
+    """
+    after_a, plain = endings
+    for length in range(len(word), 0, -1):
+        ending = word[-length:]
+        if ending in plain:
+            return word[:-length]
+        if ending in after_a:
+            if word[-length - 1:-length] in ('а', 'я'):
+                return word[:-length]
+            return None
+    return None
+
+
+def _strip_adjectival(word):
+    stripped = _strip(word, ADJECTIVE)
+    if stripped is None:
+        return None
+    return _strip(stripped, PARTICIPLE) or stripped
+
+
+def _strip_inflection(rv):
+    """Шаг 1: деепричастие или возвратность и окончание."""
+    stripped = _strip(rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    rv = _strip(rv, REFLEXIVE) or rv
+    for strip in (
+        _strip_adjectival,
+        lambda part: _strip(part, VERB),
+        lambda part: _strip(part, NOUN),
+    ):
+        stripped = strip(rv)
+        if stripped is not None:
+            return stripped
+    return rv
+
+
+def _tidy_up(rv):
+    """Шаг 4: превосходная степень, двойное «н» и мягкий знак."""
+    for ending in SUPERLATIVE:
+        if rv.endswith(ending):
+            rv = rv[:-len(ending)]
+            break
+    if rv.endswith('нн'):
+        return rv[:-1]
+    if rv.endswith('ь'):
+        return rv[:-1]
+    return rv
+
+
+# Словарь текстов невелик и слова в нём повторяются: при индексации
+# почти все основы берутся из кэша.
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """Основа русского слова; слово должно быть в нижнем регистре."""
+    word = word.replace('ё', 'е')
+    rv_start = next(
+        (index + 1 for index, letter in enumerate(word)
+         if letter in VOWELS),
+        len(word),
+    )
+    r2_start = _after_vowel_consonant(word, _after_vowel_consonant(word))
+    prefix, rv = word[:rv_start], _strip_inflection(word[rv_start:])
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for ending in DERIVATIONAL[::-1]:
+        if rv.endswith(ending) and rv_start + len(rv) - len(ending) >= (
+            r2_start
+        ):
+            rv = rv[:-len(ending)]
+            break
+    return prefix + _tidy_up(rv)
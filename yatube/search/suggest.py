@@ -0,0 +1,178 @@
+"""Подсказки по триграммам: пользователи и группы с учётом опечаток.
+
+Строка разбивается на тройки букв, как в pg_trgm: «  иван » даёт «  и»,
+« ив», «ива», «ван», «ан ». Опечатка портит лишь пару троек, поэтому
+похожие строки по-прежнему делят большинство из них. Последнее слово
+запроса дописывается по ходу набора, и его конец не дополняется
+пробелом, чтобы «ива» находило «иванова».
+"""
+import math
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+from django.urls import reverse
+
+from posts.models import Group
+
+from .models import Suggestion, Trigram
+
+User = get_user_model()
+
+# Доля триграмм запроса, которые должна содержать подходящая строка.
+SIMILARITY = 0.3
+MAX_RESULTS = 20
+BATCH_SIZE = 500
+WORD = re.compile(r'\w+')
+
+
+def _words(text):
+    return WORD.findall(text.lower().replace('ё', 'е'))
+
+
+def trigrams(text, prefix=False):
+    """Множество триграмм text; при prefix=True последнее слово — начало."""
+    words = _words(text)
+    grams = set()
+    for index, word in enumerate(words):
+        padded = f'  {word}'
+        if not (prefix and index == len(words) - 1):
+            padded += ' '
+        grams.update(
+            padded[start:start + 3] for start in range(len(padded) - 2)
+        )
+    return grams
+
+
+def _entries(kind, obj):
+    if kind == Suggestion.USER:
+        full_name = obj.get_full_name()
+        label = (
+            f'{full_name} (@{obj.username})' if full_name else obj.username
+        )
+        return obj.username, label, [obj.username, full_name]
+    return obj.slug, obj.title, [obj.title, obj.slug]
+
+
+def _build(kind, objects):
+    suggestions = []
+    for obj in objects:
+        key, label, texts = _entries(kind, obj)
+        # Полное имя может совпасть с username, slug — с названием.
+        for text in dict.fromkeys(filter(None, texts)):
+            suggestions.append(Suggestion(
+                kind=kind, object_id=obj.pk, text=text[:300],
+                label=label[:300], key=key, grams=len(trigrams(text)),
+            ))
+    Suggestion.objects.bulk_create(suggestions, batch_size=BATCH_SIZE)
+    # В SQLite bulk_create не проставляет pk, поэтому строки перечитываются.
+    created = Suggestion.objects.filter(
+        kind=kind, object_id__in=[obj.pk for obj in objects]
+    ).values_list('pk', 'text')
+    Trigram.objects.bulk_create(
+        (
+            Trigram(gram=gram, suggestion_id=pk)
+            for pk, text in created
+            for gram in trigrams(text)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+@transaction.atomic
+def index_object(kind, obj):
+    """Заново заносит пользователя или группу в индекс подсказок."""
+    remove_objects(kind, [obj.pk])
+    _build(kind, [obj])
+
+
+def remove_objects(kind, object_ids):
+    Suggestion.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def rebuild():
+    """Строит индекс подсказок заново; возвращает число строк."""
+    with transaction.atomic():
+        Trigram.objects.all().delete()
+        Suggestion.objects.all().delete()
+        for kind, queryset in (
+            (Suggestion.USER, User.objects.order_by('pk')),
+            (Suggestion.GROUP, Group.objects.order_by('pk')),
+        ):
+            batch = []
+            for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.append(obj)
+                if len(batch) == BATCH_SIZE:
+                    _build(kind, batch)
+                    batch = []
+            if batch:
+                _build(kind, batch)
+    return Suggestion.objects.count()
+
+
+def _url(kind, key):
+    if kind == Suggestion.USER:
+        return reverse('posts:profile', kwargs={'username': key})
+    return reverse('posts:group_list', kwargs={'slug': key})
+
+
+def _min_shared(grams):
+    return max(1, math.ceil(SIMILARITY * len(grams)))
+
+
+def matching_ids(query, kind):
+    """id всех объектов вида kind, похожих на query, без ранжирования.
+
+    Для админки: в отличие от suggest выдача не обрезается, а запрос
+    годится как подзапрос в pk__in.
+    """
+    grams = trigrams(query, prefix=True)
+    if not grams:
+        return Trigram.objects.none().values_list('pk', flat=True)
+    return Trigram.objects.filter(
+        gram__in=grams, suggestion__kind=kind
+    ).values('suggestion').annotate(
+        shared=Count('pk')
+    ).filter(
+        shared__gte=_min_shared(grams)
+    ).values_list('suggestion__object_id', flat=True)
+
+
+def suggest(query, limit=10, kinds=None):
+    """До limit пользователей и групп, похожих на query, лучшие первыми.
+
+    Одним запросом по индексу триграмм: строки ранжируются по числу
+    общих с запросом триграмм, при равенстве короткие выше.
+    """
+    grams = trigrams(query, prefix=True)
+    if not grams:
+        return []
+    rows = Trigram.objects.filter(gram__in=grams)
+    if kinds:
+        rows = rows.filter(suggestion__kind__in=kinds)
+    rows = rows.values(
+        'suggestion__kind',
+        'suggestion__object_id',
+        'suggestion__label',
+        'suggestion__key',
+        'suggestion__grams',
+    ).annotate(
+        shared=Count('pk')
+    ).filter(
+        shared__gte=_min_shared(grams)
+    ).order_by('-shared', 'suggestion__grams')[:limit * 2]
+    results = {}
+    for row in rows:
+        kind = row['suggestion__kind']
+        object_id = row['suggestion__object_id']
+        if (kind, object_id) in results:
+            continue
+        results[kind, object_id] = {
+            'type': kind,
+            'id': object_id,
+            'label': row['suggestion__label'],
+            'url': _url(kind, row['suggestion__key']),
+            'score': round(row['shared'] / len(grams), 3),
+        }
+    return list(results.values())[:limit]
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+from .. import index
+from ..models import Document, Posting, Statistics
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_user')
+
+    def create_post(self, text):
+        return Post.objects.create(text=text, author=self.user)
+
+    def search(self, query, kind=Document.POST):
+        return [row['object_id'] for row in index.search(query, kind)]
+
+    def test_tokenize(self):
+        self.assertEqual(
+            index.tokenize('Кошки и собаки, Django 2.2!'),
+            ['кошк', 'собак', 'django', '2', '2'],
+        )
+
+    def test_post_indexed_on_save_and_delete(self):
+        post = self.create_post('Рыжие коты гуляют по крышам')
+        self.assertEqual(self.search('рыжий кот'), [post.pk])
+        post.text = 'Собаки спят'
+        post.save()
+        self.assertEqual(self.search('кот'), [])
+        self.assertEqual(self.search('собака'), [post.pk])
+        post.delete()
+        self.assertEqual(self.search('собака'), [])
+        self.assertFalse(Posting.objects.exists())
+        statistics = Statistics.objects.get(kind=Document.POST)
+        self.assertEqual((statistics.documents, statistics.length), (0, 0))
+
+    def test_comments_indexed_separately(self):
+        post = self.create_post('Про котов')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Кот спит на диване'
+        )
+        self.assertEqual(self.search('диване'), [])
+        self.assertEqual(
+            self.search('диване', Document.COMMENT), [comment.pk]
+        )
+
+    def test_ranking(self):
+        rare = self.create_post('Кот и кот, снова кот')
+        common = self.create_post('Кот один раз и много других слов тут')
+        for _ in range(3):
+            self.create_post('Совсем про другое')
+        self.assertEqual(self.search('кот'), [rare.pk, common.pk])
+
+    def test_rebuild_command(self):
+        post = self.create_post('Рыжие коты')
+        Posting.objects.all().delete()
+        Document.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(self.search('кот'), [post.pk])
+        self.assertEqual(
+            Statistics.objects.get(kind=Document.POST).documents, 1
+        )
+
+    def test_search_view(self):
+        posts = [self.create_post(f'Кот номер {n}') for n in range(12)]
+        self.create_post('Собака')
+        response = Client().get(reverse('search:search'), {'q': 'коты'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 12)
+        self.assertEqual(len(page_obj), 10)
+        self.assertTrue(all(post in posts for post in page_obj))
+        self.assertContains(response, 'q=%D0%BA%D0%BE%D1%82%D1%8B')
+
+    def test_admin_search(self):
+        post = self.create_post('Рыжие коты')
+        self.create_post('Собака')
+        model_admin = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, use_distinct = model_admin.get_search_results(
+            request, Post.objects.all(), 'кот'
+        )
+        self.assertEqual(list(queryset), [post])
+        self.assertFalse(use_distinct)
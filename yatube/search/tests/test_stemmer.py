@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from ..stemmer import stem
+
+
+class StemmerTests(SimpleTestCase):
+    def test_snowball_vocabulary(self):
+        # Пары из словаря эталонной реализации Snowball.
+        words = {
+            'вагоне': 'вагон',
+            'важная': 'важн',
+            'важнейшим': 'важн',
+            'вбегает': 'вбега',
+            'вдвоем': 'вдво',
+            'вдохновения': 'вдохновен',
+            'взволновавшись': 'взволнова',
+            'книги': 'книг',
+            'радость': 'радост',
+        }
+        for word, expected in words.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_word_forms_share_stem(self):
+        self.assertEqual(
+            {stem(word) for word in ('кошка', 'кошки', 'кошкой', 'кошек')},
+            {'кошк', 'кошек'},
+        )
+        self.assertEqual(stem('ёлка'), stem('елка'))
@@ -0,0 +1,95 @@
+from django.contrib import admin
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, User
+
+from .. import suggest
+from ..models import Suggestion, Trigram
+
+
+class SuggestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ivanov = User.objects.create(
+            username='ivanov', first_name='Иван', last_name='Иванов'
+        )
+        cls.petrov = User.objects.create(
+            username='petrov', first_name='Пётр', last_name='Петров'
+        )
+        cls.group = Group.objects.create(
+            title='Любители котов', slug='cats', description='Про котов'
+        )
+
+    def labels(self, query, **kwargs):
+        return [
+            result['label'] for result in suggest.suggest(query, **kwargs)
+        ]
+
+    def test_trigrams(self):
+        trigrams = suggest.trigrams('Кот')
+        self.assertEqual(trigrams, {'  к', ' ко', 'кот', 'от '})
+        self.assertEqual(
+            suggest.trigrams('Кот', prefix=True), trigrams - {'от '}
+        )
+
+    def test_prefix_typeahead(self):
+        self.assertEqual(self.labels('ива')[0], 'Иван Иванов (@ivanov)')
+        self.assertEqual(self.labels('pet')[0], 'Пётр Петров (@petrov)')
+
+    def test_typo_tolerance(self):
+        self.assertEqual(self.labels('ивнаов')[0], 'Иван Иванов (@ivanov)')
+        self.assertEqual(self.labels('любетели')[0], 'Любители котов')
+
+    def test_one_result_per_object(self):
+        results = suggest.suggest('иванов ivanov')
+        self.assertEqual(
+            [result['id'] for result in results].count(self.ivanov.pk), 1
+        )
+
+    def test_kept_in_sync_by_signals(self):
+        self.petrov.last_name = 'Сидоров'
+        self.petrov.save()
+        self.assertEqual(self.labels('сидор')[0], 'Пётр Сидоров (@petrov)')
+        self.group.delete()
+        self.assertEqual(self.labels('котов'), [])
+        self.assertFalse(Trigram.objects.filter(
+            suggestion__kind=Suggestion.GROUP
+        ).exists())
+
+    def test_rebuild(self):
+        Suggestion.objects.all().delete()
+        self.assertEqual(suggest.rebuild(), 6)
+        self.assertEqual(self.labels('ivanov')[0], 'Иван Иванов (@ivanov)')
+
+    def test_endpoint(self):
+        response = Client().get(
+            reverse('search:suggest'), {'q': 'кот', 'type': 'group'}
+        )
+        self.assertEqual(response.json()['results'][0], {
+            'type': Suggestion.GROUP,
+            'id': self.group.pk,
+            'label': 'Любители котов',
+            'url': reverse('posts:group_list', kwargs={'slug': 'cats'}),
+            'score': 1.0,
+        })
+
+    def test_admin_search_is_not_capped(self):
+        Group.objects.bulk_create(
+            Group(title=f'Собаки {number}', slug=f'dogs-{number}')
+            for number in range(suggest.MAX_RESULTS + 5)
+        )
+        suggest.rebuild()
+        model_admin = admin.site._registry[Group]
+        found, _ = model_admin.get_search_results(
+            None, Group.objects.all(), 'собаки'
+        )
+        self.assertEqual(found.count(), suggest.MAX_RESULTS + 5)
+        hamsters = Group.objects.create(
+            title='Грызуны', slug='rodents', description='Всё о хомяках'
+        )
+        found, _ = model_admin.get_search_results(
+            None, Group.objects.all(), 'хомяках'
+        )
+        self.assertEqual(list(found), [hamsters])
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'search'
+
+urlpatterns = [
+    path('suggest/', views.suggestions, name='suggest'),
+    path('', views.search, name='search'),
+]
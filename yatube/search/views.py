@@ -0,0 +1,57 @@
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from core.db_router import read_only
+from core.metrics import paginated
+
+from . import index, suggest
+from .models import Document
+
+RESULTS_TO_DISPLAY = 10
+KINDS = {
+    'posts': Document.POST,
+    'comments': Document.COMMENT,
+}
+
+
+@paginated
+@read_only
+def search(request):
+    query = request.GET.get('q', '').strip()
+    scope = request.GET.get('in')
+    if scope not in KINDS:
+        scope = 'posts'
+    kind = KINDS[scope]
+    paginator = Paginator(index.search(query, kind), RESULTS_TO_DISPLAY)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    ids = [row['object_id'] for row in page_obj]
+    model = index.MODELS[kind]
+    related = ('author', 'group') if kind == Document.POST else ('author',)
+    objects = model.objects.select_related(*related).in_bulk(ids)
+    page_obj.object_list = [objects[pk] for pk in ids if pk in objects]
+    context = {
+        'query': query,
+        'scope': scope,
+        'page_obj': page_obj,
+        'query_string': urlencode({'q': query, 'in': scope}),
+    }
+    return render(request, 'search/search.html', context)
+
+
+@read_only
+def suggestions(request):
+    """Подсказки для поля поиска: JSON с лучшими совпадениями."""
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+    limit = min(max(limit, 1), suggest.MAX_RESULTS)
+    kinds = request.GET.getlist('type')
+    return JsonResponse({
+        'results': suggest.suggest(
+            request.GET.get('q', ''), limit=limit, kinds=kinds
+        ),
+    })
@@ -61,7 +61,7 @@ urlpatterns = [
         name='password_reset_done'
     ),
     path(
-        'reset/<uidb46>/<token>/',
+        'reset/<uidb64>/<token>/',
         PasswordResetConfirmView.as_view(
             template_name='users/password_reset_confirm.html'
         ), name='password_reset_confirm'
@@ -28,6 +28,8 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
+    'search.apps.SearchConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
     'django.contrib.admin',
@@ -40,11 +42,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.query_budget.QueryBudgetMiddleware',
+    'core.middleware.replica.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.profiler.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,13 +80,43 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединения берутся из пула процесса (core.db_backends.pool) и
+# возвращаются в него после запроса. CONN_MAX_AGE > 0 вдобавок закрепляет
+# соединение за потоком на столько секунд.
+DATABASE_POOL = {
+    'MAX_SIZE': int(os.getenv('YATUBE_DB_POOL_SIZE', 10)),
+    'TIMEOUT': 30,
+    'MAX_LIFETIME': 3600,
+    'HEALTH_CHECK_AFTER': 30,
+}
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db_backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('YATUBE_CONN_MAX_AGE', 0)),
+        'POOL': DATABASE_POOL,
     }
 }
 
+# Реплики для чтения: YATUBE_DB_REPLICAS — пути к копиям базы SQLite через
+# запятую (для PostgreSQL реплики описываются в DATABASES так же, с
+# алиасами из REPLICA_DATABASES). В тестах реплики смотрят в основную базу.
+REPLICA_DATABASES = []
+for number, path in enumerate(
+    filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(',')), start=1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.db_backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'POOL': DATABASE_POOL,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Сколько секунд после записи клиент читает только с основной базы.
+REPLICA_STICKINESS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -120,6 +156,7 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -129,11 +166,103 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+POSTS_CURSOR_PAGINATION = False
+TIMELINE_FANOUT_LIMIT = 1000
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кто передаёт байты медиафайлов: None — сам Django (только при DEBUG),
+# 'x-accel-redirect' — nginx из внутреннего MEDIA_OFFLOAD_PREFIX,
+# 'x-sendfile' — Apache или lighttpd по пути к файлу.
+MEDIA_OFFLOAD = None
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 30
+
+POSTS_CACHE_TIMEOUT = 60 * 5
+# Версия кода: входит в ключи кэша страниц и их ETag, чтобы после
+# выкладки браузеры не получали 304 на страницы старой вёрстки.
+RELEASE = os.getenv('YATUBE_RELEASE', '')
+
+# Сколько SQL-запросов может сделать страница без кэша, по имени URL.
+# Ленты и пост с картинками делают ещё один запрос к записям миниатюр,
+# если их нет в кэше.
+QUERY_BUDGETS = {
+    'posts:index': 5,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 7,
+    'posts:follow_index': 6,
+    'posts:post_create': 14,
+    'posts:post_edit': 15,
+    'posts:add_comment': 10,
+    'posts:profile_follow': 10,
+    'posts:profile_unfollow': 6,
+    'search:search': 5,
+    'search:suggest': 1,
+}
+QUERY_BUDGET_RAISE = False
+
+# Выборочный профилировщик: доля профилируемых запросов, шаг снимков
+# стека в секундах и каталог для снимков (их выгружает profile_export).
+PROFILER_SAMPLE_RATE = float(os.getenv('YATUBE_PROFILE_RATE', 0))
+PROFILER_INTERVAL = 0.005
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Метрики для Prometheus: каталог файлов воркеров (лучше на tmpfs), как
+# часто воркер обновляет свой файл и токен доступа к /metrics. Без
+# каталога /metrics показывает только процесс, который ответил.
+METRICS_DIR = os.getenv('YATUBE_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 1
+METRICS_TOKEN = os.getenv('YATUBE_METRICS_TOKEN', '')
+
+# Фоновые потоки, заранее создающие миниатюры загруженных картинок;
+# при 0 миниатюра создаётся в запросе на загрузку, сразу после коммита.
+THUMBNAIL_WORKERS = 0
+# Метаданные миниатюр страницы читаются из кэша и базы одним запросом.
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+# Бэкенд sorl-thumbnail, замеряющий создание миниатюр для метрик.
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+
+# Отложенная запись комментариев: путь к файлу очереди SQLite или None,
+# чтобы писать сразу. Фоновый поток переносит очередь в базу раз в
+# COMMENT_QUEUE_INTERVAL секунд (при 0 — только flush_comments) пачками
+# по COMMENT_QUEUE_BATCH_SIZE; занятая строка ждёт COMMENT_QUEUE_LEASE
+# секунд, прежде чем её заберёт другой процесс.
+COMMENT_QUEUE = os.getenv('YATUBE_COMMENT_QUEUE')
+COMMENT_QUEUE_INTERVAL = 0.5
+COMMENT_QUEUE_BATCH_SIZE = 500
+COMMENT_QUEUE_LEASE = 60
+
+# Кэш: locmem у каждого процесса свой; sqlite и file общие для всех
+# воркеров на машине и не требуют сервисов; memcached и redis (нужен пакет
+# django-redis) — для нескольких машин. Выбирается переменной YATUBE_CACHE.
+CACHE_PRESETS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache_backends.sqlite.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+CACHE_BACKEND = os.getenv('YATUBE_CACHE', 'locmem')
 
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': dict(CACHE_PRESETS[CACHE_BACKEND]),
 }
+if os.getenv('YATUBE_CACHE_LOCATION'):
+    CACHES['default']['LOCATION'] = os.getenv('YATUBE_CACHE_LOCATION')
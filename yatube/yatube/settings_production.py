@@ -0,0 +1,48 @@
+"""Настройки для работы за nginx и gunicorn.
+
+Включаются переменной DJANGO_SETTINGS_MODULE=yatube.settings_production;
+порядок запуска описан в deploy/README.md.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+
+ALLOWED_HOSTS = os.getenv(
+    'YATUBE_ALLOWED_HOSTS', 'localhost,127.0.0.1'
+).split(',')
+
+# Статика с хэшем в имени и сжатыми копиями, её отдаёт nginx.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+MEDIA_OFFLOAD = os.getenv('YATUBE_MEDIA_OFFLOAD', 'x-accel-redirect')
+
+# Воркеров несколько, и кэш должен быть общим: иначе сброс поколения
+# страниц и записи миниатюр в kvstore не дойдут до других воркеров.
+CACHE_BACKEND = os.getenv('YATUBE_CACHE', 'sqlite')
+CACHES = {
+    'default': dict(CACHE_PRESETS[CACHE_BACKEND]),  # noqa: F405
+}
+if os.getenv('YATUBE_CACHE_LOCATION'):
+    CACHES['default']['LOCATION'] = os.getenv('YATUBE_CACHE_LOCATION')
+
+# Миниатюры и копии картинок создаются в фоне, а не в запросе на
+# загрузку. Задания, не доделанные до перезапуска воркера, досоздаёт
+# warm_thumbnails.
+THUMBNAIL_WORKERS = int(os.getenv('YATUBE_THUMBNAIL_WORKERS', '2'))
+
+# Воркеров несколько: метрики собираются из их файлов.
+METRICS_DIR = os.getenv(
+    'YATUBE_METRICS_DIR', os.path.join(BASE_DIR, 'metrics')  # noqa: F405
+)
+
+# nginx сообщает схему исходного запроса.
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SECURE_CONTENT_TYPE_NOSNIFF = True
+SECURE_BROWSER_XSS_FILTER = True
+SESSION_COOKIE_SECURE = CSRF_COOKIE_SECURE = (
+    os.getenv('YATUBE_HTTPS', '') == '1'
+)
@@ -1,12 +1,19 @@
+import re
+
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.views import media, prometheus_metrics
 
 urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('search/', include('search.urls', namespace='search')),
+    path('api/', include('api.urls', namespace='api')),
+    path('status/', include('core.urls', namespace='core')),
+    path('metrics', prometheus_metrics, name='metrics'),
     path('', include('posts.urls', namespace='posts')),
     path('admin/', admin.site.urls),
 ]
@@ -14,7 +21,10 @@ urlpatterns = [
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+urlpatterns += [
+    re_path(
+        r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+        media,
+        name='media',
+    ),
+]